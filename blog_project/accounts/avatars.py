@@ -0,0 +1,137 @@
+# accounts/avatars.py
+"""
+Normalized avatars.
+
+When a profile's avatar changes, ``process_avatar`` runs in the
+background pool (blog/tasks.py), centre-crops the upload to a square and
+writes one JPEG (PNG when transparent) per size in ``AVATAR_SIZES``,
+named after the SHA-256 of the upload, e.g.
+``avatars/ab/ab12...-64.jpg``. Names never change for a given picture, so
+the files can be served with a far-future ``Cache-Control``.
+
+Avatars appear next to every comment, so templates don't read them
+through ``author.profile``: ``get_avatar_urls(user_ids)`` returns
+``{user_id: {size: url}}`` from the cache (one ``get_many``), loading only
+the misses with one query. Entries are dropped whenever a profile's
+avatar changes or finishes processing.
+"""
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from blog.cache import bump_avatar_version
+from blog.images import content_hash
+
+# Square edge lengths in pixels; 2x the sizes the templates draw
+AVATAR_SIZES = (64, 128, 256)
+
+JPEG_QUALITY = 85
+
+AVATAR_DIR = 'avatars'
+
+AVATAR_URL_KEY = 'accounts:avatar:{}'
+AVATAR_URL_TIMEOUT = 24 * 3600
+
+
+def _save(name, image, format, **options):
+    if default_storage.exists(name):
+        return name
+    buffer = BytesIO()
+    image.save(buffer, format=format, **options)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def render_avatars(data, digest):
+    """Return ``{size: storage name}`` for the image bytes ``data``."""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        ext, format, options = 'png', 'PNG', {'optimize': True}
+    else:
+        image = image.convert('RGB')
+        ext, format, options = 'jpg', 'JPEG', {'quality': JPEG_QUALITY, 'optimize': True}
+
+    names = {}
+    for size in AVATAR_SIZES:
+        square = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        names[str(size)] = _save(f'{AVATAR_DIR}/{digest[:2]}/{digest}-{size}.{ext}',
+                                 square, format, **options)
+    return names
+
+
+def process_avatar(profile_id):
+    """Write the square sizes of one profile's avatar (idempotent)."""
+    from .models import Profile
+
+    profile = (
+        Profile.objects.filter(pk=profile_id)
+        .only('user_id', 'avatar', 'avatar_hash', 'avatar_sizes').first()
+    )
+    if profile is None:
+        return
+    current = Profile.objects.filter(pk=profile_id, avatar=profile.avatar.name)
+    if not profile.avatar:
+        current.update(avatar_hash='', avatar_sizes={})
+    else:
+        with profile.avatar.open('rb') as f:
+            data = f.read()
+        digest = content_hash(data)
+        if digest == profile.avatar_hash and profile.avatar_sizes:
+            return
+        current.update(avatar_hash=digest, avatar_sizes=render_avatars(data, digest))
+    forget_avatar(profile.user_id)
+
+
+def _urls(avatar, sizes):
+    if sizes:
+        return {size: default_storage.url(name) for size, name in sizes.items()}
+    if avatar:
+        # Not processed yet: the original stands in for every size
+        url = default_storage.url(avatar)
+        return {str(size): url for size in AVATAR_SIZES}
+    return {}
+
+
+def get_avatar_urls(user_ids):
+    """``{user_id: {size: url}}``; users without an avatar map to ``{}``."""
+    from .models import Profile
+
+    user_ids = set(user_ids)
+    keys = {AVATAR_URL_KEY.format(user_id): user_id for user_id in user_ids}
+    found = {keys[key]: urls for key, urls in cache.get_many(keys).items()}
+
+    missing = user_ids - found.keys()
+    if missing:
+        loaded = {user_id: {} for user_id in missing}
+        for user_id, avatar, sizes in Profile.objects.filter(user_id__in=missing).values_list(
+            'user_id', 'avatar', 'avatar_sizes'
+        ):
+            loaded[user_id] = _urls(avatar, sizes)
+        cache.set_many(
+            {AVATAR_URL_KEY.format(user_id): urls for user_id, urls in loaded.items()},
+            AVATAR_URL_TIMEOUT,
+        )
+        found.update(loaded)
+    return found
+
+
+def attach_avatar_urls(objects, user_attr='author_id'):
+    """Set ``avatar_urls`` on each object from its ``user_attr`` user id."""
+    objects = list(objects)
+    urls = get_avatar_urls(getattr(obj, user_attr) for obj in objects)
+    for obj in objects:
+        obj.avatar_urls = urls[getattr(obj, user_attr)]
+    return objects
+
+
+def forget_avatar(user_id):
+    cache.delete(AVATAR_URL_KEY.format(user_id))
+    # Pages showing the avatar next to a comment revalidate
+    bump_avatar_version()
@@ -56,3 +56,11 @@ class UserProfileForm(forms.ModelForm):
                 'placeholder': 'City, Country'
             }),
         }
+
+
+class AvatarForm(forms.ModelForm):
+    # Checks the upload really is an image before it is stored and queued
+    # for resizing (accounts/avatars.py)
+    class Meta:
+        model = Profile
+        fields = ['avatar']
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.avatars import process_avatar
+from accounts.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Generate the square avatar sizes for profiles that have none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-check every profile with an avatar, not only unprocessed ones',
+        )
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(avatar='').exclude(avatar__isnull=True)
+        if not options['all']:
+            profiles = profiles.filter(avatar_sizes={})
+
+        start = time.perf_counter()
+        total = 0
+        for profile_id in profiles.order_by('pk').values_list('pk', flat=True).iterator():
+            process_avatar(profile_id)
+            total += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Processed {total} avatars in {elapsed:.2f}s'))
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+OLD_DEFAULT = 'profile_pics/default.jpg'
+
+
+def clear_default_picture(apps, schema_editor):
+    # The old placeholder default is not a real upload
+    Profile = apps.get_model('accounts', 'Profile')
+    Profile.objects.filter(avatar=OLD_DEFAULT).update(avatar=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='profile',
+            old_name='profile_picture',
+            new_name='avatar',
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/'),
+        ),
+        migrations.RunPython(clear_default_picture, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_sizes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='birth_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,7 @@
 # accounts/models.py
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save
 from django.dispatch import receiver
 
 class Profile(models.Model):
@@ -11,6 +11,9 @@ class Profile(models.Model):
     location = models.CharField(max_length=100, blank=True)
     website = models.URLField(blank=True)
     birth_date = models.DateField(null=True, blank=True)
+    # Square sizes of the avatar, filled in by accounts/avatars.py
+    avatar_hash = models.CharField(max_length=64, blank=True, editable=False)
+    avatar_sizes = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return f'{self.user.username} Profile'
@@ -25,4 +28,28 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, "profile"):
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+
+
+# Normalize avatars off the request thread whenever the upload changes
+
+@receiver(post_init, sender=Profile)
+def remember_avatar(sender, instance, **kwargs):
+    # Deferred fields are not in __dict__; reading them would query
+    avatar = instance.__dict__.get('avatar')
+    instance._loaded_avatar = getattr(avatar, 'name', avatar) or ''
+
+
+@receiver(post_save, sender=Profile)
+def process_avatar(sender, instance, raw=False, **kwargs):
+    if raw or 'avatar' not in instance.__dict__:
+        return
+    name = instance.avatar.name or ''
+    if name == instance._loaded_avatar:
+        return
+    from blog.tasks import enqueue
+    from .avatars import forget_avatar, process_avatar as normalize
+
+    instance._loaded_avatar = name
+    forget_avatar(instance.user_id)
+    enqueue(normalize, instance.pk)
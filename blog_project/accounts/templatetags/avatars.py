@@ -0,0 +1,30 @@
+from django import template
+from django.utils.html import format_html
+
+from accounts.avatars import get_avatar_urls
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar(user_or_urls, size=32, css_class='avatar'):
+    """
+    ``<img>`` of a user's avatar drawn at ``size`` pixels, with a 2x
+    ``srcset``, e.g. ``{% avatar comment.avatar_urls 32 %}`` or
+    ``{% avatar user 128 "avatar-img rounded-circle" %}``. Accepts the
+    ``avatar_urls`` set by ``attach_avatar_urls`` or a user, whose URLs
+    come from the cache. Empty when there is no avatar.
+    """
+    urls = user_or_urls
+    if not isinstance(urls, dict):
+        urls = get_avatar_urls([user_or_urls.pk])[user_or_urls.pk]
+    if not urls:
+        return ''
+    # Smallest stored size that is still sharp at 1x and at 2x
+    available = sorted(int(s) for s in urls)
+    one_x = next((s for s in available if s >= size), available[-1])
+    two_x = next((s for s in available if s >= size * 2), available[-1])
+    return format_html(
+        '<img src="{}" srcset="{} 2x" alt="" class="{}" width="{}" height="{}" loading="lazy">',
+        urls[str(one_x)], urls[str(two_x)], css_class, size, size,
+    )
@@ -1,3 +1,82 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .avatars import AVATAR_SIZES, get_avatar_urls
+from .forms import AvatarForm
+from .models import Profile
+
+
+def image_upload(name='me.jpg', size=(900, 600), mode='RGB', format='JPEG'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'blue').save(buffer, format=format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        media_override = override_settings(MEDIA_ROOT=self.media)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        cache.clear()
+        self.user = User.objects.create_user(username='face', password='testpass123')
+
+    def upload(self, upload):
+        profile = self.user.profile
+        profile.avatar = upload
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        profile.refresh_from_db()
+        return profile
+
+    def test_avatar_is_cropped_to_hashed_squares(self):
+        profile = self.upload(image_upload())
+        self.assertEqual(sorted(map(int, profile.avatar_sizes)), sorted(AVATAR_SIZES))
+        for size, name in profile.avatar_sizes.items():
+            self.assertIn(profile.avatar_hash, name)
+            with Image.open(os.path.join(self.media, name)) as image:
+                self.assertEqual(image.size, (int(size), int(size)))
+
+    def test_transparent_avatar_stays_png(self):
+        profile = self.upload(image_upload('me.png', mode='RGBA', format='PNG'))
+        self.assertTrue(all(name.endswith('.png') for name in profile.avatar_sizes.values()))
+
+    def test_urls_are_cached_and_refreshed_on_change(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_avatar_urls([self.user.pk]), {self.user.pk: {}})
+        with self.assertNumQueries(0):
+            get_avatar_urls([self.user.pk])
+
+        profile = self.upload(image_upload())
+        urls = get_avatar_urls([self.user.pk])[self.user.pk]
+        self.assertTrue(urls['64'].endswith(profile.avatar_sizes['64']))
+
+    def test_unprocessed_avatar_falls_back_to_original(self):
+        Profile.objects.filter(user=self.user).update(avatar='avatars/raw.jpg')
+        urls = get_avatar_urls([self.user.pk])[self.user.pk]
+        self.assertTrue(all(url.endswith('avatars/raw.jpg') for url in urls.values()))
+
+    def test_template_tag_picks_sharp_sizes(self):
+        self.upload(image_upload())
+        template = Template('{% load avatars %}{% avatar user size %}')
+        html = template.render(Context({'user': self.user, 'size': 64}))
+        self.assertRegex(html, r'src="[^"]+-64\.jpg" srcset="[^"]+-128\.jpg 2x"')
+        self.assertIn('width="64" height="64"', html)
+        html = template.render(Context({'user': self.user, 'size': 32}))
+        self.assertRegex(html, r'src="[^"]+-64\.jpg" srcset="[^"]+-64\.jpg 2x"')
+
+    def test_invalid_upload_is_rejected(self):
+        form = AvatarForm(files={'avatar': SimpleUploadedFile('me.jpg', b'not an image')},
+                          instance=self.user.profile)
+        self.assertFalse(form.is_valid())
+        self.assertIn('avatar', form.errors)
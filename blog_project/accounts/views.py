@@ -9,7 +9,7 @@ from django.urls import reverse
 from django.db.models import Sum, Count
 
 # Import your forms and models
-from .forms import UserRegistrationForm, UserProfileForm
+from .forms import AvatarForm, UserRegistrationForm, UserProfileForm
 from .models import Profile
 
 # Import from blog app if needed
@@ -74,7 +74,7 @@ def profile_view(request):
         
         # Calculate statistics
         total_views = posts.aggregate(Sum('views'))['views__sum'] or 0
-        total_likes = sum(post.likes.count() for post in posts) if hasattr(posts.first(), 'likes') else 0
+        total_likes = posts.aggregate(Sum('like_count'))['like_count__sum'] or 0
         published_count = posts.filter(status='published').count()
         draft_count = posts.filter(status='draft').count()
         avg_views = total_views / published_count if published_count > 0 else 0
@@ -161,9 +161,13 @@ def update_profile(request):
         profile.location = request.POST.get('location', profile.location)
         profile.website = request.POST.get('website', profile.website)
         
-        # Handle avatar upload
+        # Handle avatar upload; a valid form sets profile.avatar, which is
+        # resized in the background (accounts/avatars.py)
         if 'avatar' in request.FILES:
-            profile.avatar = request.FILES['avatar']
+            avatar_form = AvatarForm(files=request.FILES, instance=profile)
+            if not avatar_form.is_valid():
+                messages.error(request, 'Please upload a valid image.')
+                return redirect('profile_view')
         
         profile.save()
         
@@ -177,8 +181,11 @@ def update_profile(request):
 def update_avatar(request):
     if request.method == 'POST' and 'avatar' in request.FILES:
         profile, created = Profile.objects.get_or_create(user=request.user)
-        profile.avatar = request.FILES['avatar']
-        profile.save()
-        messages.success(request, 'Profile picture updated!')
+        form = AvatarForm(files=request.FILES, instance=profile)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Profile picture updated!')
+        else:
+            messages.error(request, 'Please upload a valid image.')
     
     return redirect('profile_view')
\ No newline at end of file
@@ -4,7 +4,8 @@ from .models import Post, Category, Tag, Like
 from django.utils.html import format_html
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'status', 'created_date', 'views', 'get_like_count')
+    list_display = ('title', 'author', 'status', 'created_date', 'views', 'get_like_count', 'comment_count')
+    list_select_related = ('author',)
     list_filter = ('status', 'created_date', 'author', 'category')  # CHANGED: 'categories' → 'category'
     search_fields = ('title', 'content', 'excerpt')
     prepopulated_fields = {'slug': ('title',)}
@@ -32,9 +33,10 @@ class PostAdmin(admin.ModelAdmin):
     view_post.short_description = 'View on Site'
     
     def get_like_count(self, obj):
-        # Count likes from Like model
-        return obj.likes.count()
+        # Denormalized counter, no extra query per row
+        return obj.like_count
     get_like_count.short_description = 'Likes'
+    get_like_count.admin_order_field = 'like_count'
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug')
@@ -0,0 +1,333 @@
+# blog/api.py
+"""
+Read-only JSON API over posts, categories, tags and comments.
+
+    /api/posts/             ?category=<slug>&tag=<slug>&author=<username>
+    /api/posts/<id>/
+    /api/categories/, /api/categories/<id>/
+    /api/tags/, /api/tags/<id>/
+    /api/comments/          ?post=<id> (then in thread order)
+    /api/comments/<id>/
+
+``?fields=a,b,c`` picks the fields of each object (sparse fieldsets);
+without it a resource's default fields are returned. Lists are keyset
+paginated (blog/pagination.py): ``?limit=`` up to ``MAX_LIMIT`` rows,
+and ``next``/``previous`` links carrying an opaque ``cursor``.
+
+Every field declares the ``values()`` lookups it reads, so a request
+selects only the columns its fields need and joins a related table only
+when a field of it was asked for (``author__username`` is the
+``values()`` form of ``select_related``). Many-valued fields (a post's
+tags) are loaded with one extra query for the whole page, like
+``prefetch_related``, and only when requested. Rows are serialized
+straight from the ``values()`` dicts; no model instances are built.
+
+Responses carry an ETag of the body, so clients revalidating an
+unchanged page or object get a 304 without the body.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from comments.models import Comment
+from comments.threads import exclude_hidden
+from .models import Category, Post, Tag
+from .pagination import KeysetPaginator
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class Field:
+    """
+    One field of a resource: the ``values()`` lookups it needs and how to
+    render it from a row. ``prefetch(ids)`` fields instead load their
+    values for a whole page at once, as ``{id: value}``.
+    """
+
+    def __init__(self, *lookups, render=None, prefetch=None):
+        self.lookups = lookups
+        self.render = render or (lambda row: row[lookups[0]])
+        self.prefetch = prefetch
+
+
+def _related(prefix, *names):
+    """A nested object from a foreign key, or None when it is not set."""
+    lookups = (f'{prefix}_id', *(f'{prefix}__{name}' for name in names))
+
+    def render(row):
+        if row[lookups[0]] is None:
+            return None
+        return {'id': row[lookups[0]], **{name: row[f'{prefix}__{name}'] for name in names}}
+
+    return Field(*lookups, render=render)
+
+
+def _url(view_name):
+    return Field('slug', render=lambda row: reverse(view_name, kwargs={'slug': row['slug']}))
+
+
+def _post_tags(ids):
+    tags = {}
+    rows = (
+        Post.tags.through.objects.filter(post_id__in=ids)
+        .order_by('tag__name')
+        .values_list('post_id', 'tag_id', 'tag__name', 'tag__slug')
+    )
+    for post_id, tag_id, name, slug in rows:
+        tags.setdefault(post_id, []).append({'id': tag_id, 'name': name, 'slug': slug})
+    return tags
+
+
+class Resource:
+    def __init__(self, queryset, fields, list_fields, detail_fields=None,
+                 ordering=('-id',), filters=None):
+        self.queryset = queryset
+        self.fields = fields
+        self.list_fields = list_fields
+        self.detail_fields = detail_fields or list_fields
+        self.ordering = ordering
+        # Query parameter -> (lookup, converter)
+        self.filters = filters or {}
+
+    def ordering_for(self, params):
+        return self.ordering
+
+    def visible(self, queryset, filters):
+        """``queryset`` narrowed to what may be shown; ``filters`` are the converted query filters."""
+        return queryset
+
+
+class CommentResource(Resource):
+    def ordering_for(self, params):
+        # One post's comments come in thread order (see comments/threads.py)
+        return ('path',) if 'post' in params else self.ordering
+
+    def visible(self, queryset, filters):
+        # Replies under a hidden comment are hidden with it, as on the post page
+        return exclude_hidden(queryset, post=filters.get('post'))
+
+
+POSTS = Resource(
+    Post.objects.filter(status='published'),
+    fields={
+        'id': Field('id'),
+        'title': Field('title'),
+        'slug': Field('slug'),
+        'url': _url('post_detail'),
+        'excerpt': Field('excerpt'),
+        'content': Field('content'),
+        'author': _related('author', 'username'),
+        'category': _related('category', 'name', 'slug'),
+        'tags': Field(prefetch=_post_tags),
+        'publish_date': Field('publish_date'),
+        'updated_date': Field('updated_date'),
+        'featured': Field('featured'),
+        'views': Field('views'),
+        'like_count': Field('like_count'),
+        'comment_count': Field('comment_count'),
+        'meta_title': Field('meta_title'),
+        'meta_description': Field('meta_description'),
+    },
+    list_fields=('id', 'title', 'slug', 'url', 'excerpt', 'author', 'category', 'tags',
+                 'publish_date', 'like_count', 'comment_count'),
+    detail_fields=('id', 'title', 'slug', 'url', 'excerpt', 'content', 'author', 'category',
+                   'tags', 'publish_date', 'updated_date', 'views', 'like_count',
+                   'comment_count'),
+    # Matches the (publish_date, id) index used by the HTML listings
+    ordering=('-publish_date', '-id'),
+    filters={
+        'category': ('category__slug', str),
+        'tag': ('tags__slug', str),
+        'author': ('author__username', str),
+    },
+)
+
+CATEGORIES = Resource(
+    Category.objects.all(),
+    fields={
+        'id': Field('id'),
+        'name': Field('name'),
+        'slug': Field('slug'),
+        'url': _url('category_posts'),
+        'description': Field('description'),
+    },
+    list_fields=('id', 'name', 'slug', 'url'),
+    detail_fields=('id', 'name', 'slug', 'url', 'description'),
+    ordering=('name', 'id'),
+)
+
+TAGS = Resource(
+    Tag.objects.all(),
+    fields={
+        'id': Field('id'),
+        'name': Field('name'),
+        'slug': Field('slug'),
+    },
+    list_fields=('id', 'name', 'slug'),
+    ordering=('name', 'id'),
+)
+
+COMMENTS = CommentResource(
+    Comment.objects.filter(active=True, post__status='published'),
+    fields={
+        'id': Field('id'),
+        'post': Field('post_id'),
+        'parent': Field('parent_id'),
+        'depth': Field('depth'),
+        'author': _related('author', 'username'),
+        'content': Field('content'),
+        'created_date': Field('created_date'),
+    },
+    list_fields=('id', 'post', 'parent', 'depth', 'author', 'content', 'created_date'),
+    filters={'post': ('post_id', int)},
+)
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _requested_fields(request, resource, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    names = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in resource.fields]
+    if unknown:
+        raise BadRequest(
+            f"Unknown field(s): {', '.join(unknown)}. "
+            f"Available: {', '.join(resource.fields)}"
+        )
+    return names or default
+
+
+def _values(queryset, resource, names, extra=()):
+    """``queryset`` selecting just what ``names`` (and ``extra``) need."""
+    lookups = dict.fromkeys(('id', *extra))
+    for name in names:
+        lookups.update(dict.fromkeys(resource.fields[name].lookups))
+    return queryset.values(*lookups)
+
+
+def _serialize(rows, resource, names):
+    fields = [(name, resource.fields[name]) for name in names]
+    prefetched = {
+        name: field.prefetch([row['id'] for row in rows])
+        for name, field in fields if field.prefetch
+    }
+    data = []
+    for row in rows:
+        obj = {}
+        for name, field in fields:
+            if field.prefetch:
+                obj[name] = prefetched[name].get(row['id'], [])
+            else:
+                obj[name] = field.render(row)
+        data.append(obj)
+    return data
+
+
+def _json_response(request, data, status=200):
+    body = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    if status == 200:
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        # Shared caches may keep it, but must revalidate on every use
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+    return HttpResponse(body, content_type='application/json', status=status)
+
+
+def _error(request, message, status=400):
+    return _json_response(request, {'error': message}, status=status)
+
+
+def _link(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def list_view(resource):
+    @require_safe
+    def view(request):
+        try:
+            names = _requested_fields(request, resource, resource.list_fields)
+            limit = request.GET.get('limit', DEFAULT_LIMIT)
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise BadRequest('limit must be an integer')
+            if not 1 <= limit <= MAX_LIMIT:
+                raise BadRequest(f'limit must be between 1 and {MAX_LIMIT}')
+            queryset = resource.queryset
+            filters = {}
+            for param, (lookup, convert) in resource.filters.items():
+                if param in request.GET:
+                    try:
+                        filters[param] = convert(request.GET[param])
+                    except ValueError:
+                        raise BadRequest(f'Invalid {param}')
+                    queryset = queryset.filter(**{lookup: filters[param]})
+        except BadRequest as exc:
+            return _error(request, str(exc))
+        queryset = resource.visible(queryset, filters)
+
+        ordering = resource.ordering_for(request.GET)
+        paginator = KeysetPaginator(
+            _values(queryset, resource, names, extra=[name.lstrip('-') for name in ordering]),
+            ordering=ordering,
+            per_page=limit,
+        )
+        page = paginator.get_page(request.GET.get('cursor'))
+        return _json_response(request, {
+            'results': _serialize(page.object_list, resource, names),
+            'next': _link(request, page.next_cursor),
+            'previous': _link(request, page.previous_cursor),
+        })
+
+    return view
+
+
+def detail_view(resource):
+    @require_safe
+    def view(request, pk):
+        try:
+            names = _requested_fields(request, resource, resource.detail_fields)
+        except BadRequest as exc:
+            return _error(request, str(exc))
+        row = _values(resource.visible(resource.queryset.filter(pk=pk), {}), resource, names).first()
+        if row is None:
+            return _error(request, 'Not found', status=404)
+        return _json_response(request, _serialize([row], resource, names)[0])
+
+    return view
+
+
+@require_safe
+def api_root(request):
+    return _json_response(request, {
+        name: reverse(f'api_{name}')
+        for name in ('posts', 'categories', 'tags', 'comments')
+    })
+
+
+post_list = list_view(POSTS)
+post_detail = detail_view(POSTS)
+category_list = list_view(CATEGORIES)
+category_detail = detail_view(CATEGORIES)
+tag_list = list_view(TAGS)
+tag_detail = detail_view(TAGS)
+comment_list = list_view(COMMENTS)
+comment_detail = detail_view(COMMENTS)
@@ -0,0 +1,15 @@
+# blog/api_urls.py
+from django.urls import path
+from . import api
+
+urlpatterns = [
+    path('', api.api_root, name='api_root'),
+    path('posts/', api.post_list, name='api_posts'),
+    path('posts/<int:pk>/', api.post_detail, name='api_post_detail'),
+    path('categories/', api.category_list, name='api_categories'),
+    path('categories/<int:pk>/', api.category_detail, name='api_category_detail'),
+    path('tags/', api.tag_list, name='api_tags'),
+    path('tags/<int:pk>/', api.tag_detail, name='api_tag_detail'),
+    path('comments/', api.comment_list, name='api_comments'),
+    path('comments/<int:pk>/', api.comment_detail, name='api_comment_detail'),
+]
@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class BlogConfig(AppConfig):
     name = 'blog'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
+        from . import metrics, ratelimit, signals  # noqa: F401
+
+        # Per-request query metrics (blog/metrics.py)
+        connection_created.connect(metrics.install)
+        # Refuse to start with a cache that can't count hits atomically
+        checks.register(ratelimit.check_cache_backend, checks.Tags.caches)
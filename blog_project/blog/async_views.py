@@ -0,0 +1,196 @@
+# blog/async_views.py
+"""
+Async versions of the hot read paths, routed instead of their sync
+counterparts in blog/views.py when the site runs under ASGI
+(``ASYNC_VIEWS``, set by blog_project/asgi.py).
+
+Reads go through the async ORM, and reads that don't depend on each
+other are awaited together with ``asyncio.gather``. Templates are still
+rendered by the sync template engine, in the request's thread, because
+context processors and templates may touch lazy relations.
+
+Django's async ORM currently runs each query in that same per-request
+thread, so gathered queries don't overlap yet; what the event loop gains
+is that a request no longer holds a thread while it waits on the cache,
+the database or a slow client.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.shortcuts import aget_object_or_404, render
+from django.utils.cache import get_conditional_response
+
+from . import feeds, sitemaps, views
+from .cache import (
+    AVATAR_VERSION_KEY, RELATED_VERSION_KEY, aget_version, ahas_pending_messages,
+    cache_anonymous_page, get_cached_categories,
+)
+from .counters import view_counts
+from .forms import CommentForm
+from .models import Category, Post
+from .pagination import KeysetPaginator
+from .search import search_posts
+from comments.threads import ORDERS as COMMENT_ORDERS, comment_page
+
+arender = sync_to_async(render)
+
+
+async def _auser(request):
+    # Resolve the user once without blocking, and keep it on the request
+    # so the sync code below (templates, helpers) doesn't load it again
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+@cache_anonymous_page
+async def home(request):
+    await _auser(request)
+    featured_posts, recent_posts, categories = await asyncio.gather(
+        _alist(views._featured_posts()),
+        views._recent_posts_paginator().aget_page(request.GET.get('cursor')),
+        sync_to_async(get_cached_categories)(),
+    )
+    context = {
+        'featured_posts': featured_posts,
+        'categories': categories,
+        'recent_posts': recent_posts,
+    }
+    return await arender(request, 'home.html', context)
+
+
+def _search_page(query, category, page):
+    # Ranked full-text search has no async API; it runs in the request thread
+    return Paginator(search_posts(query, category=category), 10).get_page(page)
+
+
+@cache_anonymous_page
+async def post_list(request):
+    await _auser(request)
+    query = request.GET.get('q')
+
+    category = None
+    category_slug = request.GET.get('category')
+    if category_slug:
+        category = await aget_object_or_404(Category, slug=category_slug)
+
+    if query:
+        posts = await sync_to_async(_search_page)(query, category, request.GET.get('page'))
+    else:
+        posts_list = Post.objects.filter(status='published').select_related('author')
+        if category:
+            posts_list = posts_list.filter(category=category)
+        posts = await KeysetPaginator(posts_list, per_page=10).aget_page(request.GET.get('cursor'))
+
+    context = {
+        'posts': posts,
+        'query': query,
+        'category': category,
+    }
+    return await arender(request, 'blog/post_list.html', context)
+
+
+@cache_anonymous_page
+async def category_posts(request, slug):
+    """Display all posts in a specific category"""
+    await _auser(request)
+    # Filtering on the slug lets the posts query run alongside the lookup
+    category, posts = await asyncio.gather(
+        aget_object_or_404(Category, slug=slug),
+        KeysetPaginator(
+            Post.objects.filter(category__slug=slug, status='published')
+            .select_related('author', 'category'),
+            per_page=12,
+        ).aget_page(request.GET.get('cursor')),
+    )
+    context = {
+        'category': category,
+        'posts': posts,
+    }
+    return await arender(request, 'blog/category_posts.html', context)
+
+
+async def _liked(post, user):
+    return user.is_authenticated and await post.likes.filter(pk=user.pk).aexists()
+
+
+async def post_detail(request, slug):
+    if request.method not in ('GET', 'HEAD'):
+        # Comment submissions keep going through the sync view
+        return await sync_to_async(views.post_detail)(request, slug)
+
+    user = await _auser(request)
+    validators = None
+    # A pending flash message has to be rendered, so never answer 304 then
+    if not await ahas_pending_messages(request):
+        row = await views._post_detail_state(slug).afirst()
+        if row:
+            versions = (
+                await aget_version(RELATED_VERSION_KEY), await aget_version(AVATAR_VERSION_KEY)
+            )
+            validators = views._post_detail_validators(request, slug, row, versions)
+        if validators is not None:
+            post_id, etag, last_modified = validators
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                # The reader still saw the post
+                if request.method == 'GET':
+                    await sync_to_async(view_counts.increment)(post_id)
+                return views._post_detail_cache_headers(not_modified, request, etag, last_modified)
+
+    post = await aget_object_or_404(Post.objects.select_related('author', 'category'), slug=slug)
+    # May flush the buffered view counts to the database
+    await sync_to_async(post.increment_views)()
+
+    # Only the first page of comments; the rest is loaded on demand
+    comment_order = request.GET.get('comments')
+    if comment_order not in COMMENT_ORDERS:
+        comment_order = 'oldest'
+    comments, liked, related_posts = await asyncio.gather(
+        sync_to_async(comment_page)(post, order=comment_order),
+        _liked(post, user),
+        _alist(views._related_posts(post)),
+    )
+
+    context = {
+        'post': post,
+        'comments': comments,
+        'comment_order': comment_order,
+        'related_posts': related_posts,
+        'form': CommentForm(),
+        'liked': liked,
+    }
+    response = await arender(request, 'blog/post_detail.html', context)
+    if validators is not None:
+        _, etag, last_modified = validators
+        return views._post_detail_cache_headers(response, request, etag, last_modified)
+    return views._post_detail_cache_headers(response, request)
+
+
+latest_posts_feed = feeds.acached_feed(feeds.LatestPostsFeed())
+category_feed = feeds.acached_feed(feeds.CategoryPostsFeed())
+tag_feed = feeds.acached_feed(feeds.TagPostsFeed())
+
+# Sitemaps are files on disk: read them in a worker thread, not the
+# request's thread, which the database work needs
+_serve_sitemap = sync_to_async(views._serve_sitemap, thread_sensitive=False)
+
+
+async def sitemap_index(request):
+    path = await sync_to_async(sitemaps.ensure_built)()
+    if path is None:
+        return views._sitemap_building()
+    return await _serve_sitemap(request, path)
+
+
+async def sitemap_shard(request, shard):
+    if await sync_to_async(sitemaps.ensure_built)() is None:
+        return views._sitemap_building()
+    return await _serve_sitemap(request, sitemaps.shard_path(shard))
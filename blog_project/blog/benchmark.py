@@ -0,0 +1,168 @@
+# blog/benchmark.py
+"""
+Load and latency benchmarks for the public endpoints.
+
+``manage.py benchmark`` seeds (blog/seed.py) or reuses a dataset of a
+given scale in its own database, then drives each endpoint with
+concurrent requests through Django's WSGI handler in process (full
+middleware stack, no network) and reports per endpoint
+
+* p50/p95/p99/mean/max latency,
+* throughput,
+* SQL queries per request (from the query metrics, blog/metrics.py),
+
+as JSON, so two runs can be compared with ``compare()`` to catch
+regressions.
+"""
+import json
+import platform
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+import django
+from django.db import connection
+from django.utils import timezone
+
+from . import metrics
+from .seed import WORDS
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+ENDPOINTS = ('home', 'post_list', 'search', 'post_detail', 'feed', 'sitemap')
+
+
+def endpoint_urls(name, rng, count):
+    """``count`` request paths for the endpoint ``name``; none when there is nothing to request."""
+    from .models import Post
+
+    if name == 'post_detail':
+        # Spread over many posts so most renders miss the caches
+        slugs = list(
+            Post.objects.filter(status='published').order_by('?')
+            .values_list('slug', flat=True)[:500]
+        )
+        if not slugs:
+            return []
+        return [f'/blog/post/{rng.choice(slugs)}/' for _ in range(count)]
+    if name == 'search':
+        return [f'/blog/posts/?q={rng.choice(WORDS)}' for _ in range(count)]
+    path = {
+        'home': '/', 'post_list': '/blog/posts/', 'feed': '/rss/', 'sitemap': '/sitemap.xml',
+    }[name]
+    return [path] * count
+
+
+def wsgi_get(app, url, cookie=None):
+    """GET ``url`` through the WSGI ``app``; returns the status code."""
+    environ = {}
+    setup_testing_defaults(environ)
+    path, _, query = url.partition('?')
+    environ.update(PATH_INFO=path, QUERY_STRING=query, HTTP_HOST='testserver',
+                   REMOTE_ADDR='127.0.0.1')
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    status = []
+    body = app(environ, lambda s, headers, exc_info=None: status.append(s))
+    b''.join(body)
+    body.close()  # sends request_finished, which closes the connection
+    return int(status[0].split()[0])
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_endpoint(app, urls, concurrency, cookie=None):
+    """Fire ``urls`` with ``concurrency`` workers; returns the endpoint's results."""
+    def timed(url):
+        start = time.perf_counter()
+        status = wsgi_get(app, url, cookie)
+        return status, time.perf_counter() - start
+
+    def worker(share):
+        return [timed(url) for url in share]
+
+    metrics.registry.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        shares = pool.map(worker, [urls[i::concurrency] for i in range(concurrency)])
+        samples = [sample for share in shares for sample in share]
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds * 1000 for _, seconds in samples)
+    queries = sum(h.total for h in metrics.registry.queries.values())
+    recorded = sum(sum(h.counts) for h in metrics.registry.queries.values())
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for status, _ in samples if status >= 400),
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'mean': round(statistics.fmean(latencies), 2),
+            'max': round(latencies[-1], 2),
+        },
+        'queries_per_request': round(queries / recorded, 2) if recorded else 0,
+    }
+
+
+def run_suite(app, endpoints=ENDPOINTS, requests=200, concurrency=8, cookie=None,
+              seed=0, log=print):
+    rng = random.Random(seed)
+    results = {}
+    for name in endpoints:
+        urls = endpoint_urls(name, rng, requests)
+        if not urls:
+            log(f'{name:12} skipped: nothing to request (no published posts?)')
+            continue
+        # Warm up templates, caches and connections
+        run_endpoint(app, urls[:concurrency], concurrency, cookie)
+        results[name] = result = run_endpoint(app, urls, concurrency, cookie)
+        latency = result['latency_ms']
+        log(f"{name:12} {result['throughput_rps']:8.1f} req/s  p50 {latency['p50']:7.2f}ms  "
+            f"p95 {latency['p95']:7.2f}ms  p99 {latency['p99']:7.2f}ms  "
+            f"{result['queries_per_request']:5.1f} queries/req  {result['errors']} errors")
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+        'timestamp': timezone.now().isoformat(),
+    }
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Regressions of ``results`` against ``baseline`` (both as written by the
+    benchmark command): p95 latency or queries per request grown by more
+    than ``threshold``, or throughput dropped by more than it.
+    """
+    regressions = []
+    for name, current in results['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None:
+            continue
+        checks = (
+            ('p95 latency', before['latency_ms']['p95'], current['latency_ms']['p95'], 1),
+            ('queries/request', before['queries_per_request'], current['queries_per_request'], 1),
+            ('throughput', before['throughput_rps'], current['throughput_rps'], -1),
+        )
+        for metric, old, new, direction in checks:
+            if old and direction * (new - old) / old > threshold:
+                regressions.append(f'{name}: {metric} {old} -> {new}')
+    return regressions
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
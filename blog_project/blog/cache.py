@@ -0,0 +1,259 @@
+# blog/cache.py
+"""
+Version-keyed caches.
+
+Versioned page cache for anonymous traffic
+------------------------------------------
+
+Every cached page key embeds the current *content version*, a counter
+that ``blog/signals.py`` and ``comments/signals.py`` bump whenever a
+Post, Category or Comment is saved or deleted. Bumping the version makes
+every previously cached page unreachable at once, so pages never go
+stale waiting for a TTL; ``PAGE_CACHE_TIMEOUT`` only bounds how long
+unreachable entries linger in the cache.
+
+Process-local category list
+---------------------------
+
+``get_cached_categories()`` keeps the category list (with published post
+counts) in process memory and only reloads it when the category version
+changes, which happens when a Category is saved/deleted or a Post's
+status or category may have changed. Checking the version is a cache
+lookup, never a database query: ``CACHES`` is process memory or Redis,
+never the database cache.
+
+Feed stamp
+----------
+
+``get_feed_stamp()`` is the time of the last change that can alter a
+feed (a post, category or tag saved or deleted, or a post's tags
+edited). It lives in the cache, is seeded once from the newest
+``updated_date`` of the published posts, and is what the feed ETag,
+``Last-Modified`` and cached feed bodies are keyed on, so an unchanged
+poll is answered without querying the posts table.
+
+Related posts and avatars
+-------------------------
+
+Related-post lists (blog/related.py) and avatar URLs
+(accounts/avatars.py) change in the background, not through the saves
+that bump the content version. Each has its own version, bumped whenever
+they change, which the post_detail ETag mixes in.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse
+
+from . import routers
+
+CONTENT_VERSION_KEY = 'blog:content_version'
+CATEGORY_VERSION_KEY = 'blog:category_version'
+FEED_STAMP_KEY = 'blog:feed_stamp'
+RELATED_VERSION_KEY = 'blog:related_version'
+AVATAR_VERSION_KEY = 'blog:avatar_version'
+# Set for DATABASE_PIN_SECONDS after a content change when replicas are used
+CONTENT_CHANGED_KEY = 'blog:content_changed'
+
+
+def _fresh_version():
+    # Time based so a version lost to cache eviction can't be reused and
+    # resurrect pages cached under the old number
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _fresh_version()
+        cache.set(key, version, None)
+        return version
+
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _fresh_version(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def get_content_version():
+    return get_version(CONTENT_VERSION_KEY)
+
+
+def bump_content_version(**kwargs):
+    """Invalidate every versioned page; usable directly as a signal receiver."""
+    if routers.replicas():
+        # A lagging replica may still render the old content; such pages
+        # must not be cached under the new version (see _may_store_page)
+        cache.set(CONTENT_CHANGED_KEY, True, routers.pin_seconds())
+    return bump_version(CONTENT_VERSION_KEY)
+
+
+def bump_category_version(**kwargs):
+    """Make every process reload its category list on next use."""
+    return bump_version(CATEGORY_VERSION_KEY)
+
+
+def bump_related_version():
+    return bump_version(RELATED_VERSION_KEY)
+
+
+def bump_avatar_version():
+    return bump_version(AVATAR_VERSION_KEY)
+
+
+# (version, categories) for this process; replaced as a whole so readers
+# in other threads never see a half-built list
+_categories = (None, [])
+
+
+def get_cached_categories():
+    """Categories ordered by name, annotated with ``post_count``."""
+    global _categories
+    from .models import Category
+
+    version = get_version(CATEGORY_VERSION_KEY)
+    cached_version, categories = _categories
+    if cached_version != version:
+        # From the primary: a lagging replica's list would be kept until
+        # the next change
+        categories = list(
+            Category.objects.using(DEFAULT_DB_ALIAS).annotate(
+                post_count=Count('posts', filter=Q(posts__status='published'))
+            ).order_by('name')
+        )
+        _categories = (version, categories)
+    return categories
+
+
+def get_feed_stamp():
+    """Unix time of the last change visible in the feeds."""
+    stamp = cache.get(FEED_STAMP_KEY)
+    if stamp is None:
+        from .models import Post
+
+        latest = Post.objects.filter(status='published').aggregate(
+            latest=Max('updated_date')
+        )['latest']
+        cache.add(FEED_STAMP_KEY, latest.timestamp() if latest else time.time(), None)
+        stamp = cache.get(FEED_STAMP_KEY)
+    return stamp
+
+
+def touch_feed_stamp(**kwargs):
+    """Mark the feeds as changed; usable directly as a signal receiver."""
+    cache.set(FEED_STAMP_KEY, time.time(), None)
+
+
+def has_pending_messages(request):
+    """True if a flash message is waiting to be shown to this visitor."""
+    if 'messages' in request.COOKIES:
+        return True
+    session = getattr(request, 'session', None)
+    return bool(session is not None and session.get('_messages'))
+
+
+async def ahas_pending_messages(request):
+    if 'messages' in request.COOKIES:
+        return True
+    session = getattr(request, 'session', None)
+    return bool(session is not None and await session.aget('_messages'))
+
+
+def _may_store_page(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not (routers.replicas() and cache.get(CONTENT_CHANGED_KEY))
+    )
+
+
+async def _amay_store_page(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not (routers.replicas() and await cache.aget(CONTENT_CHANGED_KEY))
+    )
+
+
+def page_cache_key(request, version):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:page:{version}:{request.method}:{path}'
+
+
+def cache_anonymous_page(view_func):
+    """
+    Serve ``view_func`` from the versioned cache for anonymous GET/HEAD
+    requests. Logged-in users and visitors with pending messages always
+    get a freshly rendered page. Works for sync and async views.
+    """
+    if iscoroutinefunction(view_func):
+        return _acache_anonymous_page(view_func)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+            or has_pending_messages(request)
+        ):
+            return view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request, get_content_version())
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = view_func(request, *args, **kwargs)
+        if _may_store_page(response):
+            timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+            cache.set(key, (response.content, response['Content-Type']), timeout)
+        return response
+
+    return wrapper
+
+
+def _acache_anonymous_page(view_func):
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or (await request.auser()).is_authenticated
+            or await ahas_pending_messages(request)
+        ):
+            return await view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request, await aget_version(CONTENT_VERSION_KEY))
+        cached = await cache.aget(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = await view_func(request, *args, **kwargs)
+        if await _amay_store_page(response):
+            timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+            await cache.aset(key, (response.content, response['Content-Type']), timeout)
+        return response
+
+    return wrapper
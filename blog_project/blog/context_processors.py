@@ -1,14 +1,17 @@
 # blog/context_processors.py
-from .models import Category
+from django.utils.functional import SimpleLazyObject
+
+from .cache import get_cached_categories
+from .trending import get_trending
 
 def categories(request):
+    # Process-local, version-checked list (blog/cache.py); lazy so pages
+    # that never show categories don't even check the version
     return {
-        'categories': Category.objects.all()
+        'categories': SimpleLazyObject(get_cached_categories)
     }
 
 def trending_posts_processor(request):
-    from .models import Post
-    trending = Post.objects.filter(
-        status='published'
-    ).order_by('-views', '-publish_date')[:5]
-    return {'trending_posts': trending}
\ No newline at end of file
+    # Precomputed, time-decayed ranking (blog/trending.py): one cache
+    # lookup, and only on pages that actually show it
+    return {'trending_posts': SimpleLazyObject(get_trending)}
@@ -1,22 +1,145 @@
+# blog/feeds.py
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse
-from .models import Post
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import routers
+from .cache import FEED_STAMP_KEY, get_feed_stamp
+from .models import Category, Post, Tag
 
 
 class LatestPostsFeed(Feed):
     title = "My Blog - Latest Posts"
     link = "/rss/"
     description = "Latest posts from My Blog"
-    
-    def items(self):
-        return Post.objects.filter(status='published').order_by('-publish_date')[:10]
-    
+
+    def get_posts(self, obj):
+        return Post.objects.filter(status='published')
+
+    def items(self, obj=None):
+        return (
+            self.get_posts(obj)
+            .only('title', 'slug', 'excerpt', 'publish_date')
+            .order_by('-publish_date')[:10]
+        )
+
     def item_title(self, item):
         return item.title
-    
+
     def item_description(self, item):
         return item.excerpt
-    
+
     def item_link(self, item):
         return reverse('post_detail', args=[item.slug])
-    
\ No newline at end of file
+
+    def item_pubdate(self, item):
+        return item.publish_date
+
+
+class CategoryPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Category, slug=slug)
+
+    def title(self, obj):
+        return f"My Blog - {obj.name}"
+
+    def link(self, obj):
+        return reverse('category_feed', args=[obj.slug])
+
+    def description(self, obj):
+        return f"Latest posts in {obj.name}"
+
+    def get_posts(self, obj):
+        return Post.objects.filter(status='published', category=obj)
+
+
+class TagPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Tag, slug=slug)
+
+    def title(self, obj):
+        return f"My Blog - Tagged {obj.name}"
+
+    def link(self, obj):
+        return reverse('tag_feed', args=[obj.slug])
+
+    def description(self, obj):
+        return f"Latest posts tagged {obj.name}"
+
+    def get_posts(self, obj):
+        return Post.objects.filter(status='published', tags=obj)
+
+
+def _feed_validators(request, stamp):
+    """``(cache key, ETag, Last-Modified)`` of a feed at ``stamp``."""
+    path = hashlib.md5(request.path.encode()).hexdigest()
+    etag = quote_etag(f'{path[:12]}-{stamp:.6f}')
+    return f'blog:feed:{path}:{stamp:.6f}', etag, int(stamp)
+
+
+def _feed_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Readers may reuse the feed briefly, then must revalidate
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
+def cached_feed(feed):
+    """
+    Serve ``feed`` with ETag/Last-Modified validators and a cached body,
+    both derived from the feed stamp (blog/cache.py). Polls that hit the
+    validators, or the cached body, never query the posts table.
+    """
+    def view(request, *args, **kwargs):
+        key, etag, last_modified = _feed_validators(request, get_feed_stamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            cached = cache.get(key)
+            if cached is None:
+                # Cached until the next change: don't render it from a lagging replica
+                routers.pin_to_primary()
+                rendered = feed(request, *args, **kwargs)
+                cached = (rendered.content, rendered['Content-Type'])
+                cache.set(key, cached, getattr(settings, 'FEED_CACHE_TIMEOUT', 3600))
+            response = HttpResponse(cached[0], content_type=cached[1])
+        return _feed_headers(response, etag, last_modified)
+
+    return view
+
+
+def acached_feed(feed):
+    """Async ``cached_feed``; only a cache miss renders the feed in a thread."""
+    render_feed = sync_to_async(feed)
+
+    async def view(request, *args, **kwargs):
+        stamp = await cache.aget(FEED_STAMP_KEY)
+        if stamp is None:
+            # Seeding the stamp queries the posts table
+            stamp = await sync_to_async(get_feed_stamp)()
+        key, etag, last_modified = _feed_validators(request, stamp)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            cached = await cache.aget(key)
+            if cached is None:
+                routers.pin_to_primary()
+                rendered = await render_feed(request, *args, **kwargs)
+                cached = (rendered.content, rendered['Content-Type'])
+                await cache.aset(key, cached, getattr(settings, 'FEED_CACHE_TIMEOUT', 3600))
+            response = HttpResponse(cached[0], content_type=cached[1])
+        return _feed_headers(response, etag, last_modified)
+
+    return view
+
+
+latest_posts_feed = cached_feed(LatestPostsFeed())
+category_feed = cached_feed(CategoryPostsFeed())
+tag_feed = cached_feed(TagPostsFeed())
@@ -0,0 +1,133 @@
+# blog/images.py
+"""
+Post image variants.
+
+After a post's image changes, ``process_post_image`` runs in the
+background pool (blog/tasks.py) and
+
+* hashes the upload (SHA-256); if another post already has the same
+  image, the duplicate file is dropped and the existing file and variants
+  are reused,
+* records the original width/height so templates can reserve the space,
+* writes resized, recompressed variants (``VARIANTS``) as JPEG (PNG for
+  images with transparency) plus WebP, under a directory named after the
+  hash, so identical uploads share one set of files.
+
+``Post.image_variants`` maps each variant name to its ``width``,
+``height``, ``src`` and ``webp`` storage names; the ``post_image`` template
+tag (blog/templatetags/blog_images.py) turns that into ``srcset``.
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+# Variant name -> maximum width in pixels; smaller originals are not upscaled
+VARIANTS = (
+    ('thumb', 320),
+    ('card', 720),
+    ('full', 1600),
+)
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+VARIANT_DIR = 'blog_images/variants'
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _save(name, image, format, **options):
+    """Write ``image`` to storage as ``name`` unless an identical variant exists."""
+    if default_storage.exists(name):
+        return name
+    buffer = BytesIO()
+    image.save(buffer, format=format, **options)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def render_variants(data, digest):
+    """Return ``(width, height, variants)`` for the image bytes ``data``."""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    width, height = image.size
+
+    if _has_alpha(image):
+        image = image.convert('RGBA')
+        fallback_ext, fallback_format, fallback_options = 'png', 'PNG', {'optimize': True}
+    else:
+        image = image.convert('RGB')
+        fallback_ext, fallback_format = 'jpg', 'JPEG'
+        fallback_options = {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}
+
+    directory = f'{VARIANT_DIR}/{digest[:2]}/{digest}'
+    variants = {}
+    for name, max_width in VARIANTS:
+        variant_width = min(max_width, width)
+        variant_height = max(1, round(height * variant_width / width))
+        resized = image
+        if variant_width != width:
+            resized = image.resize((variant_width, variant_height), Image.LANCZOS)
+        variants[name] = {
+            'width': variant_width,
+            'height': variant_height,
+            'src': _save(f'{directory}/{name}.{fallback_ext}', resized, fallback_format,
+                         **fallback_options),
+            'webp': _save(f'{directory}/{name}.webp', resized, 'WEBP',
+                          quality=WEBP_QUALITY, method=4),
+        }
+    return width, height, variants
+
+
+def process_post_image(post_id):
+    """Fill in the image metadata and variants of one post (idempotent)."""
+    from .cache import bump_content_version
+    from .models import Post
+
+    post = Post.objects.filter(pk=post_id).only('image', 'image_hash', 'image_variants').first()
+    if post is None:
+        return
+    current = Post.objects.filter(pk=post_id, image=post.image.name)
+    if not post.image:
+        current.update(image_width=None, image_height=None, image_hash='', image_variants={})
+        return
+
+    with post.image.open('rb') as f:
+        data = f.read()
+    digest = content_hash(data)
+    if digest == post.image_hash and post.image_variants:
+        return
+
+    twin = (
+        Post.objects.filter(image_hash=digest).exclude(pk=post_id).exclude(image_variants={})
+        .values('image', 'image_width', 'image_height', 'image_variants').first()
+    )
+    if twin is not None:
+        # Same picture uploaded again: point at the stored copy, drop the new file
+        name = post.image.name
+        updated = current.update(
+            image=twin['image'], image_width=twin['image_width'],
+            image_height=twin['image_height'], image_hash=digest,
+            image_variants=twin['image_variants'], updated_date=timezone.now(),
+        )
+        if updated and name != twin['image'] and not Post.objects.filter(image=name).exists():
+            default_storage.delete(name)
+    else:
+        width, height, variants = render_variants(data, digest)
+        current.update(
+            image_width=width, image_height=height, image_hash=digest,
+            image_variants=variants, updated_date=timezone.now(),
+        )
+    # Cached listing pages were rendered without the variants
+    bump_content_version()
@@ -0,0 +1,155 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from blog import benchmark, seed
+from blog.models import Post
+from comments.models import Comment
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the public endpoints against a generated dataset and report '
+        'latency percentiles, throughput and queries per request'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=benchmark.SCALES, default='1k',
+            help='Dataset size in posts (default: 1k)',
+        )
+        parser.add_argument(
+            '--posts', type=int,
+            help='Exact number of posts, overriding --scale',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests per endpoint (default: 200)',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Concurrent clients (default: 8)',
+        )
+        parser.add_argument(
+            '--endpoint', action='append', choices=benchmark.ENDPOINTS, dest='endpoints',
+            help='Endpoint to benchmark; repeat for several (default: all)',
+        )
+        parser.add_argument(
+            '--authenticated', action='store_true',
+            help='Send a logged-in session, which bypasses the anonymous page cache',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the benchmark database, and reuse it if it already has data',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument(
+            '--compare', metavar='BASELINE',
+            help='Results file of an earlier run; fail if any endpoint regressed',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20,
+            help='Regression tolerance in percent for --compare (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        posts = options['posts'] or benchmark.SCALES[options['scale']]
+        baseline = benchmark.load_results(options['compare']) if options['compare'] else None
+
+        # A database of its own, like the test runner's, so the real one is never touched
+        name = f"bench_{options['posts'] or options['scale']}"
+        if connection.vendor == 'sqlite':
+            name = str(Path(settings.BASE_DIR) / f'{name}.sqlite3')
+        connection.settings_dict['TEST'] = {**connection.settings_dict.get('TEST', {}), 'NAME': name}
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, keepdb=options['keepdb'], serialize=False)
+
+        try:
+            with tempfile.TemporaryDirectory() as sitemap_root, override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                # The configured backend, under keys of its own, so the run
+                # neither reads nor pollutes the real site's cache
+                CACHES={
+                    alias: {**config, 'KEY_PREFIX': f"bench{config.get('KEY_PREFIX', '')}"}
+                    for alias, config in settings.CACHES.items()
+                },
+                DATABASE_REPLICAS=[],
+                QUERY_METRICS_ENABLED=True,
+                SITEMAP_ROOT=sitemap_root,
+            ):
+                dataset = self.prepare(posts, options)
+                results = self.run(dataset, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = benchmark.compare(results, baseline, options['threshold'] / 100)
+            if regressions:
+                raise CommandError('Regressions against {}:\n  {}'.format(
+                    options['compare'], '\n  '.join(regressions)
+                ))
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def prepare(self, posts, options):
+        if options['keepdb'] and Post.objects.exists():
+            self.stdout.write(f'Reusing the dataset in {connection.settings_dict["NAME"]}')
+        else:
+            self.stdout.write(f'Seeding {posts} posts...')
+            start = time.perf_counter()
+            seed.seed_blog(posts, seed=options['seed'], log=self.stdout.write)
+            # Related posts are an all-pairs computation; past this size it
+            # dominates the run, and post_detail copes with an empty table
+            seed.refresh_derived_data(related=posts <= 100_000, log=self.stdout.write)
+            self.stdout.write(f'Dataset ready in {time.perf_counter() - start:.1f}s')
+        return {
+            'posts': Post.objects.count(),
+            'comments': Comment.objects.count(),
+            'likes': Post.likes.through.objects.count(),
+            'tag_links': Post.tags.through.objects.count(),
+        }
+
+    def run(self, dataset, options):
+        cookie = None
+        if options['authenticated']:
+            client = Client()
+            client.force_login(User.objects.order_by('pk').first())
+            session = client.cookies[settings.SESSION_COOKIE_NAME]
+            cookie = f'{settings.SESSION_COOKIE_NAME}={session.value}'
+
+        self.stdout.write(
+            f"\n{options['requests']} requests per endpoint, concurrency {options['concurrency']}"
+            f"{', authenticated' if cookie else ''}:"
+        )
+        endpoints = benchmark.run_suite(
+            WSGIHandler(),
+            endpoints=options['endpoints'] or benchmark.ENDPOINTS,
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            cookie=cookie,
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        return {
+            'environment': benchmark.environment(),
+            'dataset': dataset,
+            'options': {
+                key: options[key]
+                for key in ('requests', 'concurrency', 'authenticated', 'seed')
+            },
+            'endpoints': endpoints,
+        }
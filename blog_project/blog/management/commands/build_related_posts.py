@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import related
+
+
+class Command(BaseCommand):
+    help = 'Refit the text vocabulary and recompute the related posts of every published post'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = related.rebuild_all()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored related posts for {total} published posts in {elapsed:.2f}s'
+        ))
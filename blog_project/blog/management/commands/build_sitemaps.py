@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Write the pre-rendered sitemap shards (only the changed ones unless --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Regenerate every shard instead of only those marked dirty',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['full'] or not sitemaps.is_built():
+            total = sitemaps.build_all()
+            summary = f'Wrote {total} sitemap shards'
+        else:
+            rebuilt = sitemaps.rebuild_dirty()
+            summary = f'Rewrote {len(rebuilt)} changed sitemap shards'
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary} in {elapsed:.2f}s ({sitemaps.sitemap_root()})'
+        ))
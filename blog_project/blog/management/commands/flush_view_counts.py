@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import request_flush, view_counts
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered post view counts to the database'
+
+    def handle(self, *args, **options):
+        written = view_counts.flush()
+        # Web workers keep their own buffers; they flush on their next
+        # recorded view once they see this request in the shared cache.
+        request_flush()
+        self.stdout.write(self.style.SUCCESS(
+            f'Flushed {written} buffered views; flush requested from all workers'
+        ))
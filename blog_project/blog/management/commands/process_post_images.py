@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.images import process_post_image
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Generate image variants for posts that have an image but no variants yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-check every post with an image, not only unprocessed ones',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(image_variants={})
+
+        start = time.perf_counter()
+        total = 0
+        for post_id in posts.order_by('pk').values_list('pk', flat=True).iterator():
+            process_post_image(post_id)
+            total += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Processed {total} post images in {elapsed:.2f}s'))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.counters import reconcile_post_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized like_count and comment_count columns on posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of posts updated per statement (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = reconcile_post_counters(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled counters for {updated} posts in {elapsed:.2f}s'
+        ))
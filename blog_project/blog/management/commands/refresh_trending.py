@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import trending
+
+
+class Command(BaseCommand):
+    help = 'Recompute the trending posts ranking (run from cron, e.g. every 5 minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', type=int, metavar='SECONDS',
+            help='Keep running and refresh every SECONDS instead of once',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            posts = trending.refresh_trending()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f'Ranked {len(posts)} trending posts in {elapsed:.2f}s'
+            ))
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
@@ -0,0 +1,69 @@
+"""
+Generate a synthetic data set with bulk inserts (see blog/seed.py).
+
+    manage.py seed_blog --posts 1000000 --seed 42
+
+The same --seed gives the same rows. Rows are added after the existing
+ones, so seeding an empty database is what makes runs comparable.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import seed
+
+
+class Command(BaseCommand):
+    help = 'Generate users, categories, tags, posts, likes and comment threads in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000, help='Posts (default: 1000)')
+        parser.add_argument(
+            '--users', type=int,
+            help='Users, each with a profile (default: one per 20 posts, at least 10)',
+        )
+        parser.add_argument(
+            '--categories', type=int, default=len(seed.CATEGORIES),
+            help=f'Categories (default: {len(seed.CATEGORIES)})',
+        )
+        parser.add_argument('--tags', type=int, default=200, help='Tags (default: 200)')
+        parser.add_argument(
+            '--max-comments', type=int, default=500,
+            help='Most comments on a single post (default: 500)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Posts written per transaction (default: 2000)',
+        )
+        parser.add_argument(
+            '--skip-related', action='store_true',
+            help='Do not rebuild the related posts table afterwards (slow for large data sets)',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('posts', 'categories', 'tags', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        if options['max_comments'] < 0:
+            raise CommandError('--max-comments must not be negative')
+
+        start = time.perf_counter()
+        counts = seed.seed_blog(
+            posts=options['posts'],
+            users=options['users'],
+            categories=options['categories'],
+            tags=options['tags'],
+            max_comments=options['max_comments'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        seed.refresh_derived_data(related=not options['skip_related'], log=self.stdout.write)
+
+        elapsed = time.perf_counter() - start
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded ' + ', '.join(f'{count} {kind.replace("_", " ")}' for kind, count in counts.items())
+            + f' ({rows} rows) in {elapsed:.1f}s, {rows / elapsed:.0f} rows/sec'
+        ))
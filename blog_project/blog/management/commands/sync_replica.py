@@ -0,0 +1,28 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into the replica files '
+        '(DATABASE_REPLICAS), standing in for replication in local setups'
+    )
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not replicas:
+            raise CommandError('No replicas configured; set BLOG_DB_REPLICA to a file name')
+        aliases = [DEFAULT_DB_ALIAS, *replicas]
+        if any(connections[alias].vendor != 'sqlite' for alias in aliases):
+            raise CommandError('sync_replica only copies SQLite databases')
+
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+        with sqlite3.connect(primary) as source:
+            for alias in replicas:
+                with sqlite3.connect(connections[alias].settings_dict['NAME']) as target:
+                    # Online backup: consistent even while the primary is in use
+                    source.backup(target)
+                self.stdout.write(self.style.SUCCESS(f'Copied {primary} to replica {alias!r}'))
@@ -0,0 +1,215 @@
+# blog/metrics.py
+"""
+Per-request SQL instrumentation.
+
+Every database connection gets an execute wrapper (installed when the
+connection is opened, see ``install``) that, while a request is being
+served, counts its queries, adds up their time and tallies them by
+fingerprint: the SQL text with ``IN (...)`` lists collapsed, which is
+already free of literal values because Django passes those as params.
+``QueryMetricsMiddleware`` opens the per-request record, and at the end
+
+* a fingerprint that ran ``QUERY_N_PLUS_ONE_THRESHOLD`` times or more is
+  reported as a likely N+1 (logged and counted per view),
+* the request's query count, database time and duration are added to
+  per-view histograms kept in process memory.
+
+``metrics_view`` (``/metrics``, staff only) renders them in the
+Prometheus text format. Each process keeps its own numbers, so scrape
+every worker (or sum them) when running several.
+
+The record lives in a context variable holding a mutable object, so it
+follows the request into ``sync_to_async`` threads. Outside requests
+(management commands, background tasks) the wrapper only checks that
+variable and calls through.
+"""
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def fingerprint(sql):
+    """``sql`` with ``IN (%s, %s, ...)`` lists collapsed to ``IN (...)``."""
+    if 'IN (' in sql:
+        return _IN_LIST_RE.sub('IN (...)', sql)
+    return sql
+
+
+def n_plus_one_threshold():
+    return getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 5)
+
+
+class RequestQueries:
+    """What one request did with the database."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold):
+        """Fingerprints run at least ``threshold`` times, most frequent first."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current = ContextVar('request_queries', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    queries = _current.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.seconds += time.perf_counter() - start
+        queries.count += 1
+        queries.statements[fingerprint(sql)] += 1
+
+
+def install(sender=None, connection=None, **kwargs):
+    """``connection_created`` receiver: wrap the new connection's queries."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+class Registry:
+    """Per-view aggregates for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+            self.db_seconds = defaultdict(lambda: Histogram(SECONDS_BUCKETS))
+            self.duration = defaultdict(lambda: Histogram(SECONDS_BUCKETS))
+            self.n_plus_one = Counter()
+
+    def observe(self, view, queries, duration, suspects):
+        with self._lock:
+            self.queries[view].observe(queries.count)
+            self.db_seconds[view].observe(queries.seconds)
+            self.duration[view].observe(duration)
+            if suspects:
+                self.n_plus_one[view] += 1
+
+    def render(self):
+        """The aggregates in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, help_text, histograms in (
+                ('blog_view_queries', 'SQL queries per request', self.queries),
+                ('blog_view_db_seconds', 'Time spent in SQL per request', self.db_seconds),
+                ('blog_view_duration_seconds', 'Request duration', self.duration),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for view, histogram in sorted(histograms.items()):
+                    label = _label(view)
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{view="{label}"}} {histogram.total:.6g}')
+                    lines.append(f'{name}_count{{view="{label}"}} {cumulative}')
+            lines += [
+                '# HELP blog_view_n_plus_one_total Requests that repeated a query N+1 style',
+                '# TYPE blog_view_n_plus_one_total counter',
+            ]
+            for view, count in sorted(self.n_plus_one.items()):
+                lines.append(f'blog_view_n_plus_one_total{{view="{_label(view)}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+registry = Registry()
+
+
+class QueryMetricsMiddleware:
+    """Record each request's queries and add them to ``registry``."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self):
+        if not getattr(settings, 'QUERY_METRICS_ENABLED', True):
+            return None, None, None
+        queries = RequestQueries()
+        return queries, _current.set(queries), time.perf_counter()
+
+    def _finish(self, request, queries, token, start):
+        _current.reset(token)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        if view == 'metrics':
+            return
+        suspects = queries.repeated(n_plus_one_threshold())
+        for sql, count in suspects:
+            logger.warning(
+                'Possible N+1 in %s: query ran %d times: %s',
+                view, count, sql[:500],
+            )
+        registry.observe(view, queries, time.perf_counter() - start, suspects)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries, token, start = self._start()
+        if queries is None:
+            return self.get_response(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(request, queries, token, start)
+
+    async def __acall__(self, request):
+        queries, token, start = self._start()
+        if queries is None:
+            return await self.get_response(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self._finish(request, queries, token, start)
+
+
+def metrics_view(request):
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
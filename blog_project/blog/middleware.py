@@ -1,27 +1,95 @@
-from django.core.cache import cache
-from django.http import HttpResponseForbidden
-import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import ratelimit, routers
+
 
 class RateLimitMiddleware:
+    """
+    Throttle views by URL name using the policies in
+    ``settings.RATELIMITS`` (see blog/ratelimit.py). Requests over a limit
+    get a 429 with ``Retry-After``.
+    """
+    # Usable in the async chain too, so ASGI requests reach the async
+    # views without being handed to a thread here
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+        self.policies = ratelimit.load_policies()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
-        # Rate limit comment submissions
-        if request.method == 'POST' and 'comment' in request.path:
-            ip = request.META.get('REMOTE_ADDR')
-            cache_key = f'comment_rate_limit_{ip}'
-            
-            # Allow 5 comments per minute
-            request_count = cache.get(cache_key, 0)
-            
-            if request_count >= 5:
-                return HttpResponseForbidden(
-                    "Too many comments. Please wait a minute before posting again."
-                )
-            
-            # Increment count
-            cache.set(cache_key, request_count + 1, 60)  # Expire in 60 seconds
-        
-        response = self.get_response(request)
-        return response
\ No newline at end of file
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(settings, 'RATELIMIT_ENABLED', True):
+            return None
+        policies = self.policies.get(request.resolver_match.url_name)
+        if not policies:
+            return None
+
+        retry_after = ratelimit.check(policies, request)
+        if retry_after:
+            response = HttpResponse(
+                'Too many requests. Please wait a moment before trying again.',
+                content_type='text/plain; charset=utf-8',
+                status=429,
+            )
+            response['Retry-After'] = str(retry_after)
+            return response
+        return None
+
+
+class PrimaryPinMiddleware:
+    """
+    Keep reads on the primary database when they may need to see a write
+    that hasn't reached the replicas yet (see blog/routers.py): for
+    non-GET/HEAD requests, for requests that wrote, and for the
+    ``DATABASE_PIN_SECONDS`` after a write via the ``pin_primary`` cookie.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        return routers.start_request(
+            pinned=request.method not in ('GET', 'HEAD')
+            or routers.PIN_COOKIE in request.COOKIES
+        )
+
+    def _finish(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                routers.PIN_COOKIE, '1', max_age=routers.pin_seconds(),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            return self._finish(state, self.get_response(request))
+        finally:
+            routers.end_request(token)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            return self._finish(state, await self.get_response(request))
+        finally:
+            routers.end_request(token)
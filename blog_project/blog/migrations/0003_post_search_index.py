@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5("
+        "title, body, category_id UNINDEXED, tokenize='porter unicode61')"
+    )
+    Post = apps.get_model('blog', 'Post')
+    rows = Post.objects.filter(status='published').values_list(
+        'id', 'title', 'content', 'category_id'
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO blog_post_fts (rowid, title, body, category_id) VALUES (%s, %s, %s, %s)',
+            [(pk, title, strip_tags(content or ''), category_id)
+             for pk, title, content, category_id in rows.iterator()],
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS blog_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_likes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
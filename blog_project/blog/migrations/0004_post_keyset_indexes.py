@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-publish_date', '-id'], name='post_status_pub_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', 'status', '-publish_date', '-id'], name='post_cat_pub_id_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('comments', 'Comment')
+    Through = Post._meta.get_field('likes').remote_field.through
+
+    likes = (
+        Through.objects.filter(post=OuterRef('pk'))
+        .order_by().values('post').annotate(total=Count('*')).values('total')
+    )
+    comments = (
+        Comment.objects.filter(post=OuterRef('pk'), active=True)
+        .order_by().values('post').annotate(total=Count('*')).values('total')
+    )
+    Post.objects.update(
+        like_count=Coalesce(Subquery(likes), 0),
+        comment_count=Coalesce(Subquery(comments), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_keyset_indexes'),
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
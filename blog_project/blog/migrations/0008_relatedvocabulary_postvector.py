@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedVocabulary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('terms', models.TextField()),
+                ('idf', models.BinaryField()),
+                ('documents', models.PositiveIntegerField()),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostVector',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text_vector', serialize=False, to='blog.post')),
+                ('indices', models.BinaryField()),
+                ('data', models.BinaryField()),
+                ('vocabulary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vectors', to='blog.relatedvocabulary')),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_relatedvocabulary_postvector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.PositiveIntegerField()),
+                ('weight', models.FloatField()),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='blog.post')),
+                ('vocabulary', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='blog.relatedvocabulary')),
+            ],
+        ),
+        migrations.DeleteModel(
+            name='PostVector',
+        ),
+        migrations.AddIndex(
+            model_name='postterm',
+            index=models.Index(fields=['vocabulary', 'term'], name='postterm_vocabulary_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postterm',
+            index=models.Index(fields=['post', 'vocabulary'], name='postterm_post_vocabulary_idx'),
+        ),
+    ]
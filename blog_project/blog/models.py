@@ -4,6 +4,9 @@ from django.utils import timezone
 from django.utils.text import slugify
 from django.urls import reverse
 
+from .counters import view_counts
+from .slugs import allocate_slug, generate_slug
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
@@ -59,6 +62,11 @@ class Post(models.Model):
     
     # Media
     image = models.ImageField(upload_to='blog_images/', blank=True, null=True)
+    # Filled in off the request path by blog/images.py
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_hash = models.CharField(max_length=64, blank=True, editable=False, db_index=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # SEO
     meta_title = models.CharField(max_length=200, blank=True)
@@ -71,55 +79,54 @@ class Post(models.Model):
         related_name='post_likes',
         blank=True)
     
+    # Denormalized counters, kept in sync by blog/signals.py and
+    # comments/signals.py; `manage.py reconcile_counters` recomputes them
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-publish_date']
         indexes = [
             models.Index(fields=['publish_date', 'status']),
             models.Index(fields=['slug']),
             models.Index(fields=['author']),
+            # Keyset pagination on (publish_date, id), see blog/pagination.py
+            models.Index(fields=['status', '-publish_date', '-id'], name='post_status_pub_id_idx'),
+            models.Index(fields=['category', 'status', '-publish_date', '-id'], name='post_cat_pub_id_idx'),
         ]
     
     def __str__(self):
         return self.title
     
     def save(self, *args, **kwargs):
-        # Auto-generate slug from title if empty
+        # Auto-generate slug from title (plus a random fragment) if empty
         if not self.slug:
-            import uuid  # ⭐⭐ THIS IS THE FIX!
-            
-            # Create base slug from title
-            base_slug = slugify(self.title)
-            
-            # If title is empty or slugify fails, use 'post'
-            if not base_slug:
-                base_slug = 'post'
-            
-            # Add UUID to ensure uniqueness
-            unique_id = uuid.uuid4().hex[:8]
-            self.slug = f"{base_slug}-{unique_id}"
+            self.slug = generate_slug(self.title)
         
-        # Ensure slug is unique for the publish date
-        original_slug = self.slug
-        counter = 1
-        while Post.objects.filter(
-            slug=self.slug,
-            publish_date__date=self.publish_date.date()
-        ).exclude(id=self.id).exists():
-            self.slug = f"{original_slug}-{counter}"
-            counter += 1
+        # Ensure slug is unique for the publish date, in a single query
+        # (see blog/slugs.py); saves that can't change it skip the check
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'slug', 'publish_date'} & set(update_fields):
+            self.slug = allocate_slug(self.slug, self.publish_date, exclude_pk=self.pk)
         
         # Auto-generate excerpt if empty
         if not self.excerpt and self.content:
-            self.excerpt = self.content[:297] + '...' if len(self.content) > 300 else self.content
+            self.excerpt = self.build_excerpt(self.content)
         
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def build_excerpt(content):
+        return content[:297] + '...' if len(content) > 300 else content
+    
     def get_absolute_url(self):
         return reverse('post_detail', kwargs={'slug': self.slug})
     
     def increment_views(self):
+        # Buffered write-behind counter (blog/counters.py); only the
+        # in-memory instance is bumped here so the page shows the new count
+        view_counts.increment(self.pk)
         self.views += 1
-        self.save(update_fields=['views'])
 # Add Like model separately
 class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_likes')
@@ -130,4 +137,51 @@ class Like(models.Model):
         unique_together = ['post', 'user']
     
     def __str__(self):
-        return f'{self.user.username} likes {self.post.title}'
\ No newline at end of file
+        return f'{self.user.username} likes {self.post.title}'
+
+# Precomputed "related posts", top-k per post (see blog/related.py)
+class RelatedPost(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_backlinks')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='relatedpost_post_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} -> {self.related_id} ({self.score:.3f})'
+
+
+# TF-IDF model of the last full related-posts build (see blog/related.py)
+class RelatedVocabulary(models.Model):
+    terms = models.TextField()   # one per line, in column order
+    idf = models.BinaryField()   # float64 per term
+    documents = models.PositiveIntegerField()   # published posts it was fitted on
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Vocabulary {self.pk} ({self.created_date:%Y-%m-%d %H:%M})'
+
+
+# A post's TF-IDF weights under a vocabulary, one row per term: the postings
+# related posts are looked up by (see blog/related.py)
+class PostTerm(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='terms', db_index=False)
+    vocabulary = models.ForeignKey(
+        RelatedVocabulary, on_delete=models.CASCADE, related_name='postings', db_index=False
+    )
+    term = models.PositiveIntegerField()   # column in the vocabulary
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vocabulary', 'term'], name='postterm_vocabulary_term_idx'),
+            models.Index(fields=['post', 'vocabulary'], name='postterm_post_vocabulary_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: term {self.term} ({self.weight:.3f})'
@@ -0,0 +1,179 @@
+# blog/pagination.py
+"""
+Keyset (cursor) pagination.
+
+Instead of ``OFFSET`` + ``COUNT(*)`` the next page is selected with a
+``WHERE (publish_date, id) < (last_publish_date, last_id)`` condition, so
+page 1000 costs the same indexed range scan as page 1. Cursors are
+opaque url-safe tokens encoding the boundary row and the direction of
+travel.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _json_default(value):
+    # Keep full microsecond precision for datetimes; DjangoJSONEncoder
+    # would truncate them and the boundary row could be repeated.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'v': list(values), 'd': direction}, default=_json_default,
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = data['v'], data['d']
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise InvalidCursor(token)
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values, direction
+
+
+class KeysetPage:
+    """One page of results plus the cursors needed to move around."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` by the given ordering without counting rows.
+
+    ``ordering`` is a tuple of field names with optional ``-`` prefixes,
+    e.g. ``('-publish_date', '-id')``. The fields must be non-null and
+    the last one must be unique so every row has a distinct position.
+    A ``values()`` queryset works too if it selects the ordering fields.
+    For deep pages to stay cheap there should be an index matching the
+    ordering (see ``Post.Meta.indexes``).
+    """
+
+    def __init__(self, queryset, ordering=('-publish_date', '-id'), per_page=10):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        model = queryset.model
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-'), model._meta.get_field(name.lstrip('-')))
+            for name in self.ordering
+        ]
+
+    def _cursor_for(self, obj, direction):
+        # Rows of a values() queryset are dicts
+        if isinstance(obj, dict):
+            return encode_cursor([obj[name] for name, _, _ in self.fields], direction)
+        return encode_cursor([getattr(obj, name) for name, _, _ in self.fields], direction)
+
+    def _parse_values(self, raw_values):
+        if len(raw_values) != len(self.fields):
+            raise InvalidCursor(raw_values)
+        try:
+            return [field.to_python(value) for (_, _, field), value in zip(self.fields, raw_values)]
+        except ValidationError:
+            raise InvalidCursor(raw_values)
+
+    def _boundary(self, values, forward):
+        """
+        Build ``(a, b, c) > (x, y, z)`` as nested OR/AND conditions, with
+        the comparison flipped per field for descending order and for
+        walking backwards.
+        """
+        condition = Q()
+        equal_so_far = Q()
+        for (name, descending, _), value in zip(self.fields, values):
+            lookup = f'{name}__lt' if descending == forward else f'{name}__gt'
+            condition |= equal_so_far & Q(**{lookup: value})
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def _page_query(self, cursor):
+        """``(queryset, boundary values, forward)`` for the page after ``cursor``."""
+        values, direction = None, 'next'
+        if cursor:
+            try:
+                raw_values, direction = decode_cursor(cursor)
+                values = self._parse_values(raw_values)
+            except InvalidCursor:
+                values, direction = None, 'next'
+
+        forward = direction == 'next'
+        if forward:
+            order_by = self.ordering
+        else:
+            order_by = tuple(name[1:] if name.startswith('-') else f'-{name}'
+                             for name in self.ordering)
+
+        qs = self.queryset
+        if values is not None:
+            qs = qs.filter(self._boundary(values, forward))
+        return qs.order_by(*order_by)[:self.per_page + 1], values, forward
+
+    def _build_page(self, rows, values, forward):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage([], None, None)
+
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = True, has_more
+
+        next_cursor = self._cursor_for(rows[-1], 'next') if has_next else None
+        previous_cursor = self._cursor_for(rows[0], 'prev') if has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        """
+        Return the page that follows (or precedes) ``cursor``.
+
+        A missing or malformed cursor returns the first page, mirroring
+        ``Paginator.get_page``'s forgiving behaviour.
+        """
+        qs, values, forward = self._page_query(cursor)
+        return self._build_page(list(qs), values, forward)
+
+    async def aget_page(self, cursor=None):
+        """Async version of ``get_page`` using the async ORM."""
+        qs, values, forward = self._page_query(cursor)
+        return self._build_page([obj async for obj in qs], values, forward)
@@ -0,0 +1,157 @@
+# blog/ratelimit.py
+"""
+Sliding-window rate limiting.
+
+Each policy counts hits in fixed windows with atomic cache operations
+(``cache.add`` to create a window, ``cache.incr`` to count), and the
+sliding-window estimate weights the previous window by how much of it
+still overlaps the last ``window`` seconds::
+
+    estimate = previous * (1 - elapsed / window) + current
+
+so a burst at a window boundary can't get twice the allowance, and a hit
+never extends the window the way re-``set``-ing a counter does.
+
+Policies are configured per URL name in ``settings.RATELIMITS``::
+
+    RATELIMITS = {
+        'add_comment': [('user', '5/m'), ('ip', '20/m')],
+        'login': [('ip', '10/m', ['POST'])],
+    }
+
+``key`` is ``'ip'`` or ``'user'`` (anonymous visitors fall back to their
+IP), ``rate`` is ``<count>/<period>`` with the period in ``s``, ``m``,
+``h`` or ``d`` (optionally prefixed with a number, e.g. ``'10/5m'``), and
+the optional third item lists the methods that count (default
+``RATELIMIT_METHODS``, POST only).
+
+Counters are kept in the default cache, so limits only hold across worker
+processes when that cache is shared by them (``CACHES`` in settings, not
+a per-process ``LocMemCache``). ``incr`` must also be atomic, or
+concurrent hits lose increments and the limit can be exceeded; the
+``blog.E001`` system check refuses backends where it is not (the
+database and file caches).
+"""
+import math
+import re
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Backends whose incr is a read followed by a write
+NON_ATOMIC_BACKENDS = (
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+)
+
+_RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+
+
+def parse_rate(rate):
+    """``'5/m'`` -> ``(5, 60)``; ``'10/5m'`` -> ``(10, 300)``."""
+    match = _RATE_RE.match(rate.replace(' ', ''))
+    if not match:
+        raise ValueError(f'Invalid rate {rate!r}; expected e.g. "5/m" or "100/h"')
+    count, multiplier, period = match.groups()
+    return int(count), int(multiplier or 1) * PERIODS[period]
+
+
+class Policy:
+    def __init__(self, scope, key, rate, methods=None):
+        if key not in ('ip', 'user'):
+            raise ValueError(f"Rate limit key must be 'ip' or 'user', not {key!r}")
+        self.scope = scope
+        self.key = key
+        self.rate = rate
+        self.limit, self.window = parse_rate(rate)
+        if methods is None:
+            methods = getattr(settings, 'RATELIMIT_METHODS', ('POST',))
+        self.methods = frozenset(method.upper() for method in methods)
+        # Counts of the previous window, which no longer changes once it
+        # has ended: (window index, {identity key: count})
+        self._previous = (None, {})
+
+    def identity(self, request):
+        user = getattr(request, 'user', None)
+        if self.key == 'user' and user is not None and user.is_authenticated:
+            return f'u{user.pk}'
+        return f"ip{request.META.get('REMOTE_ADDR', '')}"
+
+    def _previous_count(self, index, prefix):
+        cached_index, counts = self._previous
+        if cached_index != index:
+            counts = {}
+            self._previous = (index, counts)
+        count = counts.get(prefix)
+        if count is None:
+            count = counts[prefix] = cache.get(f'{prefix}{index - 1}', 0)
+        return count
+
+    def hit(self, request, now=None):
+        """
+        Count one request; return 0 if it is allowed, otherwise the number
+        of seconds until it would be.
+        """
+        if now is None:
+            now = time.time()
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        prefix = f'rl:{self.scope}:{self.key}:{self.identity(request)}:'
+        current_key = f'{prefix}{index}'
+
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # First hit in this window; kept for two windows so it can act
+            # as the "previous" window afterwards
+            if cache.add(current_key, 1, self.window * 2):
+                current = 1
+            else:
+                current = cache.incr(current_key)
+        previous = self._previous_count(index, prefix)
+
+        weight = 1 - offset / self.window
+        if previous * weight + current <= self.limit:
+            return 0
+        if current > self.limit or not previous:
+            # Only the next window helps
+            return max(1, math.ceil(self.window - offset))
+        # Wait until enough of the previous window has slid out
+        excess = previous * weight + current - self.limit
+        return max(1, math.ceil(excess / previous * self.window))
+
+
+def load_policies(config=None):
+    """``settings.RATELIMITS`` as ``{url_name: [Policy, ...]}``."""
+    if config is None:
+        config = getattr(settings, 'RATELIMITS', {})
+    return {
+        url_name: [Policy(url_name, *rule) for rule in rules]
+        for url_name, rules in config.items()
+    }
+
+
+def check(policies, request):
+    """Apply ``policies`` to ``request``; return the longest wait, 0 if allowed."""
+    retry_after = 0
+    for policy in policies:
+        if request.method in policy.methods:
+            retry_after = max(retry_after, policy.hit(request))
+    return retry_after
+
+
+def check_cache_backend(app_configs=None, **kwargs):
+    """System check: rate limiting needs a cache with an atomic ``incr``."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if not getattr(settings, 'RATELIMIT_ENABLED', True) or backend not in NON_ATOMIC_BACKENDS:
+        return []
+    return [checks.Error(
+        f'Rate limiting needs a cache with an atomic incr; {backend} loses '
+        f'concurrent hits, so limits can be exceeded.',
+        hint='Use Redis (set BLOG_REDIS_URL) or memcached, or set RATELIMIT_ENABLED = False.',
+        id='blog.E001',
+    )]
@@ -0,0 +1,465 @@
+# blog/related.py
+"""
+Related posts.
+
+Every published post is turned into one sparse vector made of three
+L2-normalized blocks:
+
+* TF-IDF of the title (counted twice) and the excerpt,
+* tag membership,
+* category (one-hot),
+
+each scaled by the square root of its weight, so the dot product of two
+vectors is the weighted sum of the three cosine similarities. The top
+``RELATED_POSTS_COUNT`` neighbours of each post are stored in
+``RelatedPost`` and ``post_detail`` reads them with one join.
+
+``manage.py build_related_posts`` computes the whole table. It fits the
+TF-IDF vocabulary and IDF weights on all published posts and stores them
+(``RelatedVocabulary``) along with each post's TF-IDF weights, one
+``PostTerm`` row per term: postings the database can look posts up by.
+
+When posts are saved (or their tags change) ``schedule_refresh()`` hands
+them to the background pool (blog/tasks.py) after the commit; posts
+queued before the task starts share one refresh. ``refresh_posts()``
+never looks at the whole corpus. A changed post is transformed with the
+stored vocabulary and scored only against its candidates: the posts the
+database ranks highest by shared terms (a dot product over the
+postings) and by shared tags, and the oldest posts of its category, at
+most ``CANDIDATES`` of each. Its score for them then updates their lists
+where it enters or leaves them. The candidate cap makes the refresh an
+approximation at the margin (a post beyond it whose list has room is
+missed); ``build_related_posts`` is exact, and also picks up words first
+seen since the last build, so run it periodically. A refresh refits by
+itself only before the first build and when the number of published
+posts has doubled since the last one, so small new blogs don't wait.
+
+NumPy, SciPy and scikit-learn are imported lazily, so the rest of the app
+does not pay for them at import time.
+"""
+import logging
+import math
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from . import tasks
+from .cache import bump_related_version
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each similarity signal
+TEXT_WEIGHT = 0.5
+TAG_WEIGHT = 0.35
+CATEGORY_WEIGHT = 0.15
+
+# Below this a "related" post is just noise
+MIN_SCORE = 0.05
+
+# Rows multiplied against the whole matrix at once
+CHUNK_SIZE = 1000
+
+# Candidate posts per signal (terms, tags, category) a refresh scores a
+# changed post against, and the post's highest weighted terms the text
+# candidates are looked up by
+CANDIDATES = 200
+CANDIDATE_TERMS = 10
+
+# A refresh refits when the published posts reach this multiple of the
+# number the stored vocabulary was fitted on
+REFIT_GROWTH = 2
+
+
+def related_count():
+    return getattr(settings, 'RELATED_POSTS_COUNT', 4)
+
+
+def load_corpus():
+    """``(rows, tag_pairs)`` for every published post."""
+    from .models import Post
+
+    rows = list(
+        Post.objects.filter(status='published').order_by('id')
+        .values_list('id', 'title', 'excerpt', 'category_id')
+    )
+    tag_pairs = list(
+        Post.tags.through.objects.filter(post__status='published')
+        .values_list('post_id', 'tag_id')
+    )
+    return rows, tag_pairs
+
+
+def _one_hot(row_indices, keys, n_rows):
+    import numpy as np
+    from scipy import sparse
+
+    columns = {key: col for col, key in enumerate(sorted(set(keys)))}
+    return sparse.csr_matrix(
+        (np.ones(len(keys)), (row_indices, [columns[key] for key in keys])),
+        shape=(n_rows, max(len(columns), 1)),
+    )
+
+
+def _documents(rows):
+    return [f'{row[1]} {row[1]} {row[2] or ""}' for row in rows]
+
+
+def fit_text(documents):
+    """Fit TF-IDF on ``documents``; returns ``(terms, idf, rows)``."""
+    import numpy as np
+    from scipy import sparse
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(stop_words='english', sublinear_tf=True)
+    try:
+        text = vectorizer.fit_transform(documents)
+    except ValueError:
+        # Empty vocabulary (no posts, or nothing but stop words)
+        return [], np.zeros(0), sparse.csr_matrix((len(documents), 0))
+    return vectorizer.get_feature_names_out().tolist(), vectorizer.idf_, text.tocsr()
+
+
+def transform_text(columns, idf, documents):
+    """
+    TF-IDF rows for ``documents`` under a fitted vocabulary (``{term:
+    column}``) and its IDF weights, the rows ``fit_text`` gives for them.
+    """
+    import numpy as np
+    from scipy import sparse
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.preprocessing import normalize
+
+    if not columns:
+        return sparse.csr_matrix((len(documents), 0))
+    counts = CountVectorizer(vocabulary=columns).transform(documents).astype(np.float64)
+    counts.data = np.log(counts.data) + 1   # sublinear_tf
+    return normalize(counts @ sparse.diags(idf)).tocsr()
+
+
+def combine(ids, category_ids, text, tag_pairs):
+    """Return ``(ids, X)``: post ids and their combined feature rows."""
+    import numpy as np
+    from scipy import sparse
+    from sklearn.preprocessing import normalize
+
+    ids = np.array(ids, dtype=np.int64)
+    position = {post_id: i for i, post_id in enumerate(ids.tolist())}
+    n = len(ids)
+    if text.shape[1] == 0:
+        text = sparse.csr_matrix((n, 1))
+
+    pairs = [(position[post_id], tag_id) for post_id, tag_id in tag_pairs if post_id in position]
+    tags = normalize(_one_hot([i for i, _ in pairs], [tag for _, tag in pairs], n))
+
+    with_category = [(i, c) for i, c in enumerate(category_ids) if c is not None]
+    categories = _one_hot([i for i, _ in with_category], [c for _, c in with_category], n)
+
+    matrix = sparse.hstack([
+        text * math.sqrt(TEXT_WEIGHT),
+        tags * math.sqrt(TAG_WEIGHT),
+        categories * math.sqrt(CATEGORY_WEIGHT),
+    ]).tocsr()
+    return ids, matrix
+
+
+def current_vocabulary():
+    """The stored vocabulary as ``(pk, documents, {term: column}, idf)``, or None."""
+    import numpy as np
+    from .models import RelatedVocabulary
+
+    latest = (
+        RelatedVocabulary.objects.order_by('-pk')
+        .values_list('pk', 'documents', 'terms', 'idf').first()
+    )
+    if latest is None:
+        return None
+    pk, documents, terms, idf = latest
+    terms = terms.split('\n') if terms else []
+    return (
+        pk, documents, {term: i for i, term in enumerate(terms)},
+        np.frombuffer(idf, dtype=np.float64),
+    )
+
+
+def _store_terms(vocabulary_id, post_ids, text):
+    from .models import PostTerm
+
+    for start in range(0, len(post_ids), 500):
+        PostTerm.objects.bulk_create([
+            PostTerm(post_id=post_id, vocabulary_id=vocabulary_id, term=int(term), weight=float(weight))
+            for i, post_id in enumerate(post_ids[start:start + 500], start)
+            for term, weight in zip(
+                text.indices[text.indptr[i]:text.indptr[i + 1]],
+                text.data[text.indptr[i]:text.indptr[i + 1]],
+            )
+        ], batch_size=5000)
+
+
+def _features(vocabulary_id, post_ids):
+    """``{post_id: (category_id, tag_ids, {term: weight})}`` of the published ``post_ids``."""
+    from .models import Post, PostTerm
+
+    features = {
+        post_id: (category_id, set(), {})
+        for post_id, category_id in Post.objects.filter(pk__in=post_ids, status='published')
+        .values_list('id', 'category_id')
+    }
+    tag_pairs = Post.tags.through.objects.filter(post_id__in=features).values_list('post_id', 'tag_id')
+    for post_id, tag_id in tag_pairs:
+        features[post_id][1].add(tag_id)
+    postings = (
+        PostTerm.objects.filter(vocabulary_id=vocabulary_id, post_id__in=features)
+        .values_list('post_id', 'term', 'weight')
+    )
+    for post_id, term, weight in postings:
+        features[post_id][2][term] = weight
+    return features
+
+
+def similarity(a, b):
+    """The score of two posts from their ``_features``, as ``X @ X.T`` has it."""
+    category_a, tags_a, terms_a = a
+    category_b, tags_b, terms_b = b
+    if len(terms_b) < len(terms_a):
+        terms_a, terms_b = terms_b, terms_a
+    text = sum(weight * terms_b.get(term, 0.0) for term, weight in terms_a.items())
+    tags = len(tags_a & tags_b) / math.sqrt(len(tags_a) * len(tags_b)) if tags_a and tags_b else 0.0
+    category = 1.0 if category_a is not None and category_a == category_b else 0.0
+    return TEXT_WEIGHT * text + TAG_WEIGHT * tags + CATEGORY_WEIGHT * category
+
+
+def _candidate_ids(vocabulary_id, post_id, features):
+    """
+    Up to ``CANDIDATES`` published posts per signal, ranked in the
+    database: by text dot product over the postings of the post's
+    ``CANDIDATE_TERMS`` top terms, by number of shared tags, and the
+    oldest of the same category (which all tie on it).
+    """
+    from django.db.models import Case, Count, F, FloatField, Sum, When
+    from .models import Post, PostTerm
+
+    category_id, tag_ids, terms = features
+    terms = dict(sorted(terms.items(), key=lambda item: -item[1])[:CANDIDATE_TERMS])
+    ids = set()
+    if terms:
+        ids.update(
+            PostTerm.objects.filter(
+                vocabulary_id=vocabulary_id, term__in=list(terms), post__status='published',
+            ).exclude(post_id=post_id).values('post_id')
+            .annotate(dot=Sum(Case(
+                *[When(term=term, then=F('weight') * weight) for term, weight in terms.items()],
+                output_field=FloatField(),
+            )))
+            .order_by('-dot', 'post_id').values_list('post_id', flat=True)[:CANDIDATES]
+        )
+    if tag_ids:
+        ids.update(
+            Post.tags.through.objects.filter(tag_id__in=tag_ids, post__status='published')
+            .exclude(post_id=post_id).values('post_id').annotate(shared=Count('tag_id'))
+            .order_by('-shared', 'post_id').values_list('post_id', flat=True)[:CANDIDATES]
+        )
+    if category_id is not None:
+        ids.update(
+            Post.objects.filter(status='published', category_id=category_id).exclude(pk=post_id)
+            .order_by('id').values_list('id', flat=True)[:CANDIDATES]
+        )
+    return ids
+
+
+def _scores(vocabulary_id, post_id, features):
+    """``{other_id: score}`` of the post's candidates that reach ``MIN_SCORE``."""
+    scores = {}
+    candidates = _features(vocabulary_id, _candidate_ids(vocabulary_id, post_id, features))
+    for other, other_features in candidates.items():
+        score = similarity(features, other_features)
+        if score >= MIN_SCORE:
+            scores[other] = score
+    return scores
+
+
+def _top(scored, k):
+    # Highest score first, older post first on ties
+    return sorted(scored, key=lambda item: (-item[1], item[0]))[:k]
+
+
+def top_neighbours(ids, matrix, row_indices, k):
+    """Yield ``(post_id, [(related_id, score), ...])`` for the given rows."""
+    import numpy as np
+
+    for start in range(0, len(row_indices), CHUNK_SIZE):
+        chunk = row_indices[start:start + CHUNK_SIZE]
+        similarities = (matrix[chunk] @ matrix.T).tocsr()
+        for offset, row in enumerate(chunk):
+            begin, end = similarities.indptr[offset], similarities.indptr[offset + 1]
+            columns = similarities.indices[begin:end]
+            scores = similarities.data[begin:end]
+            keep = (columns != row) & (scores >= MIN_SCORE)
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > k:
+                best = np.argpartition(-scores, k)[:k]
+                columns, scores = columns[best], scores[best]
+            # Highest score first, older post first on ties
+            order = np.lexsort((ids[columns], -scores))
+            yield int(ids[row]), [
+                (int(ids[columns[i]]), float(scores[i])) for i in order
+            ]
+
+
+def _replace(neighbours):
+    """Store the given neighbour lists, replacing the posts' old entries."""
+    from .models import RelatedPost
+
+    neighbours = dict(neighbours)
+    # Pages showing the lists revalidate once the new ones are visible
+    transaction.on_commit(bump_related_version)
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=list(neighbours)).delete()
+        RelatedPost.objects.bulk_create(
+            [
+                RelatedPost(post_id=post_id, related_id=related_id, score=score, rank=rank)
+                for post_id, related in neighbours.items()
+                for rank, (related_id, score) in enumerate(related)
+            ],
+            batch_size=1000,
+        )
+
+
+def rebuild_all():
+    """
+    Refit the vocabulary and recompute the neighbours of every published
+    post; returns the post count.
+    """
+    import numpy as np
+    from .models import RelatedPost, RelatedVocabulary
+
+    rows, tag_pairs = load_corpus()
+    if not rows:
+        with transaction.atomic():
+            RelatedVocabulary.objects.all().delete()
+            RelatedPost.objects.all().delete()
+        return 0
+    terms, idf, text = fit_text(_documents(rows))
+    ids, matrix = combine([row[0] for row in rows], [row[3] for row in rows], text, tag_pairs)
+    neighbours = list(top_neighbours(ids, matrix, list(range(len(ids))), related_count()))
+    with transaction.atomic():
+        vocabulary = RelatedVocabulary.objects.create(
+            terms='\n'.join(terms), idf=np.asarray(idf, dtype=np.float64).tobytes(),
+            documents=len(rows),
+        )
+        # Older vocabularies go, and their postings with them
+        RelatedVocabulary.objects.exclude(pk=vocabulary.pk).delete()
+        _store_terms(vocabulary.pk, ids.tolist(), text)
+        RelatedPost.objects.all().delete()
+        _replace(neighbours)
+    return len(ids)
+
+
+def refresh_posts(post_ids):
+    """
+    Recompute the neighbours of ``post_ids`` from their candidates, and
+    update the lists they enter or leave. A full list that held a changed
+    post which now scores lower (or no longer counts) is recomputed from
+    its own candidates, since a post outside it may now belong in it.
+    Returns the number of lists rewritten.
+    """
+    from .models import Post, PostTerm, RelatedPost
+
+    post_ids = set(post_ids)
+    k = related_count()
+    vocabulary = current_vocabulary()
+    published = Post.objects.filter(status='published').count()
+    if vocabulary is None or published >= REFIT_GROWTH * vocabulary[1]:
+        return rebuild_all()
+    vocabulary_id, _, columns, idf = vocabulary
+
+    # Their text may have changed: transform them again
+    rows = list(
+        Post.objects.filter(pk__in=post_ids, status='published').order_by('id')
+        .values_list('id', 'title', 'excerpt')
+    )
+    with transaction.atomic():
+        PostTerm.objects.filter(post_id__in=post_ids).delete()
+        if rows:
+            _store_terms(
+                vocabulary_id, [row[0] for row in rows], transform_text(columns, idf, _documents(rows))
+            )
+
+    scores = {
+        post_id: _scores(vocabulary_id, post_id, features)
+        for post_id, features in _features(vocabulary_id, post_ids).items()
+    }
+    # Posts that are no longer published keep no neighbours
+    lists = {post_id: _top(scores.get(post_id, {}).items(), k) for post_id in post_ids}
+
+    others = {other for scored in scores.values() for other in scored} | set(
+        RelatedPost.objects.filter(related_id__in=post_ids).values_list('post_id', flat=True)
+    )
+    others -= post_ids
+    current = {}
+    for post_id, related_id, score in (
+        RelatedPost.objects.filter(post_id__in=others).values_list('post_id', 'related_id', 'score')
+    ):
+        current.setdefault(post_id, []).append((related_id, score))
+
+    recompute = set()
+    for other in others:
+        old = _top(current.get(other, []), k)
+        new = {post_id: scored[other] for post_id, scored in scores.items() if other in scored}
+        if len(old) >= k and any(
+            related_id in post_ids and new.get(related_id, -1.0) < score for related_id, score in old
+        ):
+            recompute.add(other)
+            continue
+        top = _top([item for item in old if item[0] not in post_ids] + list(new.items()), k)
+        if top != old:
+            lists[other] = top
+
+    recompute_features = _features(vocabulary_id, recompute)
+    for other in recompute:
+        features = recompute_features.get(other)
+        lists[other] = _top(_scores(vocabulary_id, other, features).items(), k) if features else []
+
+    _replace(lists.items())
+    return len(lists)
+
+
+# Posts waiting for a refresh in this process, and whether a task that
+# will pick them up is queued; saves until it starts share its refresh
+_pending = set()
+_queued = False
+_pending_lock = threading.Lock()
+# One refresh at a time per process
+_refresh_lock = threading.Lock()
+
+
+def _flush_pending():
+    global _queued
+    with _refresh_lock:
+        with _pending_lock:
+            post_ids = set(_pending)
+            _pending.clear()
+            _queued = False
+        if not post_ids:
+            return
+        try:
+            refresh_posts(post_ids)
+        except Exception:
+            # The posts themselves are saved; stale lists are fixed by the next
+            # refresh or `manage.py build_related_posts`
+            logger.exception('Could not refresh related posts for %s', sorted(post_ids))
+
+
+def _queue(post_id):
+    global _queued
+    with _pending_lock:
+        _pending.add(post_id)
+        if _queued:
+            return
+        _queued = True
+    tasks.submit(_flush_pending)
+
+
+def schedule_refresh(post_id):
+    """Refresh ``post_id``'s neighbours in the background once the current transaction commits."""
+    transaction.on_commit(lambda: _queue(post_id))
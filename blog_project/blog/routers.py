@@ -0,0 +1,102 @@
+# blog/routers.py
+"""
+Primary/replica database routing.
+
+Reads of the blog, comments and accounts models go to one of the
+``DATABASE_REPLICAS`` aliases, everything else (writes, auth, sessions,
+admin) to ``default``. Replicas lag behind the primary, so reads stay on
+the primary whenever they might need to see a recent write:
+
+* outside a request (management commands, background tasks), because
+  they often read rows that were just committed;
+* inside a transaction on the primary;
+* for the rest of a request once it wrote to a routed model, and for
+  every non-GET/HEAD request, which is expected to write;
+* for ``DATABASE_PIN_SECONDS`` after a request that wrote: the response
+  sets a short-lived cookie (``PrimaryPinMiddleware``), so a redirect
+  after ``post_create``, ``add_comment`` or ``like_post`` shows the
+  change even before it reached the replica.
+
+With no replicas configured the router sends everything to ``default``.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ROUTED_APPS = frozenset({'blog', 'comments', 'accounts'})
+
+PIN_COOKIE = 'pin_primary'
+
+
+class RequestState:
+    """Per-request routing state, shared by every thread serving the request."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# None outside a request: read from the primary
+_state = ContextVar('db_routing_state', default=None)
+
+
+def start_request(pinned):
+    state = RequestState(pinned)
+    return state, _state.set(state)
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+def pin_to_primary():
+    """Send the rest of this request's reads to the primary."""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def pin_seconds():
+    return getattr(settings, 'DATABASE_PIN_SECONDS', 5)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        aliases = replicas()
+        state = _state.get()
+        if (
+            not aliases
+            or state is None
+            or state.pinned
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in ROUTED_APPS:
+            state = _state.get()
+            if state is not None:
+                state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema from the primary
+        if db in replicas():
+            return False
+        return None
@@ -0,0 +1,246 @@
+# blog/search.py
+"""
+Full-text search for published posts.
+
+On SQLite every published post is mirrored into the FTS5 table
+``blog_post_fts`` (rowid == post id). The signal handlers in
+``blog/signals.py`` keep it in sync and ``manage.py rebuild_search_index``
+rebuilds it from scratch. Other database backends fall back to the old
+``icontains`` filter.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape, strip_tags
+
+FTS_TABLE = 'blog_post_fts'
+
+# Column weights for bm25(): a hit in the title counts ten times more
+# than a hit in the body.
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+SNIPPET_TOKENS = 24
+
+# Control characters never appear in post text, so they are safe markers
+# for snippet() highlights; they are swapped for <mark> after escaping.
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_enabled():
+    """Return True if the FTS5 index can be used on the default database."""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_expression(query):
+    """
+    Turn free text typed by a user into a safe FTS5 MATCH expression.
+
+    Every word must match (implicit AND) and the last word is treated as
+    a prefix so that results show up while the user is still typing.
+    """
+    words = _WORD_RE.findall(query or '')
+    if not words:
+        return ''
+    terms = ['"%s"' % word for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _document(post):
+    return post.title, strip_tags(post.content or '')
+
+
+def index_post(post):
+    """Add, refresh or drop a single post from the index."""
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        if post.status == 'published':
+            title, body = _document(post)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, body, category_id) '
+                f'VALUES (%s, %s, %s, %s)',
+                [post.pk, title, body, post.category_id],
+            )
+
+
+def unindex_post(post_id):
+    """Remove a post from the index."""
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def index_posts(queryset, batch_size=500):
+    """
+    Index every published post in ``queryset``.
+
+    Posts are streamed in batches so large archives never have to fit in
+    memory. Returns the number of posts written to the index.
+    """
+    if not fts_enabled():
+        return 0
+    rows = (
+        queryset.filter(status='published')
+        .values_list('id', 'title', 'content', 'category_id')
+        .iterator(chunk_size=batch_size)
+    )
+    total = 0
+    batch = []
+    with connection.cursor() as cursor:
+        for pk, title, content, category_id in rows:
+            batch.append((pk, title, strip_tags(content or ''), category_id))
+            if len(batch) >= batch_size:
+                total += _write_batch(cursor, batch)
+                batch = []
+        if batch:
+            total += _write_batch(cursor, batch)
+    return total
+
+
+def _write_batch(cursor, batch):
+    cursor.executemany(
+        f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+        [(row[0],) for row in batch],
+    )
+    cursor.executemany(
+        f'INSERT INTO {FTS_TABLE} (rowid, title, body, category_id) '
+        f'VALUES (%s, %s, %s, %s)',
+        batch,
+    )
+    return len(batch)
+
+
+def rebuild_index(batch_size=500):
+    """Drop everything from the index and re-index all published posts."""
+    from .models import Post
+
+    if not fts_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    total = index_posts(Post.objects.all(), batch_size=batch_size)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def _highlight(snippet):
+    return (
+        escape(snippet)
+        .replace(_HIGHLIGHT_START, '<mark>')
+        .replace(_HIGHLIGHT_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """
+    Lazy, ranked result set for a search query.
+
+    It implements ``count()`` and slicing so it can be handed straight to
+    ``django.core.paginator.Paginator``. Each slice runs one FTS query for
+    the ids on that page plus one query to load those posts, so the cost
+    of a page does not depend on how many posts are in the archive.
+    Returned posts carry ``search_rank`` and ``search_snippet`` (safe HTML
+    with the matched words wrapped in ``<mark>``).
+    """
+
+    def __init__(self, query, category=None):
+        self.query = query
+        self.category = category
+        self.match = build_match_expression(query)
+        self._count = None
+
+    def _where(self):
+        sql = f'{FTS_TABLE} MATCH %s'
+        params = [self.match]
+        if self.category is not None:
+            sql += ' AND category_id = %s'
+            params.append(self.category.pk)
+        return sql, params
+
+    def count(self):
+        if self._count is None:
+            if not self.match:
+                self._count = 0
+            else:
+                where, params = self._where()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {where}', params)
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start = key.start or 0
+            stop = key.stop if key.stop is not None else self.count()
+            return self.fetch(limit=max(stop - start, 0), offset=start)
+        results = self.fetch(limit=1, offset=key)
+        if not results:
+            raise IndexError('search result index out of range')
+        return results[0]
+
+    def fetch(self, limit, offset=0):
+        from .models import Post
+
+        if not self.match or limit <= 0:
+            return []
+        where, params = self._where()
+        sql = (
+            f'SELECT rowid, bm25({FTS_TABLE}, %s, %s) AS rank, '
+            f"snippet({FTS_TABLE}, 1, %s, %s, '…', %s) "
+            f'FROM {FTS_TABLE} WHERE {where} '
+            f'ORDER BY rank LIMIT %s OFFSET %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                TITLE_WEIGHT, BODY_WEIGHT,
+                _HIGHLIGHT_START, _HIGHLIGHT_END, SNIPPET_TOKENS,
+                *params, limit, offset,
+            ])
+            hits = cursor.fetchall()
+
+        posts = Post.objects.select_related('author', 'category').in_bulk(
+            [pk for pk, _, _ in hits]
+        )
+        results = []
+        for pk, rank, snippet in hits:
+            post = posts.get(pk)
+            if post is None:
+                # Index row for a post that no longer exists; skip it until
+                # the next rebuild cleans it up.
+                continue
+            post.search_rank = rank
+            post.search_snippet = _highlight(snippet)
+            results.append(post)
+        return results
+
+
+def search_posts(query, category=None):
+    """
+    Search published posts.
+
+    Returns a ranked ``SearchResults`` on SQLite, otherwise a queryset
+    filtered with ``icontains`` (the pre-FTS behaviour).
+    """
+    if fts_enabled():
+        return SearchResults(query, category=category)
+
+    from .models import Post
+
+    posts = Post.objects.filter(status='published').filter(
+        Q(title__icontains=query) | Q(content__icontains=query)
+    )
+    if category is not None:
+        posts = posts.filter(category=category)
+    return posts.order_by('-created_date')
@@ -0,0 +1,299 @@
+# blog/seed.py
+"""
+Synthetic data for reproducing production-scale behaviour.
+
+``seed_blog()`` (``manage.py seed_blog``) writes users with profiles,
+categories and tags with ``bulk_create``, and the bulk of the rows,
+posts, tag links, likes and threaded comments, as plain tuples with
+``executemany``, in one transaction per batch of posts. Primary
+keys are assigned here, continuing after the current maximum, so rows
+can reference each other without reading anything back, and so the same
+seed produces the same rows (dates are relative to the time of the run).
+
+Shapes follow what real blogs look like:
+
+* post length is log-normal (most posts a few hundred words, a long tail
+  of long reads);
+* views are Zipf distributed, likes and comments follow the views, so a
+  few posts get most of the attention;
+* tags are picked with a Zipf skew as well, a few tags are everywhere;
+* comments form threads: most are replies, often to the latest comment,
+  nested up to ``comments.models.MAX_DEPTH`` like ``Comment.save`` does.
+
+bulk_create sends no signals, so what the handlers would have done is
+done in bulk instead: profiles are created alongside the users (instead
+of ``accounts.models.create_user_profile``), the denormalized
+``like_count``/``comment_count`` and the comment paths are filled in
+from the generated rows,
+and ``refresh_derived_data()`` rebuilds the search index, the sitemaps
+and the related posts and invalidates the caches.
+"""
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+WORDS = (
+    'django python database query index cache async latency throughput replica '
+    'cursor template render request response server client page post comment '
+    'thread author category tag feed sitemap search ranking performance benchmark '
+    'scale profile image variant signal worker pool queue deploy release docker '
+    'kubernetes cloud storage network socket protocol http json schema migration '
+    'model view form field widget admin session cookie token security password '
+    'testing fixture coverage debugging logging metrics tracing monitoring alert '
+    'design pattern refactoring architecture service api client library package '
+    'garden travel recipe coffee music photography running cycling mountain ocean '
+    'city history science space climate energy health reading writing learning'
+).split()
+
+CATEGORIES = (
+    'Programming', 'Web Development', 'Databases', 'DevOps', 'Security', 'Design',
+    'Data Science', 'Careers', 'Travel', 'Food', 'Photography', 'Science',
+)
+
+FIRST_NAMES = (
+    'alex', 'sam', 'jordan', 'taylor', 'morgan', 'casey', 'riley', 'jamie', 'robin',
+    'kim', 'lee', 'noor', 'ari', 'sasha', 'nico', 'yuki', 'ravi', 'ana', 'li', 'omar',
+)
+
+# Typical post length in words (median) and spread of the log-normal
+POST_WORDS_MEDIAN = 450
+POST_WORDS_SIGMA = 0.8
+
+# Zipf exponents: larger means more concentrated on a few items
+VIEWS_EXPONENT = 2.0
+COMMENTS_EXPONENT = 2.2
+TAGS_EXPONENT = 1.3
+
+# Share of views that turn into a like, and of comments that are replies
+LIKE_RATE = (0.005, 0.03)
+REPLY_RATE = 0.7
+
+
+def zipf(rng, exponent, maximum):
+    """
+    An integer from 1 to ``maximum`` with ``P(X >= k)`` about
+    ``k ** (1 - exponent)``: a discretized Pareto draw, Zipf's tail.
+    """
+    value = int((1.0 - rng.random()) ** (-1.0 / (exponent - 1.0)))
+    return min(value, maximum)
+
+
+POST_COLUMNS = (
+    'id', 'title', 'slug', 'author', 'category', 'content', 'excerpt', 'created_date',
+    'updated_date', 'publish_date', 'status', 'featured', 'views', 'like_count', 'comment_count',
+)
+COMMENT_COLUMNS = (
+    'id', 'post', 'author', 'parent', 'path', 'depth', 'content', 'created_date',
+    'updated_date', 'active',
+)
+
+
+def _insert(cursor, model, names, rows):
+    """
+    Insert ``rows``, tuples of already database-ready values for the
+    fields ``names``, with one ``executemany``; the other columns get
+    their field defaults. Skipping model instances and per-value field
+    preparation is what makes millions of rows fast, so values that
+    need adapting (datetimes) are adapted by the caller.
+    """
+    if not rows:
+        return
+    opts = model._meta
+    given = [opts.get_field(name) for name in names]
+    rest = [field for field in opts.concrete_fields if field not in given]
+    defaults = tuple(field.get_db_prep_save(field.get_default(), connection) for field in rest)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in given + rest)
+    placeholders = ', '.join(['%s'] * (len(given) + len(rest)))
+    cursor.executemany(
+        f'INSERT INTO {connection.ops.quote_name(opts.db_table)} ({columns}) VALUES ({placeholders})',
+        [row + defaults for row in rows],
+    )
+
+
+def _next_pk(model):
+    return (model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+
+
+class Generator:
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.now = timezone.now()
+        sentences = [self.sentence() for _ in range(2000)]
+        # Whole paragraphs are reused, which keeps content generation cheap
+        self.paragraphs = []
+        for _ in range(1000):
+            paragraph = ' '.join(self.rng.choices(sentences, k=self.rng.randint(2, 7)))
+            self.paragraphs.append((paragraph, len(paragraph.split())))
+        self.remarks = [self.words(5, 60).capitalize() + '.' for _ in range(2000)]
+
+    def words(self, low, high):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def sentence(self):
+        return self.words(6, 18).capitalize() + '.'
+
+    def title(self):
+        return self.words(3, 9).title()
+
+    def content(self):
+        target = math.exp(self.rng.gauss(math.log(POST_WORDS_MEDIAN), POST_WORDS_SIGMA))
+        target = min(max(target, 60), 12000)
+        paragraphs, words = [], 0
+        while words < target:
+            paragraph, count = self.rng.choice(self.paragraphs)
+            paragraphs.append(paragraph)
+            words += count
+        return '\n\n'.join(paragraphs)
+
+    def moment(self, days):
+        """A random time within the last ``days`` days."""
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+
+def seed_blog(posts=1000, users=None, categories=len(CATEGORIES), tags=200, max_comments=500,
+              seed=0, batch_size=2000, log=print):
+    """
+    Generate the data set described in the module docstring; returns the
+    number of rows written per kind.
+    """
+    from accounts.models import Profile
+    from comments.models import MAX_DEPTH, PATH_STEP, Comment
+    from .models import Category, Post, Tag
+
+    users = users or max(10, posts // 20)
+    gen = Generator(seed)
+    rng = gen.rng
+    counts = dict.fromkeys(
+        ('users', 'categories', 'tags', 'posts', 'tag_links', 'likes', 'comments'), 0
+    )
+
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        # Losing a half-written seed on a crash is fine; waiting on fsync is not
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+
+    # Users with their profiles, as create_user_profile would have made them
+    password = make_password('seed-password')
+    first_user = _next_pk(User)
+    user_ids = range(first_user, first_user + users)
+    for start in range(0, users, batch_size):
+        ids = user_ids[start:start + batch_size]
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    pk=pk, username=f'{rng.choice(FIRST_NAMES)}{pk}', email=f'user{pk}@example.com',
+                    password=password, date_joined=gen.moment(3 * 365),
+                )
+                for pk in ids
+            ])
+            Profile.objects.bulk_create([
+                Profile(user_id=pk, bio=gen.sentence() if rng.random() < 0.3 else '')
+                for pk in ids
+            ])
+        counts['users'] += len(ids)
+
+    first_category = _next_pk(Category)
+    category_ids = list(range(first_category, first_category + categories))
+    Category.objects.bulk_create([
+        Category(pk=pk, name=CATEGORIES[i % len(CATEGORIES)], slug=f'category-{pk}',
+                 description=gen.sentence())
+        for i, pk in enumerate(category_ids)
+    ])
+    counts['categories'] = categories
+
+    first_tag = _next_pk(Tag)
+    tag_ids = list(range(first_tag, first_tag + tags))
+    Tag.objects.bulk_create([
+        Tag(pk=pk, name=WORDS[i % len(WORDS)], slug=f'{WORDS[i % len(WORDS)]}-{pk}')
+        for i, pk in enumerate(tag_ids)
+    ])
+    counts['tags'] = tags
+
+    post_pk = _next_pk(Post)
+    comment_pk = _next_pk(Comment)
+    adapt = connection.ops.adapt_datetimefield_value
+    now = gen.now
+
+    for start in range(0, posts, batch_size):
+        batch, tag_links, likes, comments = [], [], [], []
+        for _ in range(min(batch_size, posts - start)):
+            published = gen.moment(3 * 365)
+            views = zipf(rng, VIEWS_EXPONENT, 10 ** 6) * 20 + rng.randrange(20)
+            liked_by = rng.sample(user_ids, min(users, int(views * rng.uniform(*LIKE_RATE))))
+            likes += [(post_pk, user_id) for user_id in liked_by]
+
+            chosen = {tag_ids[zipf(rng, TAGS_EXPONENT, tags) - 1] for _ in range(rng.randint(1, 5))}
+            tag_links += [(post_pk, tag_id) for tag_id in chosen]
+
+            # Comment threads: (path, depth, pk, parent entry) of this post's comments so far
+            thread = []
+            active = 0
+            written = published
+            for _ in range(zipf(rng, COMMENTS_EXPONENT, max_comments + 1) - 1):
+                parent = None
+                if thread and rng.random() < REPLY_RATE:
+                    # Conversations mostly continue at the latest comment
+                    parent = thread[-1] if rng.random() < 0.5 else rng.choice(thread)
+                    while parent is not None and parent[1] >= MAX_DEPTH - 1:
+                        parent = parent[3]
+                path = (parent[0] if parent else '') + f'{comment_pk:0{PATH_STEP}d}'
+                entry = (path, len(path) // PATH_STEP - 1, comment_pk, parent)
+                thread.append(entry)
+                is_active = rng.random() < 0.97
+                active += is_active
+                written = min(written + timedelta(seconds=rng.expovariate(1 / 3600)), now)
+                comments.append((
+                    comment_pk, post_pk, rng.choice(user_ids), parent[2] if parent else None,
+                    path, entry[1], rng.choice(gen.remarks),
+                    adapt(written), adapt(written), is_active,
+                ))
+                comment_pk += 1
+
+            content = gen.content()
+            title = gen.title()
+            batch.append((
+                post_pk, title[:200], f'{title.lower().replace(" ", "-")[:40]}-{post_pk}',
+                rng.choice(user_ids), rng.choice(category_ids), content,
+                Post.build_excerpt(content), adapt(published), adapt(published),
+                adapt(published), 'published' if rng.random() < 0.9 else 'draft',
+                rng.random() < 0.005, views, len(liked_by), active,
+            ))
+            post_pk += 1
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            _insert(cursor, Post, POST_COLUMNS, batch)
+            _insert(cursor, Post.tags.through, ('post', 'tag'), tag_links)
+            _insert(cursor, Post.likes.through, ('post', 'user'), likes)
+            # Parents come before their replies, and in the same batch
+            _insert(cursor, Comment, COMMENT_COLUMNS, comments)
+        counts['posts'] += len(batch)
+        counts['tag_links'] += len(tag_links)
+        counts['likes'] += len(likes)
+        counts['comments'] += len(comments)
+        log(f"  {counts['posts']}/{posts} posts, {counts['comments']} comments, "
+            f"{counts['likes']} likes")
+
+    return counts
+
+
+def refresh_derived_data(related=True, log=print):
+    """Rebuild what the post_save handlers would have kept up to date."""
+    from . import related as related_posts, search, sitemaps
+    from .cache import bump_category_version, bump_content_version, touch_feed_stamp
+
+    if search.fts_enabled():
+        search.rebuild_index()
+        log('  search index rebuilt')
+    sitemaps.build_all()
+    log('  sitemaps rebuilt')
+    if related:
+        related_posts.rebuild_all()
+        log('  related posts rebuilt')
+    bump_content_version()
+    bump_category_version()
+    touch_feed_stamp()
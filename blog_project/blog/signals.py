@@ -0,0 +1,188 @@
+# blog/signals.py
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import images, related, search, sitemaps, tasks
+from .cache import bump_category_version, bump_content_version, touch_feed_stamp
+from .models import Category, Like, Post, RelatedPost, Tag
+
+
+# Invalidate the versioned page cache (blog/cache.py)
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_page_cache(sender, **kwargs):
+    bump_content_version()
+
+
+# Feeds are revalidated against the feed stamp (blog/cache.py)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_feeds(sender, **kwargs):
+    touch_feed_stamp()
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_feeds(sender, update_fields=None, **kwargs):
+    # Counter-only saves (views, likes) don't change any feed
+    if update_fields and not {'title', 'slug', 'excerpt', 'publish_date', 'status', 'category'} & set(update_fields):
+        return
+    touch_feed_stamp()
+
+
+# Refresh the process-local category list (and its post counts)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_category_version()
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_category_counts(sender, update_fields=None, **kwargs):
+    if update_fields and not {'status', 'category'} & set(update_fields):
+        return
+    bump_category_version()
+
+
+# Keep the full-text index in sync with the posts table
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # A brand-new draft has nothing to add or remove
+    if created and instance.status != 'published':
+        return
+    # Saves that only touch counters (e.g. views) don't change searchable text
+    if update_fields and not {'title', 'content', 'status', 'category'} & set(update_fields):
+        return
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+# Denormalized like_count, following Post.likes
+def _adjust_like_count(post_ids, delta):
+    if post_ids and delta:
+        Post.objects.filter(pk__in=post_ids).update(like_count=F('like_count') + delta)
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def update_like_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_remove':
+        # pk_set holds every id passed to remove(), not just the linked ones
+        if reverse:
+            instance._like_posts_removed = list(
+                sender.objects.filter(user=instance, post_id__in=pk_set)
+                .values_list('post_id', flat=True)
+            )
+        else:
+            instance._like_users_removed = sender.objects.filter(
+                post=instance, user_id__in=pk_set
+            ).count()
+    elif action == 'pre_clear' and reverse:
+        instance._like_posts_removed = list(
+            sender.objects.filter(user=instance).values_list('post_id', flat=True)
+        )
+    elif action == 'post_add':
+        # pk_set only contains the newly added ids here
+        if reverse:
+            _adjust_like_count(pk_set, 1)
+        else:
+            _adjust_like_count([instance.pk], len(pk_set))
+    elif action in ('post_remove', 'post_clear'):
+        if reverse:
+            _adjust_like_count(getattr(instance, '_like_posts_removed', []), -1)
+        elif action == 'post_clear':
+            Post.objects.filter(pk=instance.pk).update(like_count=0)
+        else:
+            _adjust_like_count([instance.pk], -getattr(instance, '_like_users_removed', 0))
+
+
+# Like rows are mirrored into Post.likes so both count towards like_count once
+@receiver(post_save, sender=Like)
+def mirror_like_added(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    _, added = Post.likes.through.objects.get_or_create(
+        post_id=instance.post_id, user_id=instance.user_id
+    )
+    if added:
+        _adjust_like_count([instance.post_id], 1)
+
+
+@receiver(post_delete, sender=Like)
+def mirror_like_removed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Post):
+        return
+    removed, _ = Post.likes.through.objects.filter(
+        post_id=instance.post_id, user_id=instance.user_id
+    ).delete()
+    if removed:
+        _adjust_like_count([instance.post_id], -1)
+
+
+# Regenerate only the sitemap shard a changed post lives in
+@receiver(post_save, sender=Post)
+def mark_sitemap_shard(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields and not {'slug', 'status'} & set(update_fields):
+        return
+    sitemaps.mark_dirty(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def mark_sitemap_shard_deleted(sender, instance, **kwargs):
+    sitemaps.mark_dirty(instance.pk)
+
+
+# Refresh precomputed related posts after the transaction commits
+@receiver(post_save, sender=Post)
+def refresh_related_posts(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or (created and instance.status != 'published'):
+        return
+    if update_fields and not {'title', 'excerpt', 'status', 'category'} & set(update_fields):
+        return
+    related.schedule_refresh(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_related_posts_for_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    for post_id in (pk_set or ()) if reverse else (instance.pk,):
+        related.schedule_refresh(post_id)
+
+
+@receiver(pre_delete, sender=Post)
+def refresh_related_before_delete(sender, instance, **kwargs):
+    # Their entries pointing at this post are about to cascade away
+    for post_id in RelatedPost.objects.filter(related=instance).values_list('post_id', flat=True):
+        related.schedule_refresh(post_id)
+
+
+# Generate image variants in the background when Post.image changes
+def _image_name(instance):
+    # Read the raw value so deferred-field querysets don't trigger a query;
+    # None means the image column wasn't loaded
+    if 'image' not in instance.__dict__:
+        return None
+    value = instance.__dict__['image']
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    instance._original_image = _image_name(instance)
+
+
+@receiver(post_save, sender=Post)
+def process_image(sender, instance, raw=False, **kwargs):
+    name = _image_name(instance)
+    if raw or name is None or name == instance._original_image:
+        return
+    instance._original_image = name
+    tasks.enqueue(images.process_post_image, instance.pk)
@@ -1,12 +1,240 @@
+# blog/sitemaps.py
+"""
+Sitemaps.
+
+Published posts are split into shards by id range (shard n holds ids
+``n * SITEMAP_SHARD_SIZE`` up to ``(n + 1) * SITEMAP_SHARD_SIZE - 1``), so
+a changed post always belongs to exactly one shard. Every shard is
+pre-rendered as a gzip file under ``SITEMAP_ROOT`` from a values-only
+streaming query, next to a sitemap index listing them.
+
+Saving or deleting a post only drops a marker file for its shard
+(``blog/signals.py``). The next sitemap request hands the rewrite of just
+the marked shards and the index to the background pool (blog/tasks.py)
+and is served the current files meanwhile; ``manage.py build_sitemaps``
+does the same in the foreground. Requests never build on their own
+thread: before the first build has finished they get a 503 with
+``Retry-After``, so run ``build_sitemaps`` when deploying.
+"""
+import datetime
+import gzip
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.core.cache import cache
+from django.db.models import Max
+from django.urls import reverse
+
+from . import tasks
 from .models import Post
 
+
 class PostSitemap(Sitemap):
     changefreq = "weekly"
     priority = 0.9
-    
+
     def items(self):
         return Post.objects.filter(status='published')
-    
+
     def lastmod(self, obj):
-        return obj.updated_date
\ No newline at end of file
+        return obj.updated_date
+
+
+INDEX_FILE = 'sitemap.xml.gz'
+SHARD_FILE = 'sitemap-posts-{}.xml.gz'
+DIRTY_DIR = 'dirty'
+BUILD_LOCK_KEY = 'sitemaps:building'
+
+
+def sitemap_root():
+    return str(getattr(settings, 'SITEMAP_ROOT', settings.BASE_DIR / 'sitemaps'))
+
+
+def shard_size():
+    return getattr(settings, 'SITEMAP_SHARD_SIZE', 5000)
+
+
+def shard_for(post_id):
+    return post_id // shard_size()
+
+
+def index_path():
+    return os.path.join(sitemap_root(), INDEX_FILE)
+
+
+def shard_path(shard):
+    return os.path.join(sitemap_root(), SHARD_FILE.format(shard))
+
+
+def _site_url():
+    return getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000').rstrip('/')
+
+
+def _write_atomic(path, chunks):
+    """gzip ``chunks`` into ``path`` via a temp file so readers never see half a file."""
+    # A unique name per writer: workers and threads may write the same file
+    raw = tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp', delete=False
+    )
+    try:
+        # mtime=0 keeps the output byte-identical for identical content
+        with raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as out:
+            for chunk in chunks:
+                out.write(chunk.encode('utf-8'))
+        # Temp files are private; the sitemaps are not
+        os.chmod(raw.name, 0o644)
+        os.replace(raw.name, path)
+    except BaseException:
+        os.remove(raw.name)
+        raise
+
+
+def _shard_urls(shard):
+    size = shard_size()
+    posts = (
+        Post.objects.filter(status='published', id__gte=shard * size, id__lt=(shard + 1) * size)
+        .order_by('id')
+        .values_list('slug', 'updated_date')
+        .iterator(chunk_size=2000)
+    )
+    # Reverse once and substitute slugs instead of reversing per post
+    url_template = _site_url() + reverse('post_detail', kwargs={'slug': '__slug__'})
+    for slug, updated in posts:
+        yield (
+            f'<url><loc>{escape(url_template.replace("__slug__", slug))}</loc>'
+            f'<lastmod>{updated.isoformat()}</lastmod>'
+            f'<changefreq>{PostSitemap.changefreq}</changefreq>'
+            f'<priority>{PostSitemap.priority}</priority></url>\n'
+        )
+
+
+def write_shard(shard):
+    """Regenerate one shard; returns False (and removes the file) if it is empty."""
+    urls = _shard_urls(shard)
+    first = next(urls, None)
+    if first is None:
+        if os.path.exists(shard_path(shard)):
+            os.remove(shard_path(shard))
+        return False
+
+    def chunks():
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        yield first
+        yield from urls
+        yield '</urlset>\n'
+
+    _write_atomic(shard_path(shard), chunks())
+    return True
+
+
+def existing_shards():
+    shards = []
+    prefix, suffix = SHARD_FILE.split('{}')
+    for name in os.listdir(sitemap_root()):
+        if name.startswith(prefix) and name.endswith(suffix):
+            number = name[len(prefix):-len(suffix)]
+            if number.isdigit():
+                shards.append(int(number))
+    return sorted(shards)
+
+
+def write_index():
+    def chunks():
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for shard in existing_shards():
+            mtime = datetime.datetime.fromtimestamp(
+                os.path.getmtime(shard_path(shard)), tz=datetime.timezone.utc
+            )
+            loc = _site_url() + reverse('sitemap_shard', args=[shard])
+            yield (f'<sitemap><loc>{escape(loc)}</loc>'
+                   f'<lastmod>{mtime.isoformat()}</lastmod></sitemap>\n')
+        yield '</sitemapindex>\n'
+
+    _write_atomic(index_path(), chunks())
+
+
+def mark_dirty(*post_ids):
+    """Flag the shards holding ``post_ids`` for regeneration (cheap, cross-process)."""
+    dirty_dir = os.path.join(sitemap_root(), DIRTY_DIR)
+    os.makedirs(dirty_dir, exist_ok=True)
+    for shard in {shard_for(post_id) for post_id in post_ids}:
+        open(os.path.join(dirty_dir, str(shard)), 'a').close()
+
+
+def has_dirty():
+    dirty_dir = os.path.join(sitemap_root(), DIRTY_DIR)
+    try:
+        return any(name.isdigit() for name in os.listdir(dirty_dir))
+    except FileNotFoundError:
+        return False
+
+
+def rebuild_dirty():
+    """Rewrite only the shards marked dirty, then the index. Returns the shards rebuilt."""
+    dirty_dir = os.path.join(sitemap_root(), DIRTY_DIR)
+    try:
+        markers = [name for name in os.listdir(dirty_dir) if name.isdigit()]
+    except FileNotFoundError:
+        return []
+    rebuilt = []
+    for name in markers:
+        try:
+            # Remove first: a post saved while the shard is being written
+            # marks it again instead of being lost
+            os.remove(os.path.join(dirty_dir, name))
+        except FileNotFoundError:
+            continue  # another worker picked it up
+        write_shard(int(name))
+        rebuilt.append(int(name))
+    if rebuilt:
+        write_index()
+    return sorted(rebuilt)
+
+
+def build_all():
+    """Regenerate every shard and the index from scratch. Returns the shard count."""
+    root = sitemap_root()
+    os.makedirs(root, exist_ok=True)
+    dirty_dir = os.path.join(root, DIRTY_DIR)
+    if os.path.isdir(dirty_dir):
+        for name in os.listdir(dirty_dir):
+            os.remove(os.path.join(dirty_dir, name))
+
+    last_id = Post.objects.filter(status='published').aggregate(last=Max('id'))['last']
+    wanted = range(shard_for(last_id) + 1) if last_id is not None else range(0)
+    written = {shard for shard in wanted if write_shard(shard)}
+    for shard in existing_shards():
+        if shard not in written:
+            os.remove(shard_path(shard))
+    write_index()
+    return len(written)
+
+
+def is_built():
+    """True once build_all() has written the index at least once."""
+    return os.path.exists(index_path())
+
+
+def _build_and_unlock():
+    try:
+        if is_built():
+            rebuild_dirty()
+        else:
+            build_all()
+    finally:
+        cache.delete(BUILD_LOCK_KEY)
+
+
+def ensure_built():
+    """
+    Start bringing the files up to date in the background, once at a time;
+    returns the index path, or None while there is no index to serve yet.
+    """
+    if (not is_built() or has_dirty()) and cache.add(BUILD_LOCK_KEY, True, 600):
+        tasks.submit(_build_and_unlock)
+    return index_path() if is_built() else None
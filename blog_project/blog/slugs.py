@@ -0,0 +1,87 @@
+# blog/slugs.py
+"""
+Slug allocation for posts.
+
+Slugs are unique per publish date (``unique_for_date`` on ``Post.slug``).
+Instead of probing ``slug-1``, ``slug-2``, ... with one ``EXISTS`` query
+each, every slug already taken under the same prefix is fetched in a
+single query and the first free suffix is picked in Python.
+"""
+import uuid
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+# Keep the same length as Post.slug (SlugField default)
+MAX_SLUG_LENGTH = 50
+
+# Bases looked up per query by allocate_slugs()
+PREFIX_BATCH_SIZE = 100
+
+
+def generate_slug(title):
+    """Slug for a new post: the slugified title plus a short random fragment."""
+    base = slugify(title) or 'post'
+    fragment = uuid.uuid4().hex[:8]
+    return f'{base[:MAX_SLUG_LENGTH - len(fragment) - 5]}-{fragment}'
+
+
+def first_free_slug(slug, taken):
+    """``slug`` itself, or ``slug-N`` with the smallest N not in ``taken``."""
+    if slug not in taken:
+        return slug
+    counter = 1
+    while f'{slug}-{counter}' in taken:
+        counter += 1
+    return f'{slug}-{counter}'
+
+
+def _day(value):
+    # Same calendar day the ``__date`` lookup uses (the current time zone)
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _taken_query(slug):
+    return Q(slug=slug) | Q(slug__startswith=f'{slug}-')
+
+
+def allocate_slug(slug, publish_date, exclude_pk=None):
+    """Return a slug that is free on ``publish_date``, using one query."""
+    from .models import Post
+
+    taken = Post.objects.filter(_taken_query(slug), publish_date__date=_day(publish_date))
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    return first_free_slug(slug, set(taken.order_by().values_list('slug', flat=True)))
+
+
+def allocate_slugs(posts):
+    """
+    Give every unsaved post in ``posts`` a free slug, for bulk_create paths.
+
+    Posts without a slug get one from their title. Existing slugs are
+    looked up with one query per ``PREFIX_BATCH_SIZE`` distinct bases and
+    collisions inside ``posts`` itself are resolved too.
+    """
+    from .models import Post
+
+    for post in posts:
+        if not post.slug:
+            post.slug = generate_slug(post.title)
+
+    bases = sorted({post.slug for post in posts})
+    taken = defaultdict(set)
+    for i in range(0, len(bases), PREFIX_BATCH_SIZE):
+        condition = Q()
+        for base in bases[i:i + PREFIX_BATCH_SIZE]:
+            condition |= _taken_query(base)
+        for slug, publish_date in Post.objects.filter(condition).order_by().values_list('slug', 'publish_date'):
+            taken[_day(publish_date)].add(slug)
+
+    for post in posts:
+        taken_today = taken[_day(post.publish_date)]
+        post.slug = first_free_slug(post.slug, taken_today)
+        taken_today.add(post.slug)
+    return posts
@@ -0,0 +1,66 @@
+# blog/tasks.py
+"""
+A small in-process worker pool for work that must not run on the
+request path (image processing, related posts, ...).
+
+``enqueue(func, *args)`` hands ``func`` to the pool once the current
+transaction commits, so workers never see rows that might still be
+rolled back; ``submit()`` hands it over right away. With ``BACKGROUND_TASKS_EAGER`` (used by the test settings)
+tasks run inline right after the commit instead.
+
+Tasks are best effort: they are lost if the process dies before running
+them, so each task must be safe to re-run from a management command.
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                    thread_name_prefix='blog-task',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(func, '__name__', func))
+    finally:
+        # Worker threads get their own connections; don't leak them
+        close_old_connections()
+
+
+def submit(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in the pool now; for callers already past the commit."""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        func(*args, **kwargs)
+    else:
+        _get_executor().submit(_run, func, args, kwargs)
+
+
+def enqueue(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in the pool after the transaction commits."""
+    transaction.on_commit(lambda: submit(func, *args, **kwargs))
+
+
+@atexit.register
+def _shutdown():
+    if _executor is not None:
+        _executor.shutdown(wait=True)
@@ -0,0 +1,56 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+# Default `sizes` per variant: how wide the image is drawn on the page
+SIZES = {
+    'thumb': '320px',
+    'card': '(max-width: 768px) 100vw, 720px',
+    'full': '100vw',
+}
+
+
+def _srcset(variants, key):
+    return ', '.join(
+        f"{default_storage.url(variant[key])} {variant['width']}w"
+        for variant in sorted(variants.values(), key=lambda v: v['width'])
+    )
+
+
+@register.simple_tag
+def post_image(post, variant='card', sizes=None, **attrs):
+    """
+    ``<picture>`` for ``post.image`` with WebP and JPEG/PNG ``srcset`` and
+    the intrinsic width/height, e.g.
+    ``{% post_image post 'card' class="card-img-top" %}``.
+    Falls back to the original file until the variants exist.
+    """
+    if not post.image:
+        return ''
+    attrs.setdefault('alt', post.title)
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    extra = format_html_join(' ', '{}="{}"', attrs.items())
+
+    variants = post.image_variants or {}
+    chosen = variants.get(variant)
+    if not chosen:
+        if post.image_width and post.image_height:
+            return format_html(
+                '<img src="{}" width="{}" height="{}" {}>',
+                post.image.url, post.image_width, post.image_height, extra,
+            )
+        return format_html('<img src="{}" {}>', post.image.url, extra)
+
+    sizes = sizes or SIZES.get(variant, '100vw')
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" {}>'
+        '</picture>',
+        _srcset(variants, 'webp'), sizes,
+        default_storage.url(chosen['src']), _srcset(variants, 'src'), sizes,
+        chosen['width'], chosen['height'], extra,
+    )
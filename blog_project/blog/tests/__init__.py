@@ -3,4 +3,25 @@
 from .test_forms import *
 from .test_models import *
 from .test_simple import *
-from .test_all import *
\ No newline at end of file
+from .test_all import *
+from .test_search import *
+from .test_pagination import *
+from .test_counters import *
+from .test_cache import *
+from .test_context_processors import *
+from .test_slugs import *
+from .test_import import *
+from .test_sitemaps import *
+from .test_feeds import *
+from .test_conditional import *
+from .test_ratelimit import *
+from .test_trending import *
+from .test_related import *
+from .test_images import *
+from .test_async_views import *
+from .test_routers import *
+from .test_metrics import *
+from .test_benchmark import *
+from .test_seed import *
+from .test_api import *
+from .test_export import *
@@ -0,0 +1,145 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Category, Post, Tag
+from comments.models import Comment
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass123')
+        self.category = Category.objects.create(name='Django')
+        self.python = Tag.objects.create(name='Python')
+        self.web = Tag.objects.create(name='Web')
+        self.posts = [
+            Post.objects.create(
+                title=f'API post {i}', author=self.user, content=f'Body {i}',
+                status='published', category=self.category if i % 2 else None,
+            )
+            for i in range(5)
+        ]
+        self.posts[1].tags.add(self.python, self.web)
+        self.draft = Post.objects.create(title='Draft', author=self.user, content='x')
+
+    def test_post_list_defaults(self):
+        response = self.client.get('/api/posts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        results = response.json()['results']
+        # Published only, newest first
+        self.assertEqual([p['id'] for p in results], [p.pk for p in reversed(self.posts)])
+        post = next(p for p in results if p['id'] == self.posts[1].pk)
+        self.assertEqual(post['author'], {'id': self.user.pk, 'username': 'reader'})
+        self.assertEqual(post['category'], {
+            'id': self.category.pk, 'name': 'Django', 'slug': self.category.slug,
+        })
+        self.assertEqual([t['name'] for t in post['tags']], ['Python', 'Web'])
+        self.assertEqual(post['url'], self.posts[1].get_absolute_url())
+        self.assertNotIn('content', post)
+        self.assertIsNone(results[0]['category'])
+
+    def test_sparse_fieldsets_plan_the_queries(self):
+        # Plain columns: one query, no joins
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get('/api/posts/?fields=id,title')
+        self.assertNotIn('JOIN', queries.captured_queries[0]['sql'])
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'title'})
+
+        # A related field joins its table; tags take one query for the page
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get('/api/posts/?fields=id,author,tags')
+        self.assertIn('auth_user', queries.captured_queries[0]['sql'])
+        self.assertNotIn('blog_category', queries.captured_queries[0]['sql'])
+
+        response = self.client.get('/api/posts/?fields=id,nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.json()['error'])
+
+    def test_keyset_pagination(self):
+        seen = []
+        url = '/api/posts/?limit=2&fields=id'
+        while url:
+            data = self.client.get(url).json()
+            seen += [p['id'] for p in data['results']]
+            url = data['next']
+        self.assertEqual(seen, [p.pk for p in reversed(self.posts)])
+
+        first = self.client.get('/api/posts/?limit=2&fields=id').json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(self.client.get(second['previous']).json()['results'], first['results'])
+
+        self.assertEqual(self.client.get('/api/posts/?limit=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/posts/?limit=x').status_code, 400)
+
+    def test_filters(self):
+        response = self.client.get(f'/api/posts/?category={self.category.slug}&fields=id')
+        self.assertEqual(
+            [p['id'] for p in response.json()['results']],
+            [self.posts[3].pk, self.posts[1].pk],
+        )
+        response = self.client.get(f'/api/posts/?tag={self.python.slug}&fields=id')
+        self.assertEqual([p['id'] for p in response.json()['results']], [self.posts[1].pk])
+
+    def test_post_detail(self):
+        response = self.client.get(f'/api/posts/{self.posts[0].pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['content'], 'Body 0')
+        self.assertEqual(self.client.get(f'/api/posts/{self.draft.pk}/').status_code, 404)
+
+    def test_etag_revalidation(self):
+        response = self.client.get('/api/posts/')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Post.objects.filter(pk=self.posts[0].pk).update(title='Changed')
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comments_in_thread_order_for_a_post(self):
+        post = self.posts[0]
+        root = Comment.objects.create(post=post, author=self.user, content='Root')
+        other = Comment.objects.create(post=post, author=self.user, content='Other')
+        reply = Comment.objects.create(post=post, author=self.user, content='Reply', parent=root)
+        Comment.objects.create(post=self.draft, author=self.user, content='Hidden')
+
+        response = self.client.get(f'/api/comments/?post={post.pk}')
+        self.assertEqual(
+            [(c['id'], c['parent'], c['depth']) for c in response.json()['results']],
+            [(root.pk, None, 0), (reply.pk, root.pk, 1), (other.pk, None, 0)],
+        )
+        # Without a post: newest first, comments on drafts left out
+        response = self.client.get('/api/comments/?fields=id')
+        self.assertEqual(
+            [c['id'] for c in response.json()['results']], [reply.pk, other.pk, root.pk],
+        )
+        self.assertEqual(self.client.get('/api/comments/?post=x').status_code, 400)
+
+    def test_replies_under_hidden_comments_are_left_out(self):
+        post = self.posts[0]
+        root = Comment.objects.create(post=post, author=self.user, content='Root')
+        reply = Comment.objects.create(post=post, author=self.user, content='Reply', parent=root)
+        nested = Comment.objects.create(post=post, author=self.user, content='Nested', parent=reply)
+        other = Comment.objects.create(post=post, author=self.user, content='Other')
+        reply.active = False
+        reply.save()
+
+        response = self.client.get(f'/api/comments/?post={post.pk}&fields=id')
+        self.assertEqual([c['id'] for c in response.json()['results']], [root.pk, other.pk])
+        response = self.client.get('/api/comments/?fields=id')
+        self.assertEqual([c['id'] for c in response.json()['results']], [other.pk, root.pk])
+        self.assertEqual(self.client.get(f'/api/comments/{nested.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/comments/{root.pk}/').status_code, 200)
+
+    def test_categories_and_tags(self):
+        response = self.client.get(reverse('api_categories'))
+        self.assertEqual(response.json()['results'][0]['url'], self.category.get_absolute_url())
+        response = self.client.get(reverse('api_tags'))
+        self.assertEqual([t['name'] for t in response.json()['results']], ['Python', 'Web'])
+        response = self.client.get(reverse('api_tag_detail', args=[self.web.pk]))
+        self.assertEqual(response.json(), {'id': self.web.pk, 'name': 'Web', 'slug': 'web'})
+
+    def test_read_only(self):
+        response = self.client.post('/api/comments/', {'content': 'x', 'post': self.posts[0].pk})
+        self.assertEqual(response.status_code, 405)
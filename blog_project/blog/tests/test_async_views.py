@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+
+from blog import async_views
+from blog.models import Category, Post
+
+# The site's URLs with the hot read paths served by the async views, as
+# under ASGI (ASYNC_VIEWS)
+urlpatterns = [
+    path('', async_views.home, name='home'),
+    path('blog/posts/', async_views.post_list, name='post_list'),
+    path('blog/post/<slug:slug>/', async_views.post_detail, name='post_detail'),
+    path('blog/category/<slug:slug>/', async_views.category_posts, name='category_posts'),
+    path('rss/', async_views.latest_posts_feed, name='post_feed'),
+    path('sitemap.xml', async_views.sitemap_index, name='sitemap'),
+    path('', include('blog_project.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='asyncer', password='testpass123')
+        self.category = Category.objects.create(name='Async')
+        self.post = Post.objects.create(
+            title='Async post', author=self.user, content='Body', excerpt='Async excerpt',
+            status='published', featured=True, category=self.category,
+        )
+
+    def test_views_are_coroutines(self):
+        for view in (async_views.home, async_views.post_list, async_views.post_detail,
+                     async_views.category_posts, async_views.latest_posts_feed):
+            self.assertTrue(iscoroutinefunction(view), view)
+
+    async def test_hot_pages_render(self):
+        for name, args in (('home', []), ('post_list', []), ('category_posts', [self.category.slug]),
+                           ('post_detail', [self.post.slug])):
+            response = await self.async_client.get(reverse(name, args=args))
+            self.assertContains(response, 'Async post', msg_prefix=name)
+
+    async def test_missing_category_is_404(self):
+        response = await self.async_client.get(reverse('category_posts', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_search_runs_in_a_thread(self):
+        response = await self.async_client.get(reverse('post_list'), {'q': 'async'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_page_is_cached(self):
+        get = async_to_sync(self.async_client.get)
+        get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = get(reverse('home'))
+        self.assertContains(response, 'Async post')
+
+    async def test_post_detail_conditional_get(self):
+        url = reverse('post_detail', args=[self.post.slug])
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_post_detail_for_logged_in_user(self):
+        await self.post.likes.aadd(self.user)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('post_detail', args=[self.post.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['liked'])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_comment_post_goes_through_sync_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('post_detail', args=[self.post.slug]), {'content': 'From async route'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(self.post.comments.filter(content='From async route').exists())
+
+    async def test_feed_and_sitemap(self):
+        response = await self.async_client.get(reverse('post_feed'))
+        self.assertContains(response, 'Async post')
+        response = await self.async_client.get(
+            reverse('post_feed'), headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with self.settings(SITEMAP_ROOT=root):
+            response = await self.async_client.get(reverse('sitemap'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'sitemapindex', response.content)
@@ -0,0 +1,70 @@
+import tempfile
+
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from blog import benchmark, metrics, seed
+from blog.counters import view_counts
+
+
+class BenchmarkHelperTests(SimpleTestCase):
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 0.50), 50)
+        self.assertEqual(benchmark.percentile(values, 0.95), 95)
+        self.assertEqual(benchmark.percentile(values, 0.99), 99)
+        self.assertEqual(benchmark.percentile([7], 0.99), 7)
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        def results(p95, queries, rps):
+            return {'endpoints': {'home': {
+                'latency_ms': {'p95': p95}, 'queries_per_request': queries, 'throughput_rps': rps,
+            }}}
+
+        baseline = results(10.0, 4, 100.0)
+        self.assertEqual(benchmark.compare(results(11.0, 4, 95.0), baseline), [])
+        self.assertEqual(
+            benchmark.compare(results(15.0, 6, 50.0), baseline),
+            ['home: p95 latency 10.0 -> 15.0', 'home: queries/request 4 -> 6',
+             'home: throughput 100.0 -> 50.0'],
+        )
+        # Endpoints missing from the baseline are not compared
+        self.assertEqual(benchmark.compare(results(15.0, 6, 50.0), {'endpoints': {}}), [])
+
+
+@override_settings(
+    ALLOWED_HOSTS=['testserver'], QUERY_METRICS_ENABLED=True,
+    VIEW_COUNT_FLUSH_THRESHOLD=10 ** 9, VIEW_COUNT_FLUSH_INTERVAL=10 ** 9,
+)
+class BenchmarkRunTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        sitemap_root = tempfile.TemporaryDirectory()
+        self.addCleanup(sitemap_root.cleanup)
+        self.enterContext(override_settings(SITEMAP_ROOT=sitemap_root.name))
+        self.addCleanup(view_counts.flush)
+        self.addCleanup(metrics.registry.reset)
+
+    def test_post_detail_skipped_without_published_posts(self):
+        messages = []
+        results = benchmark.run_suite(
+            WSGIHandler(), endpoints=['post_detail'], requests=4, concurrency=2,
+            log=messages.append,
+        )
+        self.assertEqual(results, {})
+        self.assertIn('skipped', messages[0])
+
+    def test_suite_against_seeded_data(self):
+        seed.seed_blog(posts=40, log=lambda message: None)
+        seed.refresh_derived_data(log=lambda message: None)
+
+        results = benchmark.run_suite(
+            WSGIHandler(), requests=8, concurrency=2, log=lambda message: None,
+        )
+        self.assertEqual(set(results), set(benchmark.ENDPOINTS))
+        for name, result in results.items():
+            self.assertEqual(result['requests'], 8, name)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+        self.assertGreater(results['post_detail']['queries_per_request'], 0)
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.cache import get_cached_categories, get_content_version
+from blog.models import Post, Category
+from comments.models import Comment
+
+
+class VersionedPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cacher',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Cached')
+        self.post = Post.objects.create(
+            title='First cached post',
+            author=self.user,
+            content='Content',
+            status='published',
+            category=self.category,
+        )
+
+    def test_anonymous_hits_are_served_without_queries(self):
+        url = reverse('post_list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'First cached post')
+
+    def test_content_changes_invalidate_pages(self):
+        url = reverse('category_posts', args=[self.category.slug])
+        self.client.get(url)
+
+        version = get_content_version()
+        Post.objects.create(
+            title='Second cached post',
+            author=self.user,
+            content='Content',
+            status='published',
+            category=self.category,
+        )
+        self.assertGreater(get_content_version(), version)
+        self.assertContains(self.client.get(url), 'Second cached post')
+
+    def test_comments_and_categories_bump_version(self):
+        version = get_content_version()
+        Comment.objects.create(post=self.post, author=self.user, content='Hi')
+        self.assertGreater(get_content_version(), version)
+
+        version = get_content_version()
+        self.category.delete()
+        self.assertGreater(get_content_version(), version)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get(reverse('post_list'))
+        response = self.client.get(reverse('post_list'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('post_list'), {'cursor': 'bogus'})
+
+    def test_logged_in_users_bypass_cache(self):
+        self.client.get(reverse('post_list'))
+        self.client.login(username='cacher', password='testpass123')
+        response = self.client.get(reverse('post_list'))
+        self.assertContains(response, 'Write a Post')
+
+
+class CategoryListCacheTests(TestCase):
+    # Runs under the project's CACHES: a cache that stored its entries in
+    # the database would show up in these query counts
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Counted')
+
+    def test_warm_list_costs_no_queries(self):
+        get_cached_categories()
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                categories = get_cached_categories()
+        self.assertEqual([c.name for c in categories], ['Counted'])
+
+    def test_category_change_reloads_list(self):
+        get_cached_categories()
+        Category.objects.create(name='Added')
+        with self.assertNumQueries(1):
+            names = [c.name for c in get_cached_categories()]
+        self.assertEqual(names, ['Added', 'Counted'])
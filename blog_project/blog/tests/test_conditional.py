@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.avatars import forget_avatar
+from blog import related
+from blog.counters import view_counts
+from blog.models import Post
+from comments.models import Comment
+
+
+class ConditionalPostDetailTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='validator', password='testpass123')
+        self.post = Post.objects.create(
+            title='Conditional post', author=self.user, content='Body', status='published'
+        )
+        self.url = reverse('post_detail', args=[self.post.slug])
+
+    def test_response_carries_validators_and_cache_headers(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    @override_settings(VIEW_COUNT_FLUSH_THRESHOLD=1000)
+    def test_unchanged_post_is_304_with_one_query(self):
+        etag = self.client.get(self.url)['ETag']
+        self.addCleanup(view_counts.flush)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_304_still_counts_the_view(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        view_counts.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_new_comment_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        Comment.objects.create(post=self.post, author=self.user, content='New comment')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'New comment')
+
+    def test_related_posts_refresh_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        other = Post.objects.create(
+            title='Conditional post sequel', author=self.user, content='Body', status='published'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            related.rebuild_all()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, other.title)
+
+    def test_commenter_avatar_change_changes_the_etag(self):
+        Comment.objects.create(post=self.post, author=self.user, content='With an avatar')
+        etag = self.client.get(self.url)['ETag']
+        forget_avatar(self.user.pk)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_differs_per_viewer(self):
+        anonymous = self.client.get(self.url)['ETag']
+        self.client.login(username='validator', password='testpass123')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_unknown_slug_is_404(self):
+        response = self.client.get(reverse('post_detail', args=['missing']))
+        self.assertEqual(response.status_code, 404)
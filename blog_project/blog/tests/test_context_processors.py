@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from blog.context_processors import categories
+from blog.models import Post, Category
+
+
+class CategoriesProcessorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/')
+        self.user = User.objects.create_user(
+            username='reader',
+            password='testpass123'
+        )
+        self.tech = Category.objects.create(name='Tech')
+        self.life = Category.objects.create(name='Life')
+        Post.objects.create(
+            title='Published tech post',
+            author=self.user,
+            content='Content',
+            status='published',
+            category=self.tech,
+        )
+
+    def _render(self):
+        # Force the lazy object like a template would
+        return [(c.name, c.post_count) for c in categories(self.request)['categories']]
+
+    def test_query_count_drops_to_zero_once_warm(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self._render(), [('Life', 0), ('Tech', 1)])
+        for _ in range(5):
+            with self.assertNumQueries(0):
+                self._render()
+
+    def test_unused_processor_costs_nothing(self):
+        with self.assertNumQueries(0):
+            categories(self.request)
+
+    def test_refreshes_when_categories_change(self):
+        self._render()
+        Category.objects.create(name='Art')
+        self.assertEqual([name for name, _ in self._render()], ['Art', 'Life', 'Tech'])
+
+    def test_refreshes_when_published_posts_change(self):
+        self._render()
+        post = Post.objects.create(
+            title='Draft life post',
+            author=self.user,
+            content='Content',
+            status='draft',
+            category=self.life,
+        )
+        self.assertEqual(self._render(), [('Life', 0), ('Tech', 1)])
+        post.status = 'published'
+        post.save()
+        self.assertEqual(self._render(), [('Life', 1), ('Tech', 1)])
+
+    def test_view_count_updates_do_not_invalidate(self):
+        post = Post.objects.get(title='Published tech post')
+        self._render()
+        post.save(update_fields=['views'])
+        with self.assertNumQueries(0):
+            self._render()
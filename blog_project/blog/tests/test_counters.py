@@ -0,0 +1,178 @@
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from blog import routers
+from blog.counters import ViewCountBuffer, reconcile_post_counters, view_counts
+from blog.models import Like, Post
+from comments.models import Comment
+
+
+class ViewCountBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='viewer',
+            password='testpass123'
+        )
+        self.posts = [
+            Post.objects.create(
+                title=f'Counted post {i}',
+                author=self.user,
+                content='Content',
+                status='published',
+            )
+            for i in range(3)
+        ]
+
+    def test_concurrent_increments_are_not_lost(self):
+        """Eight threads x 500 views each add up exactly after a flush"""
+        buffer = ViewCountBuffer(flush_interval=3600, flush_threshold=10 ** 9)
+        post_ids = [p.pk for p in self.posts]
+
+        def worker():
+            for i in range(500):
+                buffer.increment(post_ids[i % len(post_ids)])
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(buffer.pending(), 4000)
+        # Nothing reached the database yet
+        self.assertEqual(sum(Post.objects.values_list('views', flat=True)), 0)
+
+        self.assertEqual(buffer.flush(), 4000)
+        views = dict(Post.objects.values_list('id', 'views'))
+        self.assertEqual(sum(views.values()), 4000)
+        self.assertEqual(views[post_ids[0]], 1336)
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_threshold_triggers_batched_flush(self):
+        buffer = ViewCountBuffer(flush_interval=3600, flush_threshold=5)
+        for _ in range(3):
+            buffer.increment(self.posts[0].pk)
+        buffer.increment(self.posts[1].pk)
+        self.assertEqual(buffer.pending(), 4)
+
+        # 2 distinct increments (3 and 2) -> 2 UPDATE statements
+        with self.assertNumQueries(2 + 2):  # + savepoint/release
+            buffer.increment(self.posts[1].pk)
+        self.assertEqual(buffer.pending(), 0)
+        self.posts[0].refresh_from_db()
+        self.posts[1].refresh_from_db()
+        self.assertEqual((self.posts[0].views, self.posts[1].views), (3, 2))
+
+    def test_failed_flush_keeps_increments(self):
+        buffer = ViewCountBuffer(flush_interval=3600, flush_threshold=10 ** 9)
+        buffer.increment(self.posts[0].pk, amount=7)
+        with mock.patch('django.db.models.query.QuerySet.update', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                buffer.flush()
+        self.assertEqual(buffer.pending(self.posts[0].pk), 7)
+        buffer.flush()
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 7)
+
+    def test_flush_does_not_pin_the_request(self):
+        buffer = ViewCountBuffer(flush_interval=3600, flush_threshold=10 ** 9)
+        buffer.increment(self.posts[0].pk)
+        state, token = routers.start_request(pinned=False)
+        try:
+            buffer.flush()
+        finally:
+            routers.end_request(token)
+        # The anonymous GET whose view triggered the flush stays on replicas
+        self.assertFalse(state.pinned or state.wrote)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views, 1)
+
+    def test_flush_command(self):
+        with self.settings(VIEW_COUNT_FLUSH_THRESHOLD=10 ** 9, VIEW_COUNT_FLUSH_INTERVAL=3600):
+            self.posts[2].increment_views()
+            self.posts[2].increment_views()
+            self.assertEqual(self.posts[2].views, 2)
+            self.assertEqual(view_counts.pending(self.posts[2].pk), 2)
+
+            out = StringIO()
+            call_command('flush_view_counts', stdout=out)
+        self.assertIn('Flushed 2 buffered views', out.getvalue())
+        self.assertEqual(Post.objects.get(pk=self.posts[2].pk).views, 2)
+
+
+class CounterCacheTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fans = [
+            User.objects.create_user(username=f'fan{i}', password='testpass123')
+            for i in range(3)
+        ]
+        self.post = Post.objects.create(
+            title='Popular post',
+            author=self.author,
+            content='Content',
+            status='published',
+        )
+
+    def _counts(self):
+        self.post.refresh_from_db()
+        return self.post.like_count, self.post.comment_count
+
+    def test_likes_m2m_forward_and_reverse(self):
+        self.post.likes.add(*self.fans)
+        self.post.likes.add(self.fans[0])  # already liked, no change
+        self.assertEqual(self._counts(), (3, 0))
+
+        self.post.likes.remove(self.fans[0], self.author)  # author never liked
+        self.assertEqual(self._counts(), (2, 0))
+
+        self.fans[1].post_likes.remove(self.post)
+        self.fans[0].post_likes.add(self.post)
+        self.assertEqual(self._counts(), (2, 0))
+
+        self.fans[2].post_likes.clear()
+        self.assertEqual(self._counts(), (1, 0))
+        self.post.likes.clear()
+        self.assertEqual(self._counts(), (0, 0))
+
+    def test_like_model_is_mirrored(self):
+        like = Like.objects.create(post=self.post, user=self.fans[0])
+        self.assertTrue(self.post.likes.filter(pk=self.fans[0].pk).exists())
+        self.assertEqual(self._counts(), (1, 0))
+        like.delete()
+        self.assertEqual(self._counts(), (0, 0))
+
+    def test_comment_save_delete_and_active_toggle(self):
+        first = Comment.objects.create(post=self.post, author=self.fans[0], content='Nice')
+        Comment.objects.create(post=self.post, author=self.fans[1], content='Hidden', active=False)
+        self.assertEqual(self._counts(), (0, 1))
+
+        first.active = False
+        first.save()
+        self.assertEqual(self._counts(), (0, 0))
+
+        reloaded = Comment.objects.get(pk=first.pk)
+        reloaded.active = True
+        reloaded.save()
+        reloaded.content = 'Edited'
+        reloaded.save()
+        self.assertEqual(self._counts(), (0, 1))
+
+        reloaded.delete()
+        self.assertEqual(self._counts(), (0, 0))
+
+    def test_reconcile_fixes_drift(self):
+        self.post.likes.add(*self.fans)
+        Comment.objects.create(post=self.post, author=self.fans[0], content='One')
+        Post.objects.update(like_count=42, comment_count=42)
+
+        self.assertEqual(reconcile_post_counters(batch_size=1), 1)
+        self.assertEqual(self._counts(), (3, 1))
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('Reconciled counters for 1 posts', out.getvalue())
@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blog import export
+from blog.models import Post, Tag
+from comments.models import Comment
+
+
+def parse(lines):
+    return [json.loads(line) for line in ''.join(lines).splitlines()]
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.staff = User.objects.create_user(
+            username='analyst', password='testpass123', is_staff=True
+        )
+        self.tag = Tag.objects.create(name='Python')
+        self.posts = [
+            Post.objects.create(title=f'Export {i}', author=self.user, content=f'Body {i}',
+                                status='published' if i else 'draft')
+            for i in range(5)
+        ]
+        self.posts[2].tags.add(self.tag)
+        self.comment = Comment.objects.create(post=self.posts[1], author=self.user, content='Hi')
+
+    def test_export_lines(self):
+        rows = parse(export.export_lines(chunk_size=2))
+        posts = [row for row in rows if row['type'] == 'post']
+        # Every post, drafts too, in primary key order, across chunks
+        self.assertEqual([row['id'] for row in posts], [post.pk for post in self.posts])
+        self.assertEqual(posts[2]['tags'], [self.tag.pk])
+        self.assertEqual(posts[0]['tags'], [])
+        self.assertEqual(posts[0]['content'], 'Body 0')
+        self.assertEqual(posts[0]['author_id'], self.user.pk)
+        self.assertEqual(rows[-1]['type'], 'comment')
+        self.assertEqual(rows[-1]['id'], self.comment.pk)
+        # Full precision, so the next export can start where this one ended
+        self.assertEqual(
+            posts[0]['updated_date'],
+            Post.objects.get(pk=self.posts[0].pk).updated_date.isoformat(),
+        )
+
+    def test_since(self):
+        cutoff = timezone.now()
+        later = cutoff + timedelta(seconds=1)
+        Post.objects.filter(pk=self.posts[3].pk).update(updated_date=later)
+        rows = parse(export.export_lines(since=cutoff))
+        self.assertEqual([(row['type'], row['id']) for row in rows], [('post', self.posts[3].pk)])
+        # Counter updates leave updated_date alone, so they are not picked up
+        Post.objects.filter(pk=self.posts[4].pk).update(views=F('views') + 1)
+        self.assertEqual(len(parse(export.export_lines(since=later))), 0)
+
+        self.assertEqual(export.parse_since('2024-05-01').date().isoformat(), '2024-05-01')
+        with self.assertRaises(export.InvalidSince):
+            export.parse_since('yesterday')
+
+    def test_view_is_staff_only(self):
+        self.assertEqual(self.client.get('/export/').status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/export/').status_code, 403)
+
+    def test_view_streams_ndjson(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/export/?type=comments')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = parse(line.decode() for line in response.streaming_content)
+        self.assertEqual([row['id'] for row in rows], [self.comment.pk])
+
+        self.assertEqual(self.client.get('/export/?type=users').status_code, 400)
+        self.assertEqual(self.client.get('/export/?since=soon').status_code, 400)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    async def test_view_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get('/export/?type=posts')
+        self.assertEqual(response.status_code, 200)
+        # An async iterator, so Django doesn't list() the export first
+        self.assertTrue(response.is_async)
+        chunks = [chunk.decode() async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([row['id'] for row in parse(chunks)], [post.pk for post in self.posts])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_ndjson', type=['posts'], stdout=out, stderr=StringIO())
+        self.assertEqual(len(parse(out.getvalue())), 5)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'dump.ndjson')
+            err = StringIO()
+            call_command('export_ndjson', output=path, stdout=StringIO(), stderr=err)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(len(parse(f.read())), 6)
+            self.assertIn('Exported 6 rows', err.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('export_ndjson', since='nope', stdout=StringIO())
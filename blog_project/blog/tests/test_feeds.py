@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Category, Post, Tag
+
+
+class CachedFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='feeder', password='testpass123')
+        self.category = Category.objects.create(name='Feeds')
+        self.tag = Tag.objects.create(name='syndication')
+        self.post = Post.objects.create(
+            title='Fed post', author=self.user, content='Body', excerpt='Fed excerpt',
+            status='published', category=self.category,
+        )
+        self.post.tags.add(self.tag)
+        Post.objects.create(
+            title='Other post', author=self.user, content='Body', status='published'
+        )
+
+    def test_feed_has_validators(self):
+        response = self.client.get(reverse('post_feed'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Fed post')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_unchanged_poll_is_304_without_queries(self):
+        etag = self.client.get(reverse('post_feed'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('post_feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_repeat_poll_served_from_cache(self):
+        self.client.get(reverse('post_feed'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('post_feed'))
+        self.assertContains(response, 'Fed post')
+
+    def test_post_change_invalidates_feed(self):
+        etag = self.client.get(reverse('post_feed'))['ETag']
+        self.post.title = 'Renamed fed post'
+        self.post.save()
+        response = self.client.get(reverse('post_feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed fed post')
+
+    def test_category_and_tag_feeds(self):
+        for url in (
+            reverse('category_feed', args=[self.category.slug]),
+            reverse('tag_feed', args=[self.tag.slug]),
+        ):
+            response = self.client.get(url)
+            self.assertContains(response, 'Fed post')
+            self.assertNotContains(response, 'Other post')
+
+    def test_unknown_category_feed_is_404(self):
+        response = self.client.get(reverse('category_feed', args=['missing']))
+        self.assertEqual(response.status_code, 404)
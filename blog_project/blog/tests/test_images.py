@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from blog.models import Post
+
+
+def image_upload(name='photo.jpg', size=(2000, 1000), color='red', format='JPEG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        media_override = override_settings(MEDIA_ROOT=self.media)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.user = User.objects.create_user(username='photographer', password='testpass123')
+
+    def create_post(self, upload, title='Photo post'):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                title=title, author=self.user, content='Body', status='published', image=upload
+            )
+        post.refresh_from_db()
+        return post
+
+    def test_variants_are_generated_after_upload(self):
+        post = self.create_post(image_upload())
+        self.assertEqual((post.image_width, post.image_height), (2000, 1000))
+        self.assertEqual(len(post.image_hash), 64)
+        self.assertEqual(
+            {name: (v['width'], v['height']) for name, v in post.image_variants.items()},
+            {'thumb': (320, 160), 'card': (720, 360), 'full': (1600, 800)},
+        )
+        for variant in post.image_variants.values():
+            for key in ('src', 'webp'):
+                self.assertTrue(os.path.exists(os.path.join(self.media, variant[key])))
+        with Image.open(os.path.join(self.media, post.image_variants['card']['webp'])) as webp:
+            self.assertEqual(webp.format, 'WEBP')
+
+    def test_small_images_are_not_upscaled(self):
+        post = self.create_post(image_upload(size=(400, 300)))
+        self.assertEqual(post.image_variants['full']['width'], 400)
+        self.assertEqual(post.image_variants['thumb']['width'], 320)
+
+    def test_identical_uploads_are_deduplicated(self):
+        first = self.create_post(image_upload('a.jpg'))
+        second = self.create_post(image_upload('b.jpg'), title='Same photo')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(second.image_variants, first.image_variants)
+        self.assertEqual(os.listdir(os.path.join(self.media, 'blog_images')).count('b.jpg'), 0)
+
+    def test_template_tag_emits_srcset(self):
+        post = self.create_post(image_upload())
+        html = Template("{% load blog_images %}{% post_image post 'card' class='card-img-top' %}").render(
+            Context({'post': post})
+        )
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('320w', html)
+        self.assertIn('1600w', html)
+        self.assertIn('width="720" height="360"', html)
+        self.assertIn('class="card-img-top"', html)
+
+    def test_template_tag_falls_back_to_original(self):
+        post = Post(title='Unprocessed', image='blog_images/raw.jpg', image_width=10, image_height=5)
+        html = Template("{% load blog_images %}{% post_image post %}").render(Context({'post': post}))
+        self.assertIn('raw.jpg', html)
+        self.assertIn('width="10" height="5"', html)
+
+    def test_deferred_image_does_not_add_queries(self):
+        self.create_post(image_upload())
+        with self.assertNumQueries(1):
+            list(Post.objects.only('title'))
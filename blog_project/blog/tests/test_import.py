@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from blog import search
+from blog.cache import FEED_STAMP_KEY
+from blog.models import Post, Category, RelatedPost, Tag
+from blog.search import search_posts
+
+
+class ImportPostsCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='importer',
+            password='testpass123'
+        )
+        Tag.objects.create(name='Python')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def _run(self, *args, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', *args, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_jsonl_import(self):
+        records = [
+            {'title': f'Imported post {i}', 'content': 'Body about django ' * 30,
+             'author': 'importer', 'status': 'published', 'category': 'Web Dev',
+             'tags': ['Python', 'Django'], 'publish_date': '2025-05-01T10:00:00'}
+            for i in range(7)
+        ]
+        records.append({'title': 'No author', 'content': 'x', 'author': 'ghost'})
+        path = self._write('posts.jsonl', '\n'.join(json.dumps(r) for r in records) + '\nnot json\n')
+
+        cache.set(FEED_STAMP_KEY, 0, None)
+        out, err = self._run(path, batch_size=3)
+
+        self.assertIn('Imported 7 posts (2 skipped)', out)
+        self.assertIn('posts/sec', out)
+        self.assertIn("unknown author 'ghost'", err)
+
+        posts = Post.objects.filter(title__startswith='Imported post')
+        self.assertEqual(posts.count(), 7)
+        self.assertEqual(Category.objects.filter(slug='web-dev').count(), 1)
+        self.assertEqual(Tag.objects.count(), 2)
+        post = posts.first()
+        self.assertEqual(post.category.name, 'Web Dev')
+        self.assertEqual(sorted(post.tags.values_list('slug', flat=True)), ['django', 'python'])
+        self.assertTrue(post.excerpt.endswith('...'))
+        self.assertEqual(len(set(posts.values_list('slug', flat=True))), 7)
+        # bulk-created posts are searchable
+        self.assertEqual(search_posts('imported').count(), 7)
+        # and the feeds' validators change
+        self.assertGreater(cache.get(FEED_STAMP_KEY), 0)
+
+    def test_csv_import_with_default_author(self):
+        path = self._write('posts.csv', (
+            'title,content,tags,featured,slug\n'
+            'First CSV post,Some content,"Python, Testing",yes,same\n'
+            'Second CSV post,More content,,no,same\n'
+        ))
+        out, _ = self._run(path, default_author='importer', status='published')
+
+        self.assertIn('Imported 2 posts (0 skipped)', out)
+        first = Post.objects.get(title='First CSV post')
+        second = Post.objects.get(title='Second CSV post')
+        self.assertTrue(first.featured)
+        self.assertEqual(first.status, 'published')
+        self.assertEqual((first.slug, second.slug), ('same', 'same-1'))
+        self.assertEqual(sorted(first.tags.values_list('name', flat=True)), ['Python', 'Testing'])
+
+    def test_values_of_the_wrong_type_are_skipped(self):
+        records = [
+            {'title': 42, 'content': 'Body', 'author': 'importer'},
+            {'title': 'Numeric category', 'content': 'Body', 'author': 'importer', 'category': 7},
+            {'title': 'Tag objects', 'content': 'Body', 'author': 'importer', 'tags': [{'name': 'x'}]},
+            {'title': 'Fine', 'content': 'Body', 'author': 'importer', 'tags': ['Python']},
+        ]
+        path = self._write('posts.jsonl', '\n'.join(json.dumps(r) for r in records))
+        out, err = self._run(path)
+
+        self.assertIn('Imported 1 posts (3 skipped)', out)
+        self.assertIn("'<untitled>': title must be a string", err)
+        self.assertIn("'Numeric category': category must be a string", err)
+        self.assertIn("'Tag objects': tags must be a list of strings", err)
+
+    def test_committed_batches_are_published_when_a_later_one_fails(self):
+        records = [
+            {'title': f'Batch post {i}', 'content': 'Body about django', 'author': 'importer',
+             'status': 'published', 'tags': ['Python']}
+            for i in range(4)
+        ]
+        path = self._write('posts.jsonl', '\n'.join(json.dumps(r) for r in records))
+        cache.set(FEED_STAMP_KEY, 0, None)
+        index_posts = search.index_posts
+        batches = []
+
+        def fail_second_batch(posts):
+            batches.append(posts)
+            if len(batches) > 1:
+                raise RuntimeError('disk full')
+            return index_posts(posts)
+
+        with mock.patch.object(search, 'index_posts', side_effect=fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                self._run(path, batch_size=2)
+
+        self.assertEqual(Post.objects.filter(title__startswith='Batch post').count(), 2)
+        self.assertGreater(cache.get(FEED_STAMP_KEY), 0)
+        self.assertTrue(RelatedPost.objects.exists())
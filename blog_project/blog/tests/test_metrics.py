@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import ResolverMatch, reverse
+
+from blog import metrics
+from blog.models import Post
+
+
+class QueryMetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        self.user = User.objects.create_user(username='metered', password='testpass123')
+        self.post = Post.objects.create(
+            title='Metered post', author=self.user, content='Body', status='published'
+        )
+
+    def run_view(self, view_func, name='test_view'):
+        request = RequestFactory().get('/')
+        request.resolver_match = ResolverMatch(view_func, (), {}, url_name=name)
+        return metrics.QueryMetricsMiddleware(lambda r: view_func(r))(request)
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(
+            metrics.fingerprint('SELECT 1 WHERE id IN (%s, %s, %s) AND x IN (%s)'),
+            'SELECT 1 WHERE id IN (...) AND x IN (...)',
+        )
+
+    def test_request_queries_are_aggregated_per_view(self):
+        def view(request):
+            Post.objects.count()
+            list(Post.objects.all())
+            return HttpResponse()
+
+        self.run_view(view)
+        histogram = metrics.registry.queries['test_view']
+        self.assertEqual(histogram.total, 2)
+        self.assertEqual(sum(histogram.counts), 1)
+        self.assertGreater(metrics.registry.db_seconds['test_view'].total, 0)
+
+    def test_repeated_query_is_flagged_as_n_plus_one(self):
+        def view(request):
+            for post in Post.objects.all():
+                for _ in range(metrics.n_plus_one_threshold()):
+                    User.objects.filter(pk=post.author_id).first()
+            return HttpResponse()
+
+        with self.assertLogs('blog.metrics', 'WARNING') as logs:
+            self.run_view(view)
+        self.assertIn('Possible N+1 in test_view', logs.output[0])
+        self.assertEqual(metrics.registry.n_plus_one['test_view'], 1)
+
+    def test_queries_outside_requests_are_not_recorded(self):
+        Post.objects.count()
+        self.assertEqual(dict(metrics.registry.queries), {})
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.get(reverse('post_detail', args=[self.post.slug]))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE blog_view_queries histogram', body)
+        self.assertIn('blog_view_queries_count{view="post_detail"} 1', body)
+        self.assertIn('blog_view_db_seconds_bucket{view="post_detail",le="+Inf"} 1', body)
+        self.assertNotIn('view="metrics"', body)
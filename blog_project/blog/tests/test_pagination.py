@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+from blog.pagination import KeysetPaginator, decode_cursor
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pager',
+            password='testpass123'
+        )
+        now = timezone.now()
+        self.posts = []
+        for i in range(25):
+            self.posts.append(Post.objects.create(
+                title=f'Paged post {i}',
+                author=self.user,
+                content='x' * 60,
+                status='published',
+                # Pairs share a publish_date so the id tie-breaker matters
+                publish_date=now - timedelta(hours=i // 2),
+            ))
+        self.expected = [p.pk for p in Post.objects.filter(status='published').order_by('-publish_date', '-id')]
+
+    def _walk_forward(self, per_page):
+        paginator = KeysetPaginator(Post.objects.filter(status='published'), per_page=per_page)
+        seen, cursor, pages = [], None, []
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append(page)
+            seen.extend(p.pk for p in page)
+            if not page.has_next():
+                return seen, pages
+            cursor = page.next_cursor
+
+    def test_forward_walk_visits_every_post_once(self):
+        seen, pages = self._walk_forward(per_page=10)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+        self.assertFalse(pages[0].has_previous())
+
+    def test_previous_cursor_returns_previous_page(self):
+        paginator = KeysetPaginator(Post.objects.filter(status='published'), per_page=10)
+        _, pages = self._walk_forward(per_page=10)
+        back = paginator.get_page(pages[2].previous_cursor)
+        self.assertEqual([p.pk for p in back], [p.pk for p in pages[1]])
+        first = paginator.get_page(back.previous_cursor)
+        self.assertEqual([p.pk for p in first], self.expected[:10])
+        self.assertFalse(first.has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(Post.objects.filter(status='published'), per_page=10)
+        page = paginator.get_page('not-a-cursor')
+        self.assertEqual([p.pk for p in page], self.expected[:10])
+
+    def test_cursor_keeps_microseconds(self):
+        paginator = KeysetPaginator(Post.objects.filter(status='published'), per_page=10)
+        values, direction = decode_cursor(paginator.get_page().next_cursor)
+        self.assertEqual(direction, 'next')
+        self.assertEqual(len(values[0]), len(self.posts[0].publish_date.isoformat()))
+
+    def test_deep_page_does_not_count_or_offset(self):
+        """Every page is one query with no COUNT(*) and no OFFSET"""
+        _, pages = self._walk_forward(per_page=5)
+        paginator = KeysetPaginator(Post.objects.filter(status='published'), per_page=5)
+        with CaptureQueriesContext(connection) as ctx:
+            paginator.get_page(pages[-2].next_cursor)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        sql = ctx.captured_queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_post_list_view_uses_cursor(self):
+        response = self.client.get(reverse('post_list'))
+        self.assertEqual(response.status_code, 200)
+        next_cursor = response.context['posts'].next_cursor
+        self.assertContains(response, f'cursor={next_cursor}')
+
+        response = self.client.get(reverse('post_list'), {'cursor': next_cursor})
+        self.assertEqual([p.pk for p in response.context['posts']], self.expected[10:20])
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Post
+from blog.ratelimit import Policy, check_cache_backend, parse_rate
+
+
+class RateParsingTests(TestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('5/m'), (5, 60))
+        self.assertEqual(parse_rate('100/h'), (100, 3600))
+        self.assertEqual(parse_rate('10/5m'), (10, 300))
+        with self.assertRaises(ValueError):
+            parse_rate('often')
+
+
+class CacheBackendCheckTests(TestCase):
+    def test_non_atomic_cache_refused(self):
+        self.assertEqual(check_cache_backend(), [])
+        database_cache = {'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'x',
+        }}
+        with override_settings(CACHES=database_cache, RATELIMIT_ENABLED=True):
+            self.assertEqual([error.id for error in check_cache_backend()], ['blog.E001'])
+        with override_settings(CACHES=database_cache, RATELIMIT_ENABLED=False):
+            self.assertEqual(check_cache_backend(), [])
+
+
+class SlidingWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, ip='10.0.0.1', user=None):
+        request = self.factory.post('/', REMOTE_ADDR=ip)
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_limit_within_one_window(self):
+        policy = Policy('test', 'ip', '3/m')
+        now = 6000.0
+        results = [policy.hit(self.request(), now=now) for _ in range(4)]
+        self.assertEqual(results[:3], [0, 0, 0])
+        self.assertEqual(results[3], 60)
+
+    def test_previous_window_still_counts(self):
+        policy = Policy('test', 'ip', '3/m')
+        for _ in range(3):
+            policy.hit(self.request(), now=6059.0)
+        # One second into the next window almost all of the old hits overlap
+        self.assertGreater(policy.hit(self.request(), now=6061.0), 0)
+        # Most of the previous window has slid out by the end of the window
+        self.assertEqual(policy.hit(self.request(), now=6115.0), 0)
+
+    def test_keys_are_separate(self):
+        policy = Policy('test', 'user', '1/m')
+        alice = User.objects.create_user(username='alice', password='x')
+        bob = User.objects.create_user(username='bob', password='x')
+        self.assertEqual(policy.hit(self.request(user=alice), now=6000.0), 0)
+        self.assertEqual(policy.hit(self.request(user=bob), now=6000.0), 0)
+        self.assertGreater(policy.hit(self.request(user=alice), now=6000.0), 0)
+        # Anonymous visitors are limited per IP
+        self.assertEqual(policy.hit(self.request(ip='10.0.0.2'), now=6000.0), 0)
+        self.assertGreater(policy.hit(self.request(ip='10.0.0.2'), now=6000.0), 0)
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMITS={'add_comment': [('user', '2/m')]})
+class RateLimitMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='limited', password='testpass123')
+        self.post = Post.objects.create(
+            title='Limited post', author=self.user, content='Body', status='published'
+        )
+        self.client.login(username='limited', password='testpass123')
+        self.url = reverse('add_comment', args=[self.post.slug])
+
+    def test_over_limit_gets_429_with_retry_after(self):
+        for i in range(2):
+            response = self.client.post(self.url, {'content': f'Comment {i}'})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(self.url, {'content': 'One too many'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_unlisted_views_and_methods_are_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('post_list')).status_code, 200)
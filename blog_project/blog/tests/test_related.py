@@ -0,0 +1,130 @@
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog import related, tasks
+from blog.models import Category, Post, PostTerm, RelatedPost, RelatedVocabulary, Tag
+
+
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='relater', password='testpass123')
+        self.python = Category.objects.create(name='Python')
+        self.cooking = Category.objects.create(name='Cooking')
+        self.django_tag = Tag.objects.create(name='django')
+        self.recipe_tag = Tag.objects.create(name='recipes')
+
+        self.orm = self.post('Django ORM performance tips', self.python, self.django_tag)
+        self.queries = self.post('Optimizing Django ORM queries', self.python, self.django_tag)
+        self.views = self.post('Django views explained', self.python)
+        self.soup = self.post('Tomato soup recipe', self.cooking, self.recipe_tag)
+        self.bread = self.post('Simple bread recipe', self.cooking, self.recipe_tag)
+        related.rebuild_all()
+
+    def post(self, title, category, tag=None):
+        post = Post.objects.create(
+            title=title, author=self.user, content=title, excerpt=title,
+            status='published', category=category,
+        )
+        if tag:
+            post.tags.add(tag)
+        return post
+
+    def neighbours(self, post):
+        return list(
+            RelatedPost.objects.filter(post=post).order_by('rank').values_list('related_id', flat=True)
+        )
+
+    def test_most_similar_post_ranks_first(self):
+        self.assertEqual(self.neighbours(self.orm)[0], self.queries.pk)
+        self.assertEqual(self.neighbours(self.soup)[0], self.bread.pk)
+        self.assertNotIn(self.soup.pk, self.neighbours(self.orm))
+
+    def test_saving_a_post_refreshes_affected_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            new = self.post('Bread and tomato soup recipe', self.cooking, self.recipe_tag)
+        self.assertIn(new.pk, self.neighbours(self.soup))
+        self.assertIn(self.soup.pk, self.neighbours(new))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new.status = 'draft'
+            new.save()
+        self.assertEqual(self.neighbours(new), [])
+        self.assertNotIn(new.pk, self.neighbours(self.soup))
+
+    def test_deleting_a_post_refills_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bread.delete()
+        self.assertNotIn(self.bread.pk, self.neighbours(self.soup))
+
+    def test_post_detail_uses_precomputed_list(self):
+        response = self.client.get(reverse('post_detail', args=[self.orm.slug]))
+        self.assertEqual(list(response.context['related_posts'])[0], self.queries)
+        self.assertContains(response, 'Optimizing Django ORM queries')
+
+    def test_stored_vocabulary_transforms_like_the_fit(self):
+        documents = ['Django ORM tips', 'Tomato soup and bread', 'the django soup']
+        terms, idf, fitted = related.fit_text(documents)
+        columns = {term: i for i, term in enumerate(terms)}
+        transformed = related.transform_text(columns, idf, documents)
+        np.testing.assert_allclose(transformed.toarray(), fitted.toarray())
+
+    def test_refresh_transforms_only_the_changed_post(self):
+        self.assertEqual(PostTerm.objects.values('post').distinct().count(), 5)
+        with mock.patch.object(related, 'fit_text') as fit, \
+                mock.patch.object(related, 'transform_text', wraps=related.transform_text) as transform, \
+                self.captureOnCommitCallbacks(execute=True):
+            new = self.post('Tomato bread recipe', self.cooking)
+        fit.assert_not_called()
+        self.assertEqual([len(call.args[2]) for call in transform.call_args_list], [1])
+        self.assertEqual(PostTerm.objects.values('post').distinct().count(), 6)
+        self.assertIn(new.pk, self.neighbours(self.soup))
+
+    def test_refresh_loads_only_candidates(self):
+        for i in range(20):
+            self.post(f'Tomato soup recipe {i}', self.cooking, self.recipe_tag)
+        related.rebuild_all()
+        with mock.patch.object(related, 'CANDIDATES', 3), \
+                mock.patch.object(related, 'load_corpus') as load_corpus, \
+                mock.patch.object(related, '_features', wraps=related._features) as features, \
+                self.captureOnCommitCallbacks(execute=True):
+            new = self.post('Tomato soup and bread recipe', self.cooking, self.recipe_tag)
+        load_corpus.assert_not_called()
+        # The changed post, then at most 3 candidates per signal for each list scored
+        self.assertEqual(list(features.call_args_list[0].args[1]), [new.pk])
+        self.assertLessEqual(max(len(call.args[1]) for call in features.call_args_list[1:]), 9)
+        self.assertIn(self.soup.pk, self.neighbours(new))
+
+    @override_settings(BACKGROUND_TASKS_EAGER=False)
+    def test_saves_share_one_background_refresh(self):
+        with mock.patch.object(tasks, 'submit') as submit, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.soup.title = 'Tomato bread soup'
+            self.soup.save()
+            self.bread.tags.remove(self.recipe_tag)
+        submit.assert_called_once_with(related._flush_pending)
+
+        with mock.patch.object(related, 'refresh_posts') as refresh:
+            related._flush_pending()
+        refresh.assert_called_once_with({self.soup.pk, self.bread.pk})
+
+    def test_rebuild_without_published_posts_clears_the_table(self):
+        Post.objects.update(status='draft')
+        self.assertEqual(related.rebuild_all(), 0)
+        self.assertFalse(RelatedPost.objects.exists())
+        self.assertFalse(RelatedVocabulary.objects.exists())
+
+    def test_refresh_refits_once_the_blog_doubled(self):
+        first = RelatedVocabulary.objects.get()
+        self.assertEqual(first.documents, 5)
+        for i in range(4):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post(f'Pasta recipe {i}', self.cooking)
+        self.assertEqual(RelatedVocabulary.objects.get(), first)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post('Pasta recipe 4', self.cooking)
+        self.assertEqual(RelatedVocabulary.objects.get().documents, 10)
+        self.assertIn('pasta', RelatedVocabulary.objects.get().terms.split())
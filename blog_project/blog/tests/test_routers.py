@@ -0,0 +1,95 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from blog import routers
+from blog.cache import _may_store_page, bump_content_version
+from blog.middleware import PrimaryPinMiddleware
+from blog.models import Post
+from comments.models import Comment
+
+router = routers.ReplicaRouter()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def in_request(self, pinned=False):
+        state, token = routers.start_request(pinned)
+        self.addCleanup(routers.end_request, token)
+        return state
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_request_reads_use_replica(self):
+        self.in_request()
+        self.assertEqual(router.db_for_read(Post), 'replica')
+        self.assertEqual(router.db_for_read(Comment), 'replica')
+        # Auth and sessions are not routed
+        self.assertIsNone(router.db_for_read(User))
+
+    def test_write_pins_rest_of_request(self):
+        state = self.in_request()
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertTrue(state.wrote)
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_pinned_request_uses_primary(self):
+        self.in_request(pinned=True)
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        self.in_request()
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate('replica', 'blog'))
+        self.assertIsNone(router.allow_migrate('default', 'blog'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_PIN_SECONDS=7)
+class PrimaryPinMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = []
+
+    def view(self, write=False):
+        def get_response(request):
+            if write:
+                router.db_for_write(Post)
+            self.seen.append(router.db_for_read(Post))
+            return HttpResponse()
+        return PrimaryPinMiddleware(get_response)
+
+    def test_read_only_get_uses_replica_without_cookie(self):
+        response = self.view()(self.factory.get('/'))
+        self.assertEqual(self.seen, ['replica'])
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_write_sets_short_lived_cookie(self):
+        response = self.view(write=True)(self.factory.post('/'))
+        self.assertEqual(self.seen, ['default'])
+        self.assertEqual(response.cookies[routers.PIN_COOKIE]['max-age'], 7)
+
+    def test_cookie_pins_following_requests(self):
+        request = self.factory.get('/')
+        request.COOKIES[routers.PIN_COOKIE] = '1'
+        self.view()(request)
+        self.assertEqual(self.seen, ['default'])
+
+    def test_unsafe_methods_start_pinned(self):
+        self.view()(self.factory.post('/'))
+        self.assertEqual(self.seen, ['default'])
+
+    def test_state_does_not_leak_past_the_request(self):
+        self.view(write=True)(self.factory.post('/'))
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertIsNone(routers._state.get())
+
+    def test_pages_are_not_cached_while_replicas_may_lag(self):
+        cache.clear()
+        self.assertTrue(_may_store_page(HttpResponse()))
+        bump_content_version()
+        self.assertFalse(_may_store_page(HttpResponse()))
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Post, Category
+from blog.search import SearchResults, build_match_expression, search_posts
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='searcher',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Databases')
+        self.title_hit = Post.objects.create(
+            title='Tuning SQLite for writes',
+            author=self.user,
+            content='Notes about journaling modes and checkpoints.',
+            status='published',
+            category=self.category,
+        )
+        self.body_hit = Post.objects.create(
+            title='Weekend notes',
+            author=self.user,
+            content='<p>I spent the weekend reading about sqlite internals.</p>',
+            status='published',
+        )
+        self.draft = Post.objects.create(
+            title='SQLite draft',
+            author=self.user,
+            content='Not ready yet.',
+            status='draft',
+        )
+
+    def test_match_expression_is_sanitized(self):
+        """User input is reduced to quoted words with a trailing prefix"""
+        self.assertEqual(build_match_expression('sql" OR -x'), '"sql" "OR" "x"*')
+        self.assertEqual(build_match_expression('  ()  '), '')
+
+    def test_ranked_results(self):
+        """Title matches rank above body matches and drafts are excluded"""
+        results = search_posts('sqlite')
+        self.assertIsInstance(results, SearchResults)
+        self.assertEqual(results.count(), 2)
+        self.assertEqual([p.pk for p in results[0:10]], [self.title_hit.pk, self.body_hit.pk])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        """Snippets wrap matches in <mark> and do not leak post HTML"""
+        post = search_posts('internals')[0]
+        self.assertEqual(post, self.body_hit)
+        self.assertIn('<mark>internals</mark>', post.search_snippet)
+        self.assertNotIn('<p>', post.search_snippet)
+
+    def test_category_filter(self):
+        results = search_posts('sqlite', category=self.category)
+        self.assertEqual([p.pk for p in results[0:10]], [self.title_hit.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.draft.status = 'published'
+        self.draft.save()
+        self.assertEqual(search_posts('sqlite').count(), 3)
+
+        self.title_hit.title = 'Tuning Postgres for writes'
+        self.title_hit.content = 'Nothing else here.'
+        self.title_hit.save()
+        self.body_hit.delete()
+        self.assertEqual([p.pk for p in search_posts('sqlite')[0:10]], [self.draft.pk])
+
+    def test_rebuild_command(self):
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM blog_post_fts')
+        self.assertEqual(search_posts('sqlite').count(), 0)
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search_posts('sqlite').count(), 2)
+
+    def test_search_view(self):
+        response = self.client.get(reverse('search'), {'q': 'journaling'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Tuning SQLite for writes')
+        self.assertContains(response, '<mark>journaling</mark>')
@@ -0,0 +1,82 @@
+import random
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from accounts.models import Profile
+from blog import seed
+from blog.cache import FEED_STAMP_KEY
+from blog.counters import reconcile_post_counters
+from blog.models import Post
+from comments.models import MAX_DEPTH, PATH_STEP, Comment
+
+
+def quiet(message):
+    pass
+
+
+class SeedTests(TestCase):
+    def test_rows_are_consistent(self):
+        counts = seed.seed_blog(posts=60, users=15, tags=20, seed=3, batch_size=25, log=quiet)
+        self.assertEqual(counts['posts'], Post.objects.count())
+        self.assertEqual(counts['comments'], Comment.objects.count())
+        self.assertEqual(counts['likes'], Post.likes.through.objects.count())
+        # Profiles were made in bulk for every user, without the signal
+        self.assertEqual(Profile.objects.count(), User.objects.count())
+
+        # Comment paths and depths are what Comment.save would have written
+        comments = {c.pk: c for c in Comment.objects.all()}
+        self.assertTrue(any(c.parent_id for c in comments.values()))
+        for comment in comments.values():
+            self.assertLess(comment.depth, MAX_DEPTH)
+            self.assertEqual(comment.depth, len(comment.path) // PATH_STEP - 1)
+            prefix = comments[comment.parent_id].path if comment.parent_id else ''
+            self.assertEqual(comment.path, f'{prefix}{comment.pk:0{PATH_STEP}d}')
+            self.assertGreaterEqual(comment.created_date, comment.post.publish_date)
+
+        # The denormalized counters match the generated rows
+        before = list(Post.objects.order_by('pk').values_list('like_count', 'comment_count'))
+        reconcile_post_counters()
+        after = list(Post.objects.order_by('pk').values_list('like_count', 'comment_count'))
+        self.assertEqual(before, after)
+
+    def test_same_seed_same_data(self):
+        def snapshot(posts):
+            return [
+                (p.title, p.content, p.views, p.like_count, p.comment_count, p.status)
+                for p in posts.order_by('pk')
+            ]
+
+        seed.seed_blog(posts=30, users=10, seed=11, log=quiet)
+        first = snapshot(Post.objects.all())
+        last_pk = Post.objects.order_by('-pk').values_list('pk', flat=True).first()
+        seed.seed_blog(posts=30, users=10, seed=11, log=quiet)
+        self.assertEqual(snapshot(Post.objects.filter(pk__gt=last_pk)), first)
+
+        seed.seed_blog(posts=30, users=10, seed=12, log=quiet)
+        self.assertNotEqual(snapshot(Post.objects.filter(pk__gt=last_pk + 30)), first)
+
+    def test_zipf_is_skewed(self):
+        rng = random.Random(0)
+        draws = sorted(seed.zipf(rng, 2.0, 10 ** 6) for _ in range(10000))
+        self.assertEqual(draws[0], 1)
+        self.assertLessEqual(draws[len(draws) // 2], 3)
+        self.assertGreater(draws[-1], 1000)
+
+
+class SeedBlogCommandTests(TestCase):
+    def test_command(self):
+        cache.set(FEED_STAMP_KEY, 0, None)
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as sitemap_root, \
+                override_settings(SITEMAP_ROOT=sitemap_root):
+            call_command('seed_blog', posts=20, skip_related=True, stdout=out)
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertIn('Seeded', out.getvalue())
+        self.assertIn('20 posts', out.getvalue())
+        # bulk inserts send no post_save; the feeds are marked changed here
+        self.assertGreater(cache.get(FEED_STAMP_KEY), 0)
@@ -0,0 +1,135 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from blog import sitemaps, tasks
+from blog.models import Post
+
+
+class ShardedSitemapTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(SITEMAP_ROOT=self.root, SITEMAP_SHARD_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='mapper', password='testpass123')
+        self.posts = [
+            Post.objects.create(
+                title=f'Mapped post {i}', author=self.user, content='Body', status='published'
+            )
+            for i in range(5)
+        ]
+        self.draft = Post.objects.create(
+            title='Hidden draft', author=self.user, content='Body', status='draft'
+        )
+
+    def read(self, path):
+        with gzip.open(path, 'rt') as f:
+            return f.read()
+
+    def test_build_all_writes_one_file_per_shard(self):
+        sitemaps.build_all()
+        shards = {sitemaps.shard_for(post.pk) for post in self.posts}
+        self.assertEqual(set(sitemaps.existing_shards()), shards)
+
+        index = self.read(sitemaps.index_path())
+        for shard in shards:
+            self.assertIn(reverse('sitemap_shard', args=[shard]), index)
+
+        urls = ''.join(self.read(sitemaps.shard_path(shard)) for shard in shards)
+        for post in self.posts:
+            self.assertIn(reverse('post_detail', args=[post.slug]), urls)
+        self.assertNotIn(self.draft.slug, urls)
+        self.assertFalse([name for name in os.listdir(self.root) if name.endswith('.tmp')])
+
+    def test_only_touched_shards_are_rebuilt(self):
+        sitemaps.build_all()
+        post = self.posts[0]
+        post.title = 'Renamed'
+        post.save()
+        deleted_pk = self.posts[-1].pk
+        self.posts[-1].delete()
+
+        rebuilt = sitemaps.rebuild_dirty()
+        self.assertEqual(
+            rebuilt, sorted({sitemaps.shard_for(post.pk), sitemaps.shard_for(deleted_pk)})
+        )
+        self.assertEqual(sitemaps.rebuild_dirty(), [])
+
+    def test_view_count_updates_do_not_dirty_shards(self):
+        sitemaps.build_all()
+        self.posts[0].views = 10
+        self.posts[0].save(update_fields=['views'])
+        self.assertEqual(sitemaps.rebuild_dirty(), [])
+
+    def test_publishing_a_draft_adds_it(self):
+        sitemaps.build_all()
+        self.draft.status = 'published'
+        self.draft.save()
+        sitemaps.rebuild_dirty()
+        shard = self.read(sitemaps.shard_path(sitemaps.shard_for(self.draft.pk)))
+        self.assertIn(self.draft.slug, shard)
+
+    def test_index_served_gzipped_with_last_modified(self):
+        response = self.client.get(reverse('sitemap'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Last-Modified', response)
+        self.assertIn(b'<sitemapindex', gzip.decompress(response.content))
+
+        mtime = os.stat(sitemaps.index_path()).st_mtime
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse('sitemap'), HTTP_IF_MODIFIED_SINCE=http_date(mtime)
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_shard_served_plain_without_gzip_support(self):
+        shard = sitemaps.shard_for(self.posts[0].pk)
+        response = self.client.get(reverse('sitemap_shard', args=[shard]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertContains(response, self.posts[0].slug)
+
+    def test_missing_shard_is_404(self):
+        response = self.client.get(reverse('sitemap_shard', args=[9999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_first_build_runs_in_the_background(self):
+        self.addCleanup(cache.delete, sitemaps.BUILD_LOCK_KEY)
+        with mock.patch.object(tasks, 'submit') as submit:
+            response = self.client.get(reverse('sitemap'))
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '60')
+            response = self.client.get(reverse('sitemap_shard', args=[0]))
+            self.assertEqual(response.status_code, 503)
+        submit.assert_called_once_with(sitemaps._build_and_unlock)
+
+        sitemaps._build_and_unlock()
+        self.assertEqual(self.client.get(reverse('sitemap')).status_code, 200)
+
+    def test_dirty_shards_rebuilt_in_the_background(self):
+        self.addCleanup(cache.delete, sitemaps.BUILD_LOCK_KEY)
+        sitemaps.build_all()
+        post = self.posts[0]
+        post.status = 'draft'
+        post.save()
+        with mock.patch.object(tasks, 'submit') as submit:
+            response = self.client.get(reverse('sitemap_shard', args=[sitemaps.shard_for(post.pk)]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, post.slug)
+        submit.assert_called_once_with(sitemaps._build_and_unlock)
+
+        sitemaps._build_and_unlock()
+        response = self.client.get(reverse('sitemap_shard', args=[sitemaps.shard_for(post.pk)]))
+        self.assertNotContains(response, post.slug, status_code=response.status_code)
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from blog.models import Post
+from blog.slugs import allocate_slugs, first_free_slug
+
+
+class SlugAllocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='slugger',
+            password='testpass123'
+        )
+        self.now = timezone.now()
+
+    def _post(self, slug='', **kwargs):
+        return Post(
+            title=kwargs.pop('title', 'Same title'),
+            slug=slug,
+            author=self.user,
+            content='Content',
+            publish_date=kwargs.pop('publish_date', self.now),
+            **kwargs
+        )
+
+    def test_first_free_slug(self):
+        self.assertEqual(first_free_slug('a', set()), 'a')
+        self.assertEqual(first_free_slug('a', {'a', 'a-1', 'a-3'}), 'a-2')
+
+    def test_collisions_resolved_in_one_query(self):
+        for _ in range(5):
+            self._post(slug='busy').save()
+        post = self._post(slug='busy')
+        # one slug lookup + the INSERT
+        with self.assertNumQueries(2):
+            post.save()
+        self.assertEqual(post.slug, 'busy-5')
+
+    def test_same_slug_allowed_on_another_day(self):
+        self._post(slug='daily').save()
+        post = self._post(slug='daily', publish_date=self.now - timedelta(days=2))
+        post.save()
+        self.assertEqual(post.slug, 'daily')
+
+    def test_resave_keeps_slug(self):
+        post = self._post(slug='stable')
+        post.save()
+        post.title = 'Changed'
+        post.save()
+        self.assertEqual(post.slug, 'stable')
+
+    def test_generated_slug_fits_field(self):
+        post = self._post(title='word ' * 40)
+        post.save()
+        self.assertLessEqual(len(post.slug), 50)
+        self.assertTrue(post.slug.startswith('word-word'))
+
+    def test_bulk_allocation(self):
+        self._post(slug='bulk').save()
+        posts = [self._post(slug='bulk') for _ in range(3)]
+        posts.append(self._post(slug='bulk', publish_date=self.now - timedelta(days=1)))
+        posts.append(self._post(title='Fresh'))
+        with self.assertNumQueries(1):
+            allocate_slugs(posts)
+        self.assertEqual([p.slug for p in posts[:4]], ['bulk-1', 'bulk-2', 'bulk-3', 'bulk'])
+        self.assertTrue(posts[4].slug.startswith('fresh-'))
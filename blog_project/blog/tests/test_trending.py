@@ -0,0 +1,79 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from blog import tasks, trending
+from blog.context_processors import trending_posts_processor
+from blog.models import Post
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='trender', password='testpass123')
+        now = timezone.now()
+        self.old_hit = self.post('Old hit', now - timedelta(days=20), views=5000)
+        self.fresh = self.post('Fresh discussion', now - timedelta(hours=3), views=50, comments=10)
+        self.ancient = self.post('Ancient classic', now - timedelta(days=400), views=10 ** 6)
+        self.draft = self.post('Draft', now, views=10 ** 6, status='draft')
+
+    def post(self, title, published, views=0, comments=0, status='published'):
+        post = Post.objects.create(
+            title=title, author=self.user, content='Body', status=status, publish_date=published
+        )
+        Post.objects.filter(pk=post.pk).update(views=views, comment_count=comments)
+        return post
+
+    def titles(self, posts):
+        return [post['title'] for post in posts]
+
+    def test_recent_engagement_beats_old_views(self):
+        ranked = trending.compute_trending()
+        self.assertEqual(self.titles(ranked), ['Fresh discussion', 'Old hit'])
+
+    def test_score_decays_with_age(self):
+        self.assertAlmostEqual(trending.score(100, 0, 0, 48, 48), 50)
+        self.assertGreater(trending.score(10, 0, 0, 1, 48), trending.score(10, 0, 0, 100, 48))
+
+    def test_sidebar_is_one_cache_lookup(self):
+        call_command('refresh_trending', stdout=StringIO())
+        context = trending_posts_processor(RequestFactory().get('/'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(context['trending_posts']), ['Fresh discussion', 'Old hit'])
+
+    def test_stale_ranking_is_refreshed_in_the_background(self):
+        cache.set(trending.TRENDING_KEY, (0, [{'title': 'Previous'}]), None)
+        with mock.patch.object(tasks, 'submit') as submit:
+            self.assertEqual(self.titles(trending.get_trending()), ['Previous'])
+        submit.assert_called_once_with(trending._refresh_and_unlock)
+
+        # The task stores the new ranking and releases the lock
+        trending._refresh_and_unlock()
+        self.assertIsNone(cache.get(trending.TRENDING_LOCK_KEY))
+        self.assertEqual(self.titles(trending.get_trending()), ['Fresh discussion', 'Old hit'])
+
+    def test_stale_ranking_served_while_another_worker_refreshes(self):
+        cache.set(trending.TRENDING_KEY, (0, [{'title': 'Previous'}]), None)
+        cache.add(trending.TRENDING_LOCK_KEY, True, 60)
+        with self.assertNumQueries(0), mock.patch.object(tasks, 'submit') as submit:
+            self.assertEqual(self.titles(trending.get_trending()), ['Previous'])
+        submit.assert_not_called()
+
+    def test_cold_cache_is_computed_by_one_worker(self):
+        with mock.patch.object(tasks, 'submit') as submit, self.assertNumQueries(0):
+            self.assertEqual(trending.get_trending(), [])
+            self.assertEqual(trending.get_trending(), [])
+        submit.assert_called_once_with(trending._refresh_and_unlock)
+        # The lock holder's lock is left alone until its task ends
+        self.assertTrue(cache.get(trending.TRENDING_LOCK_KEY))
+
+    def test_sidebar_renders(self):
+        response = self.client.get('/')
+        self.assertContains(response, 'Trending')
+        self.assertContains(response, 'Fresh discussion')
@@ -0,0 +1,104 @@
+# blog/trending.py
+"""
+Trending posts.
+
+The ranking is computed periodically, not per request: every published
+post from the last ``TRENDING_WINDOW_DAYS`` days gets an engagement score
+from its views, likes and comments that decays with age (halving every
+``TRENDING_HALF_LIFE_HOURS``), so a new post with some attention beats an
+old post that merely accumulated views. The top ``TRENDING_SIZE`` posts
+are stored as plain dicts in one cache entry, which is all the sidebar
+reads.
+
+Refreshing happens through ``manage.py refresh_trending`` (cron/systemd
+timer) and, as a fallback, the first request that finds the entry older
+than ``TRENDING_REFRESH_INTERVAL``, or no entry at all, takes a cache lock
+and queues the recompute on the background pool (blog/tasks.py), so only
+one worker does the work and no request waits for it.
+"""
+import heapq
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import tasks
+
+TRENDING_KEY = 'blog:trending'
+TRENDING_LOCK_KEY = 'blog:trending:lock'
+
+# Engagement weights: a comment says more than a like, a like more than a view
+VIEW_WEIGHT = 1
+LIKE_WEIGHT = 5
+COMMENT_WEIGHT = 10
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def score(views, likes, comments, age_hours, half_life_hours):
+    engagement = views * VIEW_WEIGHT + likes * LIKE_WEIGHT + comments * COMMENT_WEIGHT
+    return engagement * 0.5 ** (max(age_hours, 0) / half_life_hours)
+
+
+def compute_trending(now=None):
+    """Rank recent published posts; returns a list of dicts, best first."""
+    from .models import Post
+
+    now = now or timezone.now()
+    half_life = _setting('TRENDING_HALF_LIFE_HOURS', 48)
+    since = now - timedelta(days=_setting('TRENDING_WINDOW_DAYS', 30))
+    rows = (
+        Post.objects.filter(status='published', publish_date__gte=since, publish_date__lte=now)
+        .values_list('id', 'title', 'slug', 'publish_date', 'views', 'like_count', 'comment_count')
+        .iterator(chunk_size=2000)
+    )
+
+    def ranked():
+        for post_id, title, slug, published, views, likes, comments in rows:
+            age_hours = (now - published).total_seconds() / 3600
+            yield score(views, likes, comments, age_hours, half_life), post_id, {
+                'id': post_id,
+                'title': title,
+                'slug': slug,
+                'publish_date': published,
+                'views': views,
+                'like_count': likes,
+                'comment_count': comments,
+            }
+
+    top = heapq.nlargest(_setting('TRENDING_SIZE', 5), ranked(), key=lambda item: item[:2])
+    return [dict(post, score=round(value, 3)) for value, _, post in top]
+
+
+def refresh_trending():
+    """Recompute the ranking and store it; returns the ranked posts."""
+    posts = compute_trending()
+    cache.set(TRENDING_KEY, (time.time(), posts), None)
+    return posts
+
+
+def _refresh_and_unlock():
+    try:
+        refresh_trending()
+    finally:
+        cache.delete(TRENDING_LOCK_KEY)
+
+
+def get_trending():
+    """The stored ranking (one cache lookup); a stale one is refreshed in the background."""
+    entry = cache.get(TRENDING_KEY)
+    posts = []
+    if entry is not None:
+        computed_at, posts = entry
+        if time.time() - computed_at < _setting('TRENDING_REFRESH_INTERVAL', 600):
+            return posts
+    # Stale or missing: the request that takes the lock hands the refresh
+    # to the background pool, and every request keeps serving the old list
+    # (an empty sidebar box on a cold cache) until the new one is stored
+    if cache.add(TRENDING_LOCK_KEY, True, 60):
+        tasks.submit(_refresh_and_unlock)
+    return posts
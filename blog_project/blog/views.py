@@ -1,25 +1,48 @@
 # blog/views.py - CLEAN WORKING VERSION
+import gzip
+import hashlib
+import os
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import Count, Max
 from django.contrib.auth.models import User  # ADD THIS
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from .models import Post, Category
 from comments.models import Comment  # Make sure this import works
+from comments.threads import ORDERS as COMMENT_ORDERS, comment_page
 from .forms import PostForm, CommentForm
+from . import sitemaps
+from .cache import (
+    AVATAR_VERSION_KEY, RELATED_VERSION_KEY, cache_anonymous_page, get_cached_categories,
+    get_version, has_pending_messages,
+)
+from .counters import view_counts
+from .pagination import KeysetPaginator
+from .search import search_posts
 
-def home(request):
-    featured_posts = Post.objects.filter(
+def _featured_posts():
+    return Post.objects.filter(
         status='published', 
         featured=True
     ).order_by('-created_date')[:3]
-    
-    recent_posts = Post.objects.filter(
-        status='published'
-    ).order_by('-created_date')[:5]
-    categories = Category.objects.all()
+
+
+def _recent_posts_paginator():
+    # Home feed of recent posts, paged with ?cursor= (see blog/pagination.py)
+    return KeysetPaginator(Post.objects.filter(status='published'), per_page=5)
+
+
+@cache_anonymous_page
+def home(request):
+    featured_posts = _featured_posts()
+    recent_posts = _recent_posts_paginator().get_page(request.GET.get('cursor'))
+    categories = get_cached_categories()
 
     
     context = {
@@ -29,32 +52,119 @@ def home(request):
     }
     return render(request, 'home.html', context)
 
+@cache_anonymous_page
 def post_list(request):
-    posts_list = Post.objects.filter(status='published').order_by('-created_date')
-    
     query = request.GET.get('q')
-    if query:
-        posts_list = posts_list.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query)
-        )
     
+    category = None
     category_slug = request.GET.get('category')
     if category_slug:
         category = get_object_or_404(Category, slug=category_slug)
-        posts_list = posts_list.filter(categories=category)
     
-    paginator = Paginator(posts_list, 10)
-    page_number = request.GET.get('page')
-    posts = paginator.get_page(page_number)
+    if query:
+        # Ranked full-text search (see blog/search.py); results are ordered
+        # by relevance so they keep page-number pagination
+        paginator = Paginator(search_posts(query, category=category), 10)
+        posts = paginator.get_page(request.GET.get('page'))
+    else:
+        # Browsing uses keyset pagination: no COUNT(*) and no OFFSET
+        posts_list = Post.objects.filter(status='published').select_related('author')
+        if category:
+            posts_list = posts_list.filter(category=category)
+        posts = KeysetPaginator(posts_list, per_page=10).get_page(request.GET.get('cursor'))
     
     context = {
         'posts': posts,
         'query': query,
+        'category': category,
     }
     return render(request, 'blog/post_list.html', context)
 
+def _post_detail_state(slug):
+    return (
+        Post.objects.filter(slug=slug)
+        .values('pk', 'updated_date', 'like_count', 'comment_count')
+        .annotate(last_comment=Max('comments__updated_date'))
+        .order_by()
+    )
+
+
+def _post_detail_versions():
+    return get_version(RELATED_VERSION_KEY), get_version(AVATAR_VERSION_KEY)
+
+
+def _post_detail_validators(request, slug, row=None, versions=None):
+    """
+    ``(post id, ETag, Last-Modified)`` for post_detail, or None if there is
+    no such post.
+
+    One query on the slug index (``row``, when the caller already fetched
+    it): the post's own ``updated_date`` and denormalized like/comment
+    counts plus the newest comment change. The related-posts and avatar
+    versions (``versions``, from the cache) cover the related list and
+    the commenters' avatars, which change in the background. The viewer's
+    user id is mixed in because the page differs per user (like button,
+    edit links, comment form). ETags are weak since every render carries
+    a fresh CSRF mask.
+    """
+    if row is None:
+        row = _post_detail_state(slug).first()
+    if row is None:
+        return None
+    if versions is None:
+        versions = _post_detail_versions()
+    last_modified = max(filter(None, (row['updated_date'], row['last_comment'])))
+    state = '|'.join(str(value) for value in (
+        row['pk'], row['updated_date'].timestamp(),
+        row['last_comment'].timestamp() if row['last_comment'] else '',
+        row['like_count'], row['comment_count'], *versions, request.user.pk or 0,
+    ))
+    etag = 'W/"%s"' % hashlib.md5(state.encode()).hexdigest()
+    return row['pk'], etag, int(last_modified.timestamp())
+
+
+def _post_detail_cache_headers(response, request, etag=None, last_modified=None):
+    """
+    Anonymous copies may be stored by shared caches (``public``), personal
+    ones only by the browser (``private``); either way ``no-cache`` makes
+    them revalidate with the ETag/Last-Modified on every use.
+    """
+    if etag is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def _related_posts(post):
+    # Precomputed neighbours (blog/related.py), one join
+    return (
+        Post.objects.filter(related_backlinks__post=post, status='published')
+        .order_by('related_backlinks__rank')
+        .only('title', 'slug', 'excerpt')
+    )
+
+
 def post_detail(request, slug):
+    validators = None
+    # A pending flash message has to be rendered, so never answer 304 then
+    if request.method in ('GET', 'HEAD') and not has_pending_messages(request):
+        validators = _post_detail_validators(request, slug)
+        if validators is not None:
+            post_id, etag, last_modified = validators
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                # The reader still saw the post
+                if request.method == 'GET':
+                    view_counts.increment(post_id)
+                return _post_detail_cache_headers(not_modified, request, etag, last_modified)
+
     post = get_object_or_404(Post, slug=slug)
     
     if request.method == 'POST':
@@ -68,15 +178,32 @@ def post_detail(request, slug):
             return redirect('post_detail', slug=post.slug)
     else:
         form = CommentForm()
+        post.increment_views()
     
-    comments = post.comments.filter(active=True)
+    # Only the first page of comments; the rest is loaded on demand
+    comment_order = request.GET.get('comments')
+    if comment_order not in COMMENT_ORDERS:
+        comment_order = 'oldest'
+    comments = comment_page(post, order=comment_order)
+    liked = (
+        request.user.is_authenticated
+        and post.likes.filter(pk=request.user.pk).exists()
+    )
+    related_posts = _related_posts(post)
     
     context = {
         'post': post,
         'comments': comments,
+        'comment_order': comment_order,
+        'related_posts': related_posts,
         'form': form,
+        'liked': liked,
     }
-    return render(request, 'blog/post_detail.html', context)
+    response = render(request, 'blog/post_detail.html', context)
+    if validators is not None:
+        _, etag, last_modified = validators
+        return _post_detail_cache_headers(response, request, etag, last_modified)
+    return _post_detail_cache_headers(response, request)
 
 def like_post(request, slug):
     post = get_object_or_404(Post, slug=slug)
@@ -195,13 +322,14 @@ def contact(request):
     return render(request, 'blog/contact.html', context)
 
 
+@cache_anonymous_page
 def category_posts(request, slug):
     """Display all posts in a specific category"""
     category = get_object_or_404(Category, slug=slug)
-    posts = Post.objects.filter(
-        category=category, 
-        status='published'
-    ).order_by('-publish_date')
+    posts = KeysetPaginator(
+        Post.objects.filter(category=category, status='published').select_related('author', 'category'),
+        per_page=12,
+    ).get_page(request.GET.get('cursor'))
     
     context = {
         'category': category,
@@ -211,11 +339,10 @@ def category_posts(request, slug):
 
 
 # blog/views.py - Add this function
+@cache_anonymous_page
 def all_categories(request):
     """Display all categories with post counts"""
-    categories = Category.objects.annotate(
-        post_count=Count('posts', filter=Q(posts__status='published'))
-    ).order_by('name')
+    categories = get_cached_categories()
     
     context = {
         'categories': categories,
@@ -234,7 +361,7 @@ def all_categories(request):
 def like_post(request, slug):
     post = get_object_or_404(Post, slug=slug)
     
-    if request.user in post.likes.all():
+    if post.likes.filter(pk=request.user.pk).exists():
         # Unlike
         post.likes.remove(request.user)
         messages.info(request, 'Post unliked!')
@@ -257,4 +384,45 @@ def category_detail(request, slug):
         'category': category,
         'posts': posts,
     }
-    return render(request, 'blog/category_detail.html', context)
\ No newline at end of file
+    return render(request, 'blog/category_detail.html', context)
+
+def _serve_sitemap(request, path):
+    """Send a pre-compressed sitemap file, gzip-encoded when the client accepts it."""
+    try:
+        mtime = int(os.stat(path).st_mtime)
+    except FileNotFoundError:
+        raise Http404('No such sitemap')
+    not_modified = get_conditional_response(request, last_modified=mtime)
+    if not_modified is not None:
+        return not_modified
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(data, content_type='application/xml')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(data), content_type='application/xml')
+    response['Last-Modified'] = http_date(mtime)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def _sitemap_building():
+    """503 for crawlers while the first sitemap build runs in the background."""
+    response = HttpResponse('Sitemap is being built', status=503, content_type='text/plain')
+    response['Retry-After'] = '60'
+    return response
+
+
+def sitemap_index(request):
+    path = sitemaps.ensure_built()
+    if path is None:
+        return _sitemap_building()
+    return _serve_sitemap(request, path)
+
+
+def sitemap_shard(request, shard):
+    if sitemaps.ensure_built() is None:
+        return _sitemap_building()
+    return _serve_sitemap(request, sitemaps.shard_path(shard))
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_project.settings')
+# Route the hot read paths to their async views (blog/async_views.py)
+os.environ.setdefault('BLOG_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
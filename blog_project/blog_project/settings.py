@@ -42,6 +42,8 @@ CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
 # MIDDLEWARE - ONLY ONE DEFINITION!
 MIDDLEWARE = [
+    # First, so it sees every query of the request (blog/metrics.py)
+    'blog.metrics.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,8 +51,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    # Remove or comment this if you don't have blog.middleware.RateLimitMiddleware
-    # 'blog.middleware.RateLimitMiddleware',
+    # Per-URL-name rate limits (RATELIMITS below, blog/ratelimit.py)
+    'blog.middleware.RateLimitMiddleware',
+    # Pins reads to the primary after writes (DATABASE_REPLICAS below)
+    'blog.middleware.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'blog_project.urls'
@@ -68,10 +72,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages', 
                 'django.template.context_processors.media',
                 'blog.context_processors.categories',
-
-                # Remove these if you don't have the files yet
-                # 'blog.context_processors.categories_processor',
-                # 'blog.context_processors.trending_posts_processor',
+                'blog.context_processors.trending_posts_processor',
             ],
         },
     },
@@ -91,6 +92,23 @@ DATABASES = {
     }
 }
 
+# Read replicas (blog/routers.py). Locally a second SQLite file can stand
+# in for one: set BLOG_DB_REPLICA=replica.sqlite3 and copy the primary
+# into it with `manage.py sync_replica`.
+DATABASE_REPLICAS = []
+if os.environ.get('BLOG_DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ['BLOG_DB_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+# After a write, the visitor reads from the primary for this long (cookie)
+DATABASE_PIN_SECONDS = 5
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -162,6 +180,98 @@ TINYMCE_DEFAULT_CONFIG = {
 }
 
 
+# Buffered post view counter (blog/counters.py)
+VIEW_COUNT_FLUSH_INTERVAL = 10     # seconds
+VIEW_COUNT_FLUSH_THRESHOLD = 100   # pending views
+
+
+# Cache. Page/feed cache versions (blog/cache.py), the view count flush
+# flag (blog/counters.py), the replica lag marker (blog/routers.py), rate
+# limit counters and the trending lock live here. Set BLOG_REDIS_URL (needs
+# the `redis` package) when running more than one worker process: they
+# must all see the same cache. Without it the cache is local to the
+# process, which is only correct for a single process (threads are fine).
+# Never the database cache: every page-cache hit would become a query and
+# every write would queue behind SQLite's single writer.
+if os.environ.get('BLOG_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['BLOG_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},   # the default 300 churns the page cache
+        }
+    }
+
+
+# Versioned page cache for anonymous visitors (blog/cache.py)
+PAGE_CACHE_TIMEOUT = 300   # seconds; invalidation is driven by content changes
+
+FEED_CACHE_TIMEOUT = 3600  # seconds; feed bodies are keyed by the feed stamp
+
+
+# Trending sidebar, refreshed by `manage.py refresh_trending` (blog/trending.py)
+TRENDING_SIZE = 5
+TRENDING_HALF_LIFE_HOURS = 48     # a post's score halves every two days
+TRENDING_WINDOW_DAYS = 30         # older posts are not ranked at all
+TRENDING_REFRESH_INTERVAL = 600   # seconds before a request refreshes a stale ranking
+
+
+# In-process worker pool for off-request work such as image variants (blog/tasks.py)
+BACKGROUND_WORKERS = 2
+BACKGROUND_TASKS_EAGER = False
+
+
+# Serve the hot read paths with their async views (blog/async_views.py);
+# blog_project/asgi.py turns this on for ASGI servers
+ASYNC_VIEWS = os.environ.get('BLOG_ASYNC_VIEWS') == '1'
+
+
+# Per-view query counts, SQL time and N+1 detection, served on /metrics
+# to staff (blog/metrics.py)
+QUERY_METRICS_ENABLED = True
+QUERY_N_PLUS_ONE_THRESHOLD = 5   # identical queries in one request
+
+
+# Neighbours stored per post by `manage.py build_related_posts` (blog/related.py)
+RELATED_POSTS_COUNT = 4
+
+
+# Rate limits by URL name: [(key, rate[, methods]), ...] (blog/ratelimit.py)
+# key is 'ip' or 'user'; rate is '<count>/<s|m|h|d>'; methods default to POST
+# Counters live in the default cache (CACHES above), which must be shared by
+# all workers or each process allows the full rate, and count atomically:
+# the blog.E001 check refuses the database and file caches
+RATELIMITS = {
+    'add_comment': [('user', '5/m'), ('ip', '20/m')],
+    'post_detail': [('user', '5/m'), ('ip', '20/m')],   # comment form posts here
+    'like_post': [('user', '30/m')],
+    'like_comment': [('user', '60/m')],
+    'post_create': [('user', '10/h')],
+    'login': [('ip', '10/m')],
+    'register': [('ip', '5/h')],
+    'password_reset': [('ip', '5/h')],
+    'contact': [('ip', '5/h')],
+}
+RATELIMIT_METHODS = ('POST',)
+RATELIMIT_ENABLED = True
+
+
+# Comments rendered per page / loaded per "load more" (comments/threads.py)
+COMMENTS_PER_PAGE = 20
+
+
+# Pre-rendered sitemap shards (blog/sitemaps.py)
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_SHARD_SIZE = 5000   # post ids per shard (the protocol allows 50,000 URLs)
+SITE_URL = 'http://127.0.0.1:8000'   # absolute base for sitemap <loc> entries
+
+
 # Test runner
 TEST_RUNNER = 'django.test.runner.DiscoverRunner'
 
@@ -191,6 +301,19 @@ if 'test' in sys.argv:
     # Speed up tests by using simpler password validation
     AUTH_PASSWORD_VALIDATORS = []
 
+    # Write view counts through immediately so tests see them
+    VIEW_COUNT_FLUSH_THRESHOLD = 1
+
+    # Run background tasks inline (still after the commit)
+    BACKGROUND_TASKS_EAGER = True
+
+    # Tests opt in with override_settings(RATELIMIT_ENABLED=True)
+    RATELIMIT_ENABLED = False
+
+    # Keep generated sitemap files out of the project tree
+    import tempfile
+    SITEMAP_ROOT = Path(tempfile.mkdtemp(prefix='blog-sitemaps-'))
+
 
 
 
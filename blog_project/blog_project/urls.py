@@ -1,19 +1,17 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.contrib.sitemaps.views import sitemap
 from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import render
 
-from blog import views
-from blog.sitemaps import PostSitemap
+from blog import async_views, export, feeds, metrics, views
 from accounts import views as account_views   # ✅ FIX 1
 
 
-sitemaps = {
-    'posts': PostSitemap,
-}
+# Async versions of the hot read paths under ASGI (see blog/async_views.py)
+hot = async_views if settings.ASYNC_VIEWS else views
+feed_views = async_views if settings.ASYNC_VIEWS else feeds
 
 
 # Error handlers
@@ -34,12 +32,15 @@ urlpatterns = [
     path('admin/', admin.site.urls),
 
     # Home
-    path('', views.home, name='home'),
+    path('', hot.home, name='home'),
 
     # Blog & Comments
     path('blog/', include('blog.urls')),
     path('comment/', include('comments.urls')),
 
+    # Read-only JSON API (blog/api.py)
+    path('api/', include('blog.api_urls')),
+
     # Auth
     path(
         'accounts/login/',
@@ -72,13 +73,20 @@ urlpatterns = [
         name='password_change_done'
     ),
 
-    # Sitemap (optional but good)
-    path(
-        'sitemap.xml',
-        sitemap,
-        {'sitemaps': sitemaps},
-        name='django.contrib.sitemaps.views.sitemap'
-    ),
+    # RSS feeds (blog/feeds.py)
+    path('rss/', feed_views.latest_posts_feed, name='post_feed'),
+    path('rss/category/<slug:slug>/', feed_views.category_feed, name='category_feed'),
+    path('rss/tag/<slug:slug>/', feed_views.tag_feed, name='tag_feed'),
+
+    # Per-view query metrics in Prometheus format, staff only (blog/metrics.py)
+    path('metrics', metrics.metrics_view, name='metrics'),
+
+    # Streaming NDJSON dump of posts and comments, staff only (blog/export.py)
+    path('export/', export.export_view, name='export'),
+
+    # Sitemap index and its pre-rendered shards (blog/sitemaps.py)
+    path('sitemap.xml', hot.sitemap_index, name='sitemap'),
+    path('sitemap-posts-<int:shard>.xml', hot.sitemap_shard, name='sitemap_shard'),
 
     path(
         'accounts/password-reset/',
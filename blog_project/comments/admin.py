@@ -3,6 +3,9 @@ from django.contrib import admin
 # Register your models here.
 # comments/admin.py
 from django.contrib import admin
+from blog.cache import bump_content_version
+from blog.counters import reconcile_post_counters
+from blog.models import Post
 from .models import Comment
 
 class CommentAdmin(admin.ModelAdmin):
@@ -10,6 +13,7 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('active', 'created_date', 'post')
     search_fields = ('author__username', 'post__title', 'content')
     actions = ['approve_comments', 'disapprove_comments']
+    raw_id_fields = ('parent',)
     
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
@@ -17,10 +21,18 @@ class CommentAdmin(admin.ModelAdmin):
     
     def approve_comments(self, request, queryset):
         queryset.update(active=True)
+        self._reconcile_posts(queryset)
     approve_comments.short_description = "Approve selected comments"
     
     def disapprove_comments(self, request, queryset):
         queryset.update(active=False)
+        self._reconcile_posts(queryset)
     disapprove_comments.short_description = "Disapprove selected comments"
+    
+    def _reconcile_posts(self, queryset):
+        # queryset.update() skips the signals that keep Post.comment_count in sync
+        post_ids = set(queryset.values_list('post_id', flat=True))
+        reconcile_post_counters(Post.objects.filter(pk__in=post_ids))
+        bump_content_version()
 
 admin.site.register(Comment, CommentAdmin)
\ No newline at end of file
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class CommentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'comments'
\ No newline at end of file
+    name = 'comments'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PATH_STEP = 10
+
+
+def backfill_paths(apps, schema_editor):
+    # Every existing comment is top-level: its path is just its own id
+    Comment = apps.get_model('comments', 'Comment')
+    batch = []
+    for comment in Comment.objects.only('pk').order_by('pk').iterator(chunk_size=1000):
+        comment.path = f'{comment.pk:0{PATH_STEP}d}'
+        batch.append(comment)
+        if len(batch) >= 1000:
+            Comment.objects.bulk_update(batch, ['path'])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='comments.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,71 @@
 # comments/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
+# Width of one materialized-path segment (a zero-padded comment id)
+PATH_STEP = 10
+
+# Replies nested deeper than this are attached to their parent's parent
+MAX_DEPTH = 8
+
+
+class CommentQuerySet(models.QuerySet):
+    def thread(self):
+        """
+        Active comments in display order (each followed by its replies),
+        with authors and their profiles, in one query. Replies under a
+        hidden comment are left out with it.
+        """
+        visible = set()
+        comments = []
+        queryset = (
+            self.filter(active=True)
+            .select_related('author', 'author__profile')
+            .order_by('path')
+        )
+        for comment in queryset:
+            if comment.parent_id is None or comment.parent_id in visible:
+                visible.add(comment.pk)
+                comments.append(comment)
+        return comments
+
+
 class Comment(models.Model):
     # Use string reference to avoid circular import
     post = models.ForeignKey('blog.Post', on_delete=models.CASCADE, 
                              related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True,
+                               related_name='replies')
+    # Materialized path: the ids of all ancestors and the comment itself,
+    # PATH_STEP digits each, so ordering by path yields the rendered tree
+    path = models.CharField(max_length=255, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
     content = models.TextField()
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=True)
+
+    objects = CommentQuerySet.as_manager()
     
     class Meta:
         ordering = ['created_date']
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ]
     
     def __str__(self):
-        return f"Comment by {self.author} on {self.post}"
\ No newline at end of file
+        return f"Comment by {self.author} on {self.post}"
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.parent_id and self.parent.depth >= MAX_DEPTH - 1:
+            self.parent = self.parent.parent
+        # The path needs the primary key, so it is written right after the
+        # insert; together, so no comment is ever stored without one
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not self.path:
+                prefix = self.parent.path if self.parent_id else ''
+                self.path = f'{prefix}{self.pk:0{PATH_STEP}d}'
+                self.depth = len(self.path) // PATH_STEP - 1
+                Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
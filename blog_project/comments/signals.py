@@ -0,0 +1,55 @@
+# comments/signals.py
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from blog.cache import bump_content_version
+from blog.models import Post
+from .models import Comment
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_page_cache(sender, **kwargs):
+    bump_content_version()
+
+
+# Denormalized Post.comment_count, counting active comments only
+def _adjust_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(comment_count=F('comment_count') + delta)
+
+
+@receiver(post_init, sender=Comment)
+def remember_active(sender, instance, **kwargs):
+    # What the database holds, so toggling `active` can be detected on save.
+    # Deferred fields are not in __dict__; reading them would query, so a
+    # deferred `active` stays unknown (None) until a save or delete needs it
+    instance._counted_active = instance.__dict__.get('active') if instance.pk else False
+
+
+@receiver([pre_save, pre_delete], sender=Comment)
+def load_deferred_count_fields(sender, instance, **kwargs):
+    # What the count needs from a deferred instance, read while the row is there
+    if instance._counted_active is None or 'post_id' not in instance.__dict__:
+        row = Comment.objects.filter(pk=instance.pk).values('active', 'post_id').first() or {}
+        if instance._counted_active is None:
+            instance._counted_active = bool(row.get('active'))
+        if 'post_id' not in instance.__dict__ and row:
+            instance.post_id = row['post_id']
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.active != instance._counted_active:
+        _adjust_comment_count(instance.post_id, 1 if instance.active else -1)
+    instance._counted_active = instance.active
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, origin=None, **kwargs):
+    # Nothing to adjust when the post itself is being deleted
+    if isinstance(origin, Post):
+        return
+    if instance._counted_active:
+        _adjust_comment_count(instance.post_id, -1)
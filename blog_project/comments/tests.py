@@ -1,3 +1,175 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Post
+from .models import MAX_DEPTH, Comment
+
+
+class ThreadedCommentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='threader', password='testpass123')
+        self.post = Post.objects.create(
+            title='Threaded post', author=self.user, content='Body', status='published'
+        )
+
+    def comment(self, content, parent=None, post=None):
+        return Comment.objects.create(
+            post=post or self.post, author=self.user, content=content, parent=parent
+        )
+
+    def test_path_and_depth(self):
+        root = self.comment('root')
+        reply = self.comment('reply', parent=root)
+        self.assertEqual(root.depth, 0)
+        self.assertEqual(reply.depth, 1)
+        self.assertTrue(reply.path.startswith(root.path))
+        reply.refresh_from_db()
+        self.assertEqual(reply.depth, 1)
+
+    def test_thread_is_depth_first_in_one_query(self):
+        first = self.comment('first')
+        second = self.comment('second')
+        first_reply = self.comment('first reply', parent=first)
+        nested = self.comment('nested', parent=first_reply)
+        second_reply = self.comment('second reply', parent=second)
+
+        with self.assertNumQueries(1):
+            thread = self.post.comments.thread()
+            usernames = [comment.author.username for comment in thread]
+        self.assertEqual(thread, [first, first_reply, nested, second, second_reply])
+        self.assertEqual(usernames, ['threader'] * 5)
+
+    def test_replies_to_hidden_comments_are_hidden(self):
+        root = self.comment('root')
+        self.comment('reply', parent=root)
+        root.active = False
+        root.save()
+        self.assertEqual(self.post.comments.thread(), [])
+
+    def test_path_is_written_with_the_insert(self):
+        update = QuerySet.update
+
+        def fail_path_update(queryset, **kwargs):
+            if queryset.model is Comment:
+                raise RuntimeError
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=fail_path_update):
+            with self.assertRaises(RuntimeError):
+                self.comment('root')
+        self.assertFalse(Comment.objects.exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_deferred_active_costs_no_query(self):
+        root = self.comment('root')
+        with self.assertNumQueries(1):
+            comments = list(Comment.objects.only('id', 'path', 'depth'))
+        with self.captureOnCommitCallbacks(execute=True):
+            comments[0].delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertEqual(root.depth, 0)
+
+    def test_depth_is_capped(self):
+        parent = None
+        for i in range(MAX_DEPTH + 2):
+            parent = self.comment(f'level {i}', parent=parent)
+        self.assertEqual(parent.depth, MAX_DEPTH - 1)
+
+    def test_add_comment_ignores_parent_from_another_post(self):
+        other = Post.objects.create(
+            title='Other post', author=self.user, content='Body', status='published'
+        )
+        foreign = self.comment('foreign', post=other)
+        own = self.comment('own')
+        self.client.login(username='threader', password='testpass123')
+
+        url = reverse('add_comment', args=[self.post.slug])
+        self.client.post(url, {'content': 'cross-post reply', 'parent_id': foreign.pk})
+        self.client.post(url, {'content': 'real reply', 'parent_id': own.pk})
+
+        self.assertIsNone(Comment.objects.get(content='cross-post reply').parent)
+        self.assertEqual(Comment.objects.get(content='real reply').parent, own)
+
+    def test_post_detail_renders_thread(self):
+        root = self.comment('root comment')
+        self.comment('reply comment', parent=root)
+        response = self.client.get(reverse('post_detail', args=[self.post.slug]))
+        self.assertContains(response, 'reply comment')
+        self.assertContains(response, 'class="comment reply"')
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pager', password='testpass123')
+        self.post = Post.objects.create(
+            title='Busy post', author=self.user, content='Body', status='published'
+        )
+        self.roots = [self.comment(f'root {i}') for i in range(4)]
+        self.replies = [self.comment(f'reply {i}', parent=self.roots[0]) for i in range(2)]
+        self.url = reverse('comment_list', args=[self.post.slug])
+
+    def comment(self, content, parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.user, content=content, parent=parent
+        )
+
+    def fetch(self, **params):
+        return self.client.get(self.url, {'format': 'json', **params}).json()
+
+    def contents(self, data):
+        return [comment['content'] for comment in data['comments']]
+
+    def test_oldest_walks_the_tree_in_pages(self):
+        first = self.fetch()
+        self.assertEqual(self.contents(first), ['root 0', 'reply 0', 'reply 1'])
+        second = self.fetch(cursor=first['next_cursor'])
+        self.assertEqual(self.contents(second), ['root 1', 'root 2', 'root 3'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_newest_pages_top_level_with_reply_counts(self):
+        data = self.fetch(order='newest')
+        self.assertEqual(self.contents(data), ['root 3', 'root 2', 'root 1'])
+        rest = self.fetch(order='newest', cursor=data['next_cursor'])
+        self.assertEqual(self.contents(rest), ['root 0'])
+        self.assertEqual(rest['comments'][0]['reply_count'], 2)
+
+    def test_thread_expansion(self):
+        data = self.fetch(thread=self.roots[0].pk)
+        self.assertEqual(self.contents(data), ['reply 0', 'reply 1'])
+
+    def test_hidden_comment_hides_its_replies(self):
+        self.roots[0].active = False
+        self.roots[0].save()
+        self.assertEqual(self.contents(self.fetch()), ['root 1', 'root 2', 'root 3'])
+        response = self.client.get(self.url, {'thread': self.roots[0].pk})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_query_count_is_bounded(self):
+        for i in range(20):
+            self.comment(f'extra {i}')
+        cache.clear()
+        # Avatar URLs are loaded once, then served from the cache
+        with self.assertNumQueries(5):
+            self.client.get(self.url, {'order': 'newest'})
+        with self.assertNumQueries(4):
+            self.client.get(self.url, {'order': 'newest'})
+
+    def test_html_fragment_and_post_detail_first_page(self):
+        response = self.client.get(self.url, {'order': 'newest'})
+        self.assertContains(response, 'Load more comments')
+        cursor = self.fetch(order='newest')['next_cursor']
+        response = self.client.get(self.url, {'order': 'newest', 'cursor': cursor})
+        self.assertContains(response, 'Show 2 replies')
+
+        response = self.client.get(reverse('post_detail', args=[self.post.slug]))
+        self.assertContains(response, 'reply 1')
+        self.assertNotContains(response, 'root 3')
+        self.assertContains(response, 'Load more comments')
@@ -0,0 +1,96 @@
+# comments/threads.py
+"""
+Keyset-paginated comment pages.
+
+All three views of a thread are walks over the materialized path, which
+is unique and covered by the ``(post, path)`` index, so every page costs
+an indexed range scan no matter how many comments the post has:
+
+* ``oldest``: the whole tree depth-first, each comment followed by its
+  replies;
+* ``newest``: top-level comments only, newest first, each with the number
+  of replies that can be expanded;
+* ``thread``: the replies below one comment, depth-first.
+
+Replies under a hidden (inactive) comment are left out with it.
+"""
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.functions import Length, Substr
+
+from accounts.avatars import attach_avatar_urls
+from blog.pagination import KeysetPaginator
+from .models import PATH_STEP, Comment
+
+ORDERS = ('oldest', 'newest')
+
+
+def per_page():
+    return getattr(settings, 'COMMENTS_PER_PAGE', 20)
+
+
+def _hidden_paths(post):
+    # Normally empty; moderation only hides a handful of comments per post
+    return tuple(
+        Comment.objects.filter(post=post, active=False)
+        .order_by().values_list('path', flat=True)
+    )
+
+
+def exclude_hidden(queryset, post=None):
+    """
+    ``queryset`` without the comments below an inactive one. For one
+    ``post`` that is a prefix exclusion per hidden path; across posts each
+    comment looks for an inactive ancestor on its own post.
+    """
+    if post is not None:
+        for path in _hidden_paths(post):
+            queryset = queryset.exclude(path__startswith=path)
+        return queryset
+    hidden_ancestor = Comment.objects.filter(
+        post=OuterRef('post'), active=False, path=Substr(OuterRef('path'), 1, Length('path')),
+    )
+    return queryset.exclude(Exists(hidden_ancestor))
+
+
+def comment_page(post, order='oldest', cursor=None, thread=None):
+    """
+    Return a KeysetPage of comments on ``post``. ``thread`` (a Comment)
+    restricts the page to that comment's replies.
+    """
+    queryset = Comment.objects.filter(post=post, active=True).select_related('author')
+    if thread is not None:
+        queryset = queryset.filter(path__startswith=thread.path, depth__gt=thread.depth)
+        ordering = ('path',)
+    elif order == 'newest':
+        queryset = queryset.filter(depth=0)
+        ordering = ('-path',)
+    else:
+        ordering = ('path',)
+
+    queryset = exclude_hidden(queryset, post)
+
+    page = KeysetPaginator(queryset, ordering=ordering, per_page=per_page()).get_page(cursor)
+    if thread is None and order == 'newest':
+        _annotate_reply_counts(post, page.object_list)
+    # Avatar URLs come from the cache instead of a profile join
+    attach_avatar_urls(page.object_list)
+    return page
+
+
+def _annotate_reply_counts(post, roots):
+    """Set ``reply_count`` on top-level comments with one grouped query."""
+    if not roots:
+        return
+    root_paths = [root.path for root in roots]
+    counts = dict(
+        Comment.objects.filter(post=post, active=True, depth__gt=0)
+        .annotate(root=Substr('path', 1, PATH_STEP))
+        .filter(root__in=root_paths)
+        .order_by()
+        .values('root')
+        .annotate(total=Count('id'))
+        .values_list('root', 'total')
+    )
+    for root in roots:
+        root.reply_count = counts.get(root.path, 0)
@@ -1,11 +1,12 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_POST
 from .models import Comment
 from blog.models import Post
 from .forms import CommentForm
+from .threads import ORDERS, comment_page
 
 # Add Comment View
 @login_required
@@ -19,20 +20,58 @@ def add_comment(request, post_slug):
         comment.post = post
         comment.author = request.user
         
-        # Handle reply to parent comment
+        # Handle reply to parent comment (only a visible one on the same post)
         parent_id = request.POST.get('parent_id')
-        if parent_id:
-            try:
-                parent_comment = Comment.objects.get(id=parent_id)
-                comment.parent = parent_comment
-            except Comment.DoesNotExist:
-                pass
+        if parent_id and parent_id.isdigit():
+            comment.parent = Comment.objects.filter(
+                id=parent_id, post=post, active=True
+            ).first()
         
         comment.save()
         messages.success(request, 'Comment added successfully!')
     
     return redirect('post_detail', slug=post_slug)
 
+# Comment pages for incremental loading (see comments/threads.py)
+def comment_list(request, post_slug):
+    post = get_object_or_404(Post.objects.only('id', 'slug'), slug=post_slug, status='published')
+    order = request.GET.get('order')
+    if order not in ORDERS:
+        order = 'oldest'
+    thread = None
+    thread_id = request.GET.get('thread', '')
+    if thread_id:
+        if not thread_id.isdigit():
+            raise Http404('No such thread')
+        thread = get_object_or_404(
+            Comment.objects.only('id', 'path', 'depth'), pk=thread_id, post=post, active=True
+        )
+    page = comment_page(post, order=order, cursor=request.GET.get('cursor'), thread=thread)
+
+    if request.GET.get('format') == 'json' or 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'parent_id': comment.parent_id,
+                    'depth': comment.depth,
+                    'author': comment.author.username,
+                    'avatar': comment.avatar_urls.get('64'),
+                    'content': comment.content,
+                    'created_date': comment.created_date.isoformat(),
+                    'reply_count': getattr(comment, 'reply_count', None),
+                }
+                for comment in page
+            ],
+            'next_cursor': page.next_cursor,
+        })
+    return render(request, 'comments/comment_page.html', {
+        'post': post,
+        'page': page,
+        'order': order,
+        'thread': thread,
+    })
+
 # Update Comment View
 @login_required
 def update_comment(request, pk):
@@ -0,0 +1,131 @@
+# tests/performance/test_async_performance.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import TransactionTestCase, override_settings
+from django.urls import include, path
+
+from blog import async_views
+from blog.benchmark import wsgi_get
+from blog.counters import view_counts
+from blog.models import Category, Post
+
+# The site as served under ASGI: hot read paths routed to the async views
+urlpatterns = [
+    path('', async_views.home, name='home'),
+    path('blog/posts/', async_views.post_list, name='post_list'),
+    path('blog/post/<slug:slug>/', async_views.post_detail, name='post_detail'),
+    path('blog/category/<slug:slug>/', async_views.category_posts, name='category_posts'),
+    path('', include('blog_project.urls')),
+]
+
+CONCURRENCY = 16
+REQUESTS = 200
+
+
+async def asgi_get(app, url):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': url, 'raw_path': url.encode(),
+        'query_string': b'', 'root_path': '', 'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    pending = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    status = []
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        # The client never disconnects; Django cancels this wait itself
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+@override_settings(VIEW_COUNT_FLUSH_THRESHOLD=10 ** 9, VIEW_COUNT_FLUSH_INTERVAL=10 ** 9)
+class AsyncThroughputTestCase(TransactionTestCase):
+    """
+    Throughput of the hot read paths under concurrent load: the sync views
+    behind Django's WSGI handler on a thread per connection, against the
+    async views behind the ASGI handler on one event loop. Both handlers
+    run the full middleware stack in process, so the numbers compare the
+    serving models, not network or server overhead.
+    """
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='loaduser', password='testpass123')
+        self.category = Category.objects.create(name='Load')
+        Post.objects.bulk_create(
+            Post(
+                title=f'Load Post {i}', slug=f'load-post-{i}', author=user,
+                content='x' * 2000, excerpt='Excerpt', status='published',
+                category=self.category, featured=i < 3,
+            )
+            for i in range(50)
+        )
+        self.addCleanup(view_counts.flush)
+
+    def urls(self):
+        # Mostly post pages, which are never page cached, plus the listings
+        paths = ['/', '/blog/posts/', f'/blog/category/{self.category.slug}/']
+        paths += [f'/blog/post/load-post-{i}/' for i in range(20)]
+        return [paths[i % len(paths)] for i in range(REQUESTS)]
+
+    def report(self, label, statuses, elapsed):
+        self.assertEqual(set(statuses), {200})
+        print(f"{label}: {len(statuses)} requests, concurrency {CONCURRENCY}, "
+              f"{elapsed:.2f}s, {len(statuses) / elapsed:.0f} req/s")
+        return len(statuses) / elapsed
+
+    def run_wsgi(self):
+        app = WSGIHandler()
+        urls = self.urls()
+
+        def worker(share):
+            return [wsgi_get(app, url) for url in share]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(CONCURRENCY) as pool:
+            shares = pool.map(worker, [urls[i::CONCURRENCY] for i in range(CONCURRENCY)])
+            statuses = [status for share in shares for status in share]
+        return statuses, time.perf_counter() - start
+
+    def run_asgi(self):
+        app = ASGIHandler()
+        urls = self.urls()
+
+        async def worker(share):
+            return [await asgi_get(app, url) for url in share]
+
+        async def main():
+            shares = await asyncio.gather(
+                *(worker(urls[i::CONCURRENCY]) for i in range(CONCURRENCY))
+            )
+            return [status for share in shares for status in share]
+
+        start = time.perf_counter()
+        statuses = asyncio.run(main())
+        return statuses, time.perf_counter() - start
+
+    def test_wsgi_vs_asgi_throughput(self):
+        print("\nSync WSGI vs async ASGI throughput:")
+        # Warm up template loaders, caches and connections first
+        self.run_wsgi()
+        wsgi = self.report('WSGI, sync views', *self.run_wsgi())
+
+        cache.clear()
+        with override_settings(ROOT_URLCONF=__name__):
+            self.run_asgi()
+            asgi = self.report('ASGI, async views', *self.run_asgi())
+        print(f"ASGI/WSGI throughput ratio: {asgi / wsgi:.2f}")
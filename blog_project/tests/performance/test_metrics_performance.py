@@ -0,0 +1,44 @@
+# tests/performance/test_metrics_performance.py
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from blog import metrics
+from blog.models import Post
+
+
+class QueryMetricsOverheadTestCase(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='meteruser', password='testpass123')
+        self.post = Post.objects.create(
+            title='Overhead post', author=user, content='x', status='published'
+        )
+        self.assertIn(metrics.record_query, connection.execute_wrappers)
+
+    def time_queries(self, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            Post.objects.filter(pk=self.post.pk).exists()
+        return time.perf_counter() - start
+
+    def test_recording_overhead_per_query(self):
+        """Cost the execute wrapper adds to each query while a request is recorded"""
+        iterations = 3000
+        self.time_queries(200)  # warm up
+
+        idle = self.time_queries(iterations)
+        token = metrics._current.set(metrics.RequestQueries())
+        try:
+            recorded = self.time_queries(iterations)
+        finally:
+            metrics._current.reset(token)
+
+        overhead = (recorded - idle) / iterations * 1e6
+        print("\nQuery metrics overhead test:")
+        print(f"{iterations} queries: {idle:.3f}s idle, {recorded:.3f}s recorded")
+        print(f"Overhead: {overhead:.1f} microseconds per query")
+
+        # A small fraction of even the cheapest query
+        self.assertLess(overhead, 50)
@@ -30,7 +30,7 @@ class PerformanceTestCase(TestCase):
         
         # Simulate multiple requests
         for _ in range(10):
-            response = self.client.get('/posts/')
+            response = self.client.get('/blog/posts/')
             self.assertEqual(response.status_code, 200)
         
         end_time = time.time()
@@ -51,7 +51,7 @@ class PerformanceTestCase(TestCase):
         connection.queries_log.clear()
         
         # Access post list
-        self.client.get('/posts/')
+        self.client.get('/blog/posts/')
         
         query_count = len(connection.queries)
         print(f"\nDatabase queries for post list: {query_count}")
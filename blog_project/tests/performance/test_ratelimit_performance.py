@@ -0,0 +1,53 @@
+# tests/performance/test_ratelimit_performance.py
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+import threading
+import time
+
+from blog.ratelimit import Policy, check
+
+
+class RateLimitPerformanceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().post('/comment/add/post/', REMOTE_ADDR='10.0.0.1')
+        self.request.user = AnonymousUser()
+        # Two policies, as configured for comment posting
+        self.policies = [Policy('bench', 'user', '1000000/m'), Policy('bench', 'ip', '1000000/m')]
+
+    def test_rate_limit_overhead(self):
+        """Per-request cost of the rate limit checks (the configured cache)"""
+        iterations = 10000
+        start_time = time.perf_counter()
+
+        for _ in range(iterations):
+            check(self.policies, self.request)
+
+        execution_time = time.perf_counter() - start_time
+        per_request = execution_time / iterations * 1e6
+
+        print("\nRate limit overhead test:")
+        print(f"{iterations} checks completed in {execution_time:.3f} seconds")
+        print(f"Average: {per_request:.1f} microseconds per request (2 policies)")
+
+        # Should stay in the microseconds, far below a database query
+        self.assertLess(per_request, 500)
+
+    def test_concurrent_hits_are_all_counted(self):
+        """Eight threads x 250 hits: the configured cache loses none of them"""
+        policy = Policy('bench', 'ip', '100000/d')
+        now = time.time()
+
+        def worker():
+            for _ in range(250):
+                policy.hit(self.request, now=now)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        index = int(now // policy.window)
+        self.assertEqual(cache.get(f'rl:bench:ip:ip10.0.0.1:{index}'), 2000)